@@ -43,7 +43,8 @@ const state = {
   activePreset: null,
   lakeId: null,
   lakeMeta: null,
-  lakesIndex: []
+  lakesIndex: [],
+  bundleHash: null
 };
 
 const $ = (sel, root = document) => root.querySelector(sel);
@@ -189,6 +190,42 @@ function parseOpenParam() {
   }
 }
 
+// Lakes holding type:id, from the prebuilt index (data/poi-index.json, scripts/poi_index.py),
+// so a deep link resolves without loading every lake's data.
+async function lakesForOpenTarget({ type, id }) {
+  const idx = await loadJSON('./data/poi-index.json').catch(() => null);
+  const hit = idx?.ids?.[`${type}:${id}`];
+  if (hit === undefined) return [];
+  return (Array.isArray(hit) ? hit : [hit]).map(i => idx.lakes[i]).filter(Boolean);
+}
+
+// Compact per-lake bundle (data/bundles/, scripts/build_map_bundle.py): one request
+// instead of six. The manifest is small and fetched fresh; bundle names carry a content
+// hash, so the bundle itself may come from the browser cache.
+async function loadLakeBundle(lakeId) {
+  const manifest = await loadJSON('./data/bundles/manifest.json').catch(() => null);
+  const file = manifest?.[lakeId]?.file;
+  if (!file) return null;
+  const res = await fetch(`./data/bundles/${file}`, { cache: 'force-cache' });
+  if (!res.ok) return null;
+  const bundle = await res.json();
+  state.bundleHash = manifest[lakeId].hash || null;
+  const keys = bundle.keys || {};
+  const expand = rows => (rows || []).map(row => {
+    const out = {};
+    for (const [k, v] of Object.entries(row)) out[keys[k] || k] = v;
+    return out;
+  });
+  return [
+    expand(bundle.harbors),
+    expand(bundle.anchors),
+    expand(bundle.rentals),
+    expand(bundle.gastros),
+    expand(bundle.services),
+    bundle.layers || []
+  ];
+}
+
 function findItemByTypeAndId(type, id) {
   const d = state.data || {};
   const list = {
@@ -291,8 +328,16 @@ function setLang(lang) {
   renderAll();
 }
 
+// Fingerprinted name of a static asset in a dist/ build (scripts/build_assets.py sets
+// window.ASSET_MAP); in the source tree every path maps to itself.
+function assetUrl(path) {
+  return (window.ASSET_MAP && window.ASSET_MAP[path]) || path;
+}
+
 async function loadJSON(url) {
-  const res = await fetch(url, { cache: 'no-store' });
+  // hashed names never change content; everything else is revalidated (304 when unchanged)
+  const target = assetUrl(url);
+  const res = await fetch(target, { cache: target !== url ? 'force-cache' : 'no-cache' });
   if (!res.ok) throw new Error(`Failed to load ${url}: ${res.status}`);
   return await res.json();
 }
@@ -311,6 +356,76 @@ function matchesQuery(obj, q) {
   return hay.includes(q.toLowerCase());
 }
 
+// Prebuilt search index (data/search/, scripts/build_search_index.py): a query scans the
+// per-type vocabulary instead of every item. Same manifest/hash scheme as the bundles.
+async function loadSearchIndex(lakeId) {
+  const manifest = await loadJSON('./data/search/manifest.json').catch(() => null);
+  const file = manifest?.[lakeId]?.file;
+  if (!file) return null;
+  const res = await fetch(`./data/search/${file}`, { cache: 'force-cache' });
+  if (!res.ok) return null;
+  const idx = await res.json();
+  idx.stopSet = new Set(idx.stop || []);
+  return idx;
+}
+
+function foldText(s) {
+  return String(s).toLowerCase().replace(/ß/g, 'ss').normalize('NFKD').replace(/[\u0300-\u036f]/g, '');
+}
+
+function searchTokenIds(ti, w) {
+  const toks = ti.tokens;
+  const ids = [];
+  if (w.length >= 3) {
+    toks.forEach((tok, j) => { if (tok.includes(w)) ids.push(j); });
+    return ids;
+  }
+  const [start, end] = w.length === 2 ? (ti.prefix[w] || [0, 0]) : [0, toks.length];
+  let lo = start;
+  let hi = end;
+  while (lo < hi) {
+    const mid = (lo + hi) >> 1;
+    if (toks[mid] < w) lo = mid + 1; else hi = mid;
+  }
+  for (; lo < end && toks[lo].startsWith(w); lo++) ids.push(lo);
+  return ids;
+}
+
+function searchPostings(ti, j) {
+  ti.decoded = ti.decoded || [];
+  if (!ti.decoded[j]) {
+    let acc = 0;
+    ti.decoded[j] = ti.post[j].map(d => (acc += d));
+  }
+  return ti.decoded[j];
+}
+
+// Sorted ordinals into `list` matching q, or null when the index cannot answer and the
+// linear scan has to: not loaded, or built from another bundle than the one on the map
+// (ordinals of a stale index point at the wrong items even when the counts agree).
+function searchOrdinals(list, type, q) {
+  const idx = state.search;
+  const ti = idx?.[type];
+  if (!ti || !idx.bundle || idx.bundle !== state.bundleHash) return null;
+  if (list !== state.data[type] || ti.n !== list.length) return null;
+  const memo = (state.searchMemo = state.searchMemo || {});
+  if (memo[type]?.q === q && memo[type].list === list) return memo[type].hits;
+
+  const words = foldText(q).match(/[a-z0-9]+/g) || [];
+  const keepLast = words.length > 0 && !/\s$/.test(q);
+  const terms = words.filter((w, i) => !idx.stopSet.has(w) || (keepLast && i === words.length - 1));
+  let hits = null;
+  for (const w of terms) {
+    const found = new Set();
+    for (const j of searchTokenIds(ti, w)) for (const o of searchPostings(ti, j)) found.add(o);
+    hits = hits === null ? found : new Set([...hits].filter(o => found.has(o)));
+    if (!hits.size) break;
+  }
+  const out = hits === null ? list.map((_, i) => i) : [...hits].sort((a, b) => a - b);
+  memo[type] = { q, list, hits: out };
+  return out;
+}
+
 function isVerified(item) {
   return !!((item?.source || '').trim() && (item?.lastVerified || '').trim());
 }
@@ -326,12 +441,15 @@ function applyFilters(list, type) {
   const f = type === 'anchors' ? state.filtersAnchors : state.filtersHarbors;
   let out = list;
 
+  if (f.q) {
+    const hits = searchOrdinals(list, type, f.q);
+    out = hits ? hits.map(i => list[i]) : out.filter(x => matchesQuery(x, f.q));
+  }
+
   if (f.country !== 'ALL') {
     out = out.filter(x => (x.country || '').toUpperCase() === f.country);
   }
 
-  if (f.q) out = out.filter(x => matchesQuery(x, f.q));
-
   if (type === 'anchors') {
     if (f.overnight !== 'ANY') {
       const val = f.overnight === 'YES';
@@ -1253,6 +1371,7 @@ function initMap() {
   state.map.setView(c, z);
 
   L.control.zoom({ position: 'topright' }).addTo(state.map);
+  state.map.on('moveend', () => { if (state.tiles) drawTiledMarkers(); });
 
   L.tileLayer('https://{s}.basemaps.cartocdn.com/dark_all/{z}/{x}/{y}{r}.png', {
     attribution: '© OpenStreetMap © CartoDB',
@@ -1302,6 +1421,8 @@ function clearMarkers() {
   // remove individual markers
   Object.values(state.markers).flat().forEach(m => { try { m.remove(); } catch {} });
   state.markers = { harbors: [], anchors: [], rentals: [], gastros: [] };
+  (state.tileMarkers || []).forEach(m => { try { m.remove(); } catch {} });
+  state.tileMarkers = [];
 
   // remove cluster layers
   try {
@@ -1325,22 +1446,95 @@ function makeClusterGroup() {
   }
 }
 
-function redrawMarkers({ harbors, anchors, rentals, gastros }) {
-  if (!state.map) return;
+// Viewport tiles for lakes with many POIs (data/tiles/, scripts/build_tiles.py): below
+// the detail zoom the map shows the prebuilt cluster summaries, at and above it only the
+// markers of the tiles in view. Lakes without tiles keep one marker per POI.
+const MAP_TYPES = ['harbors', 'anchors', 'rentals', 'gastros'];
+const MAP_TYPE_COLORS = { harbors: '#c9a962', anchors: '#4ade80', rentals: '#f472b6', gastros: '#fb923c' };
+
+async function loadTileIndex(lakeId) {
+  const manifest = await loadJSON('./data/tiles/manifest.json').catch(() => null);
+  if (!manifest?.[lakeId]) return null;
+  const idx = await loadJSON(`./data/tiles/${lakeId}/index.json`).catch(() => null);
+  // tiles hold ordinals, so they must come from the bundle the page loaded; equal
+  // counts alone do not say the ordinals still point at the same items
+  if (!idx || !idx.bundle || idx.bundle !== state.bundleHash) return null;
+  if (MAP_TYPES.some(t => (idx.counts?.[t] ?? 0) !== (state.data[t] || []).length)) return null;
+  idx.lake = lakeId;
+  idx.cache = new Map();
+  return idx;
+}
+
+function tileXY(lat, lng, z) {
+  const n = 2 ** z;
+  const la = Math.max(-85.0511, Math.min(85.0511, lat)) * Math.PI / 180;
+  return [(lng + 180) / 360 * n, (1 - Math.asinh(Math.tan(la)) / Math.PI) / 2 * n];
+}
+
+function fetchTile(idx, key) {
+  if (!idx.cache.has(key)) {
+    idx.cache.set(key, fetch(`./data/tiles/${idx.lake}/${key}.json?v=${idx.v}`)
+      .then(res => (res.ok ? res.json() : null))
+      .catch(() => null));
+  }
+  return idx.cache.get(key);
+}
+
+function clusterIcon(type, n) {
+  const size = Math.round(18 + 12 * Math.log10(n + 1));
+  return L.divIcon({
+    className: 'custom-marker',
+    html: `<div style="width:${size}px;height:${size}px;line-height:${size - 6}px;text-align:center;font-size:11px;font-weight:600;color:#0c1929;background:${MAP_TYPE_COLORS[type]};border-radius:50%;border:3px solid #0c1929;box-shadow:0 2px 8px rgba(0,0,0,0.4);">${n}</div>`,
+    iconSize: [size, size],
+    iconAnchor: [size / 2, size / 2]
+  });
+}
+
+async function drawTiledMarkers() {
+  const idx = state.tiles;
+  const lists = state.mapLists;
+  if (!idx || !lists || !state.map) return;
+  const seq = (state.tileSeq = (state.tileSeq || 0) + 1);
+  const z = Math.max(idx.minZoom, Math.min(Math.round(state.map.getZoom()), idx.detailZoom));
+  const b = state.map.getBounds();
+  const [x0, y0] = tileXY(b.getNorth(), b.getWest(), z);
+  const [x1, y1] = tileXY(b.getSouth(), b.getEast(), z);
+  const keys = [];
+  for (let x = Math.floor(x0); x <= Math.floor(x1); x++) {
+    for (let y = Math.floor(y0); y <= Math.floor(y1); y++) {
+      if (idx.tiles[`${z}/${x}/${y}`] !== undefined) keys.push(`${z}/${x}/${y}`);
+    }
+  }
+  const tiles = (await Promise.all(keys.map(k => fetchTile(idx, k)))).filter(Boolean);
+  if (seq !== state.tileSeq) return;
   clearMarkers();
 
-  // Zones layers
-  try {
-    (state.zoneLayers || []).forEach(l => l.remove());
-    state.zoneLayers = [];
-    if (state.zoneLayer) {
-      state.zoneLayer.remove();
-      state.zoneLayer = null;
+  // Filters narrow the lists; the summaries count everything, so use them only unfiltered.
+  const filtered = MAP_TYPES.some(t => lists[t].length && lists[t].length !== (state.data[t] || []).length);
+  if (z < idx.detailZoom) {
+    if (filtered) {
+      drawMarkerLists(lists);
+      return;
     }
-  } catch {
-    // ignore
+    tiles.forEach(tile => (tile.c || []).forEach(([type, n, lat, lng]) => {
+      if (!lists[type]?.length) return;
+      const m = L.marker([lat, lng], { icon: clusterIcon(type, n) }).addTo(state.map);
+      m.on('click', () => state.map.setView([lat, lng], Math.min(z + 2, idx.detailZoom)));
+      state.tileMarkers.push(m);
+    }));
+    return;
   }
 
+  const visible = {};
+  MAP_TYPES.forEach(t => {
+    const allowed = new Set(lists[t]);
+    const data = state.data[t] || [];
+    visible[t] = tiles.flatMap(tile => (tile[t] || []).map(i => data[i])).filter(x => x && allowed.has(x));
+  });
+  drawMarkerLists(visible);
+}
+
+function drawMarkerLists({ harbors, anchors, rentals, gastros }) {
   const harborIcon = makeIcon('#c9a962', 16);
   const harborGroup = makeClusterGroup();
   const anchorGroup = makeClusterGroup();
@@ -1399,6 +1593,27 @@ function redrawMarkers({ harbors, anchors, rentals, gastros }) {
     m.on('click', () => openModal('gastro', g));
     state.markers.gastros.push(m);
   });
+}
+
+function redrawMarkers({ harbors, anchors, rentals, gastros }) {
+  if (!state.map) return;
+  clearMarkers();
+
+  // Zones layers
+  try {
+    (state.zoneLayers || []).forEach(l => l.remove());
+    state.zoneLayers = [];
+    if (state.zoneLayer) {
+      state.zoneLayer.remove();
+      state.zoneLayer = null;
+    }
+  } catch {
+    // ignore
+  }
+
+  state.mapLists = { harbors, anchors, rentals, gastros };
+  if (state.tiles) drawTiledMarkers();
+  else drawMarkerLists(state.mapLists);
 
   // Add zones overlay if enabled
   if (state.mapLayers.zones) {
@@ -1502,13 +1717,33 @@ function redrawMarkers({ harbors, anchors, rentals, gastros }) {
         layer._cfg = cfg;
         layer._everTileError = false;
         layer._loaded = false;
-        // async load
-        loadJSON(`./${cfg.path}`).then(fc => {
-          layer.addData(fc);
-          layer._loaded = true;
-        }).catch(() => {
-          layer._everTileError = true;
-        });
+        // zoomPaths: {zoom: path} simplified per zoom (tools/fetch_eea_natura2000_geojson.py);
+        // use the finest level not above the current zoom, reloading on zoomend.
+        const levels = Object.keys(cfg.zoomPaths || {}).map(Number).sort((a, b) => a - b);
+        const pathForZoom = z => {
+          if (!levels.length) return cfg.path;
+          let pick = levels[0];
+          levels.forEach(l => { if (l <= z) pick = l; });
+          return cfg.zoomPaths[pick];
+        };
+        const load = () => {
+          const path = pathForZoom(state.map.getZoom());
+          if (path === layer._path) return;
+          layer._path = path;
+          loadJSON(`./${path}`).then(fc => {
+            if (layer._path !== path) return;
+            layer.clearLayers();
+            layer.addData(fc);
+            layer._loaded = true;
+          }).catch(() => {
+            layer._everTileError = true;
+          });
+        };
+        load();
+        if (levels.length) {
+          state.map.on('zoomend', load);
+          layer.on('remove', () => state.map.off('zoomend', load));
+        }
         return layer;
       }
 
@@ -1578,7 +1813,12 @@ async function main() {
   const lakesIndex = await loadJSON('./data/lakes.json').catch(() => []);
   state.lakesIndex = lakesIndex;
 
-  const requested = (getUrlParam('lake') || 'bodensee').toLowerCase();
+  let requested = (getUrlParam('lake') || 'bodensee').toLowerCase();
+  const openTarget = parseOpenParam();
+  if (openTarget) {
+    const lakes = await lakesForOpenTarget(openTarget);
+    if (lakes.length && !lakes.includes(requested)) requested = lakes[0];
+  }
   const lake = lakesIndex.find(l => l.id === requested)
     || lakesIndex.find(l => l.id === 'bodensee')
     || lakesIndex[0]
@@ -1589,14 +1829,16 @@ async function main() {
 
   // Data (per lake)
   const base = `./data/lakes/${lake.id}`;
-  const [harbors, anchors, rentals, gastros, services, layersCfg] = await Promise.all([
-    loadJSON(`${base}/harbors.json`).catch(() => []),
-    loadJSON(`${base}/anchors.json`).catch(() => []),
-    loadJSON(`${base}/rentals.json`).catch(() => []),
-    loadJSON(`${base}/gastros.json`).catch(() => []),
-    loadJSON(`${base}/services.json`).catch(() => []),
-    loadJSON(`${base}/layers.json`).catch(() => [])
-  ]);
+  const searchIndex = loadSearchIndex(lake.id).catch(() => null);
+  const [harbors, anchors, rentals, gastros, services, layersCfg] = await loadLakeBundle(lake.id).catch(() => null)
+    || await Promise.all([
+      loadJSON(`${base}/harbors.json`).catch(() => []),
+      loadJSON(`${base}/anchors.json`).catch(() => []),
+      loadJSON(`${base}/rentals.json`).catch(() => []),
+      loadJSON(`${base}/gastros.json`).catch(() => []),
+      loadJSON(`${base}/services.json`).catch(() => []),
+      loadJSON(`${base}/layers.json`).catch(() => [])
+    ]);
 
   state.data.harbors = harbors;
   state.data.anchors = anchors;
@@ -1604,6 +1846,8 @@ async function main() {
   state.data.gastros = gastros;
   state.data.services = services;
   state.data.layers = layersCfg;
+  state.search = await searchIndex;
+  state.tiles = await loadTileIndex(lake.id);
 
   // Init
   initNav();
@@ -3,14 +3,24 @@
 
 Strict: writes only candidate* fields. Never writes source/lastVerified.
 
-Matching: simple token overlap on name.
+Matching: simple token overlap on name (>= 2 shared tokens, first best candidate wins).
+An inverted index token -> candidate positions is built once, so each item only scores
+candidates sharing at least one token. Optional --max-km additionally restricts matches
+to candidates near the item (grid pre-filter + haversine), which avoids pairing
+same-named places on different shores.
 """
 
+from __future__ import annotations
+
 import json
 import re
 import argparse
+from collections import Counter
 from pathlib import Path
 
+from dedup_lake import GridIndex, haversine_m
+from lake_dataset import LakeDataset
+
 CAND_PATH = Path('/tmp/osm_candidates.json')
 TODAY = None
 
@@ -23,45 +33,81 @@ def tokens(s: str):
     return set(toks)
 
 
+class CandidateIndex:
+    def __init__(self, cand: list, max_km: float | None = None):
+        self.cand = cand
+        self.max_m = max_km * 1000 if max_km else None
+        self.postings: dict[str, list[int]] = {}
+        for pos, c in enumerate(cand):
+            for t in tokens(c.get('name', '')):
+                self.postings.setdefault(t, []).append(pos)
+
+        self.grid = None
+        self.located: list[int] = []
+        self.no_coords: set[int] = set()
+        if self.max_m:
+            self.located = [pos for pos, c in enumerate(cand) if c.get('lat') is not None and c.get('lng') is not None]
+            self.no_coords = set(range(len(cand))) - set(self.located)
+            self.grid = GridIndex([(cand[p]['lat'], cand[p]['lng']) for p in self.located], self.max_m)
+
+    def _nearby(self, it: dict) -> set[int] | None:
+        """Candidate positions allowed by the spatial pre-filter (None = no filter)."""
+        if self.grid is None or it.get('lat') is None or it.get('lng') is None:
+            return None
+        near = {p for p in (self.located[g] for g in self.grid.near(it['lat'], it['lng']))
+                if haversine_m(it['lat'], it['lng'], self.cand[p]['lat'], self.cand[p]['lng']) <= self.max_m}
+        # candidates without coordinates cannot be ruled out
+        return near | self.no_coords
+
+    def match(self, it: dict) -> tuple[dict | None, int]:
+        """Return (candidate, score) with the highest token overlap; ties keep the first."""
+        t_it = tokens(it.get('name', ''))
+        if not t_it:
+            return None, 0
+        allowed = self._nearby(it)
+        scores: Counter = Counter()
+        for t in t_it:
+            for pos in self.postings.get(t, ()):
+                if allowed is None or pos in allowed:
+                    scores[pos] += 1
+        if not scores:
+            return None, 0
+        pos, score = min(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        return self.cand[pos], score
+
+
+def apply_candidates(ds: LakeDataset, cand: list, max_km: float | None = None) -> int:
+    # index by name tokens
+    idx = CandidateIndex(cand, max_km)
+    changed = 0
+    for it in ds:
+        if (it.get('source') or '').strip():
+            continue
+        if (it.get('candidateUrl') or '').strip():
+            continue
+        best, best_score = idx.match(it)
+        if best and best_score >= 2:
+            it['candidateUrl'] = best['website']
+            it['candidateFoundAt'] = best['foundAt']
+            it['candidateSource'] = best['foundVia']
+            changed += 1
+    return changed
+
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--lake", default="bodensee")
     ap.add_argument("--candidates", default=str(CAND_PATH))
+    ap.add_argument("--max-km", type=float, default=None, help="Only match candidates within this distance of the item (needs lat/lng)")
     args = ap.parse_args()
     lake_id = (args.lake or "bodensee").strip()
     cand_path = Path(args.candidates)
 
     cand = json.loads(cand_path.read_text(encoding='utf-8')).get('candidates', [])
-    # index by name tokens
-    idx = []
-    for c in cand:
-        idx.append((tokens(c['name']), c))
 
-    data_dir = Path('data') / 'lakes' / lake_id
-    changed = 0
-    for p in sorted(data_dir.glob('*.json')):
-        items = json.loads(p.read_text(encoding='utf-8'))
-        for it in items:
-            if (it.get('source') or '').strip():
-                continue
-            if (it.get('candidateUrl') or '').strip():
-                continue
-            t_it = tokens(it.get('name',''))
-            if not t_it:
-                continue
-            best = None
-            best_score = 0
-            for t_c, c in idx:
-                score = len(t_it & t_c)
-                if score > best_score:
-                    best_score = score
-                    best = c
-            if best and best_score >= 2:
-                it['candidateUrl'] = best['website']
-                it['candidateFoundAt'] = best['foundAt']
-                it['candidateSource'] = best['foundVia']
-                changed += 1
-        p.write_text(json.dumps(items, ensure_ascii=False, indent=2)+'\n', encoding='utf-8')
+    ds = LakeDataset.load(lake_id)
+    changed = apply_candidates(ds, cand, args.max_km)
+    ds.save()
 
     print(changed)
 
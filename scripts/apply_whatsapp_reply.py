@@ -18,7 +18,9 @@ and updates the matching JSON entry in-place:
 - sets lastVerified = today (UTC)
 - clears candidate* fields
 
-It intentionally does NOT modify anything else.
+It intentionally does NOT modify anything else. Files are written atomically, and
+the map bundle, search index and tiles of every lake touched are rebuilt right after,
+in single and batch mode alike.
 
 Examples
 --------
@@ -39,6 +41,16 @@ Examples
 
   python3 scripts/apply_whatsapp_reply.py --type harbor --id osm-node-123 --reply ok
 
+4) Batch: a morning's backlog in one run (file or "-" for stdin), JSON Lines with
+   {"template": "...", "reply": "ok"} or {"type": ..., "id": ..., "reply": ...}
+
+  python3 scripts/apply_whatsapp_reply.py --batch /tmp/replies.jsonl
+
+   All data files are indexed once (id -> file, index), every reply is applied in
+   memory and each touched file is written once at the end. The output lists one
+   outcome per reply: applied, duplicate (same item earlier in the batch), blocked,
+   not_found, ambiguous or invalid.
+
 """
 
 from __future__ import annotations
@@ -46,49 +58,25 @@ from __future__ import annotations
 import argparse
 import json
 import re
+import sys
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Iterable
-from urllib.parse import urlparse
+
+from domains import source_ok
+from lake_dataset import DATA_DIR, TYPE_FILES, rebuild_site_data, write_json_atomic
+from poi_index import data_files, refresh_index, rel
 
 ROOT = Path(__file__).resolve().parents[1]
 
-TYPE_FILES = {
-    "harbor": "harbors.json",
-    "anchor": "anchors.json",
-    "rental": "rentals.json",
-    "gastro": "gastros.json",
-    "service": "services.json",
-}
-
-# Keep this aligned with scripts/auto_verify.py (conservative)
-BLOCKLIST = {
-    "tripadvisor.",
-    "google.",
-    "goo.gl",
-    "facebook.",
-    "instagram.",
-    "yelp.",
-    "booking.",
-    "opentable.",
-    "thefork.",
-    "ubereats.",
-    "just-eat.",
-    "lieferando.",
-    "wikipedia.",
-    "wikidata.",
-    "openstreetmap.",
-    "osm.",
-}
-
-ANCHOR_ALLOW = {
-    "navily.",
-    "noonsite.",
-    "cruisersforum.",
-    "forum.",
-    "seglerforum.",
-}
+
+class ReplyError(ValueError):
+    """A reply that cannot be applied; carries the batch outcome status."""
+
+    def __init__(self, msg: str, status: str = "invalid") -> None:
+        super().__init__(msg)
+        self.status = status
 
 
 def today_iso_utc() -> str:
@@ -99,39 +87,6 @@ def norm(s: str | None) -> str:
     return (s or "").strip()
 
 
-def domain_ok(url: str, typ: str) -> bool:
-    u = (url or "").strip()
-    if not u.lower().startswith("http"):
-        return False
-
-    # basic parse sanity
-    try:
-        host = (urlparse(u).hostname or "").lower()
-    except Exception:
-        return False
-
-    # avoid local/invalid
-    if not host or "." not in host:
-        return False
-
-    # anchors: allow forums etc, but still avoid the worst aggregators
-    lowered = u.lower()
-    if typ == "anchor":
-        for b in BLOCKLIST:
-            if b in lowered:
-                return False
-        return True
-
-    # non-anchor: blocklist + also block general "forum" style sites
-    for b in BLOCKLIST:
-        if b in lowered:
-            return False
-    for a in ANCHOR_ALLOW:
-        if a in lowered:
-            return False
-    return True
-
-
 @dataclass
 class Target:
     typ: str
@@ -190,23 +145,13 @@ def parse_reply(reply: str) -> tuple[str, str | None]:
     m = REPLY_SOURCE_RE.match(norm(reply))
     if m:
         return "source", m.group(1).strip()
-    raise SystemExit("Reply must be either 'ok' or 'source <url>'.")
+    raise ReplyError("Reply must be either 'ok' or 'source <url>'.")
 
 
 def iter_data_files() -> Iterable[tuple[str, Path]]:
     """Yield (type, path) for all known data files (global + per-lake)."""
-    # global
-    for typ, fname in TYPE_FILES.items():
-        yield typ, ROOT / "data" / fname
-
-    # per-lake
-    lakes_dir = ROOT / "data" / "lakes"
-    if lakes_dir.exists():
-        for lake in sorted(p for p in lakes_dir.iterdir() if p.is_dir()):
-            for typ, fname in TYPE_FILES.items():
-                p = lake / fname
-                if p.exists():
-                    yield typ, p
+    for _lake, typ, p in data_files():
+        yield typ, p
 
 
 @dataclass
@@ -217,34 +162,61 @@ class Found:
     item: dict[str, Any]
 
 
-def find_unique_item(typ: str, item_id: str) -> Found:
-    matches: list[Found] = []
-
-    for t, p in iter_data_files():
-        if t != typ:
-            continue
-        if not p.exists():
-            continue
-        data = json.loads(p.read_text(encoding="utf-8"))
-        if not isinstance(data, list):
-            continue
-        for i, it in enumerate(data):
-            if norm(str(it.get("id") or "")) == item_id:
-                matches.append(Found(typ=typ, path=p, idx=i, item=it))
-
+def unique_match(matches: list[Found], typ: str, item_id: str) -> Found:
     if not matches:
-        raise SystemExit(f"Could not find item: type={typ} id={item_id}")
+        raise ReplyError(f"Could not find item: type={typ} id={item_id}", "not_found")
     if len(matches) > 1:
         detail = "\n".join([f"- {m.path}" for m in matches])
-        raise SystemExit(f"Item not unique (found in multiple files).\n{detail}")
+        raise ReplyError(f"Item not unique (found in multiple files).\n{detail}", "ambiguous")
     return matches[0]
 
 
-def apply_verification(found: Found, source_url: str) -> None:
-    # re-load full file so we can persist changes
-    data = json.loads(found.path.read_text(encoding="utf-8"))
-    it = data[found.idx]
-
+class ItemIndex:
+    """(type, id) -> every (file, index) holding it, built with one parse per file.
+
+    Loaded file contents stay in memory; apply() edits them and save() writes each
+    touched file once.
+    """
+
+    def __init__(self, types: Iterable[str] | None = None) -> None:
+        wanted = set(types or TYPE_FILES)
+        self.data: dict[Path, list] = {}
+        self.matches: dict[tuple[str, str], list[Found]] = {}
+        self.dirty: list[Path] = []
+        for t, p in iter_data_files():
+            if t not in wanted or not p.exists():
+                continue
+            data = json.loads(p.read_text(encoding="utf-8"))
+            if not isinstance(data, list):
+                continue
+            self.data[p] = data
+            for i, it in enumerate(data):
+                key = (t, norm(str(it.get("id") or "")))
+                self.matches.setdefault(key, []).append(Found(typ=t, path=p, idx=i, item=it))
+
+    def find(self, typ: str, item_id: str) -> Found:
+        return unique_match(self.matches.get((typ, item_id), []), typ, item_id)
+
+    def apply(self, found: Found, source_url: str) -> None:
+        set_verified(found.item, source_url)
+        if found.path not in self.dirty:
+            self.dirty.append(found.path)
+
+    def save(self) -> list[Path]:
+        """Write the touched files, then rebuild the site data of their lakes."""
+        written, self.dirty = self.dirty, []
+        return save_data_files({p: self.data[p] for p in written})
+
+
+def save_data_files(files: dict[Path, list]) -> list[Path]:
+    """Write each file atomically, then rebuild the site data of the lakes touched."""
+    for p, data in files.items():
+        write_json_atomic(p, data)
+    rebuild_site_data(p.parent.name for p in files if p.parent.parent == DATA_DIR)
+    return list(files)
+
+
+def set_verified(it: dict[str, Any], source_url: str) -> None:
     it["url"] = source_url
     it["source"] = source_url
     it["lastVerified"] = today_iso_utc()
@@ -254,7 +226,122 @@ def apply_verification(found: Found, source_url: str) -> None:
         if k in it:
             it[k] = None
 
-    found.path.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+def find_unique_item(typ: str, item_id: str) -> Found:
+    """Resolve through the persistent POI index; only the matching file is parsed."""
+    index, _ = refresh_index(asset=False)
+    matches: list[Found] = []
+    for loc in index.lookup(typ, item_id):
+        p = ROOT / loc.file
+        data = json.loads(p.read_text(encoding="utf-8"))
+        matches.append(Found(typ=typ, path=p, idx=loc.idx, item=data[loc.idx]))
+    return unique_match(matches, typ, item_id)
+
+
+def apply_verification(found: Found, source_url: str) -> None:
+    # re-load full file so we can persist changes
+    data = json.loads(found.path.read_text(encoding="utf-8"))
+    set_verified(data[found.idx], source_url)
+    save_data_files({found.path: data})
+
+
+def resolve(
+    reply: str,
+    template_txt: str | None = None,
+    typ: str | None = None,
+    item_id: str | None = None,
+) -> tuple[str, str, str]:
+    """(type, id, source_url) for one reply; raises ReplyError if it cannot be applied."""
+    reply_kind, reply_url = parse_reply(reply)
+
+    target: Target | None = None
+    candidate: str | None = None
+    if template_txt:
+        target, candidate = parse_template_text(template_txt)
+
+    typ = (typ or (target.typ if target else None))
+    item_id = (item_id or (target.item_id if target else None))
+
+    if not typ or not item_id:
+        raise ReplyError("Need --type and --id (or provide --template/--template-file with Type/ID lines).")
+    if typ not in TYPE_FILES:
+        raise ReplyError(f"Unknown type: {typ}")
+
+    source_url = reply_url if reply_kind == "source" else candidate
+    if not source_url:
+        raise ReplyError("Reply 'ok' requires the template to contain a candidate URL.")
+
+    if not source_ok(source_url, typ):
+        raise ReplyError(f"Refusing to set source for type={typ}: URL looks non-official or blocked: {source_url}", "blocked")
+
+    return typ, item_id, source_url
+
+
+def read_batch(path: str) -> list[dict]:
+    """JSON Lines of {"template"|"template_file", "type", "id", "reply"}; "-" reads stdin."""
+    txt = sys.stdin.read() if path == "-" else Path(path).read_text(encoding="utf-8")
+    out = []
+    for n, ln in enumerate(txt.splitlines(), 1):
+        if not ln.strip():
+            continue
+        try:
+            row = json.loads(ln)
+        except json.JSONDecodeError as e:
+            row = {"_error": f"bad JSON: {e}"}
+        if not isinstance(row, dict):
+            row = {"_error": "line must be a JSON object"}
+        row["_line"] = n
+        out.append(row)
+    return out
+
+
+def apply_batch(rows: list[dict]) -> dict:
+    resolved: list[tuple[dict, tuple[str, str, str] | None, ReplyError | None]] = []
+    for row in rows:
+        try:
+            if row.get("_error"):
+                raise ReplyError(row["_error"])
+            tpl = row.get("template")
+            if row.get("template_file"):
+                tpl = Path(row["template_file"]).read_text(encoding="utf-8")
+            resolved.append((row, resolve(norm(row.get("reply")), tpl, row.get("type"), row.get("id")), None))
+        except (ReplyError, OSError) as e:
+            resolved.append((row, None, e if isinstance(e, ReplyError) else ReplyError(str(e))))
+
+    index = ItemIndex({r[0] for _, r, _ in resolved if r})
+    results = []
+    seen: dict[tuple[str, str], int] = {}
+    for row, r, err in resolved:
+        out: dict[str, Any] = {"line": row["_line"]}
+        if r:
+            typ, item_id, source_url = r
+            out.update({"type": typ, "id": item_id, "source": source_url})
+            try:
+                if (typ, item_id) in seen:
+                    raise ReplyError(f"Already handled on line {seen[(typ, item_id)]}", "duplicate")
+                found = index.find(typ, item_id)
+                index.apply(found, source_url)
+                seen[(typ, item_id)] = row["_line"]
+                out.update({"status": "applied", "file": rel(found.path)})
+            except ReplyError as e:
+                err = e
+        if err:
+            for k in ("type", "id"):
+                if row.get(k) and k not in out:
+                    out[k] = row[k]
+            out.update({"status": err.status, "error": str(err)})
+        results.append(out)
+
+    written = index.save()
+    applied = sum(1 for r in results if r["status"] == "applied")
+    return {
+        "ok": applied == len(results),
+        "applied": applied,
+        "failed": len(results) - applied,
+        "lastVerified": today_iso_utc(),
+        "written": [rel(p) for p in written],
+        "results": results,
+    }
 
 
 def main() -> None:
@@ -263,10 +350,15 @@ def main() -> None:
     ap.add_argument("--template-file", help="File containing template text")
     ap.add_argument("--type", choices=sorted(TYPE_FILES.keys()))
     ap.add_argument("--id", dest="item_id")
-    ap.add_argument("--reply", required=True, help="Either 'ok' or 'source <url>'")
+    ap.add_argument("--reply", help="Either 'ok' or 'source <url>'")
+    ap.add_argument("--batch", help="JSON Lines file of replies to apply in one run ('-' = stdin)")
     args = ap.parse_args()
 
-    reply_kind, reply_url = parse_reply(args.reply)
+    if args.batch:
+        print(json.dumps(apply_batch(read_batch(args.batch)), ensure_ascii=False, indent=2))
+        return
+    if not args.reply:
+        raise SystemExit("--reply is required (or use --batch)")
 
     template_txt = None
     if args.template_file:
@@ -274,31 +366,11 @@ def main() -> None:
     elif args.template:
         template_txt = args.template
 
-    target: Target | None = None
-    candidate: str | None = None
-
-    if template_txt:
-        target, candidate = parse_template_text(template_txt)
-
-    typ = (args.type or (target.typ if target else None))
-    item_id = (args.item_id or (target.item_id if target else None))
-
-    if not typ or not item_id:
-        raise SystemExit("Need --type and --id (or provide --template/--template-file with Type/ID lines).")
-
-    source_url = None
-    if reply_kind == "source":
-        source_url = reply_url
-    else:
-        source_url = candidate
-
-    if not source_url:
-        raise SystemExit("Reply 'ok' requires the template to contain a candidate URL.")
-
-    if not domain_ok(source_url, typ):
-        raise SystemExit(f"Refusing to set source for type={typ}: URL looks non-official or blocked: {source_url}")
-
-    found = find_unique_item(typ, item_id)
+    try:
+        typ, item_id, source_url = resolve(args.reply, template_txt, args.type, args.item_id)
+        found = find_unique_item(typ, item_id)
+    except ReplyError as e:
+        raise SystemExit(str(e))
     apply_verification(found, source_url)
 
     print(
@@ -308,7 +380,7 @@ def main() -> None:
                 "updated": {
                     "type": typ,
                     "id": item_id,
-                    "file": str(found.path.relative_to(ROOT)),
+                    "file": rel(found.path),
                     "source": source_url,
                     "lastVerified": today_iso_utc(),
                 },
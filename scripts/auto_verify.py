@@ -19,8 +19,31 @@ Output:
 - Updates the JSON files in place, only for entries that were unverified.
 - Prints a JSON summary to stdout.
 
-Note: Uses simple HTML text checks (via requests) and a local search provider endpoint
-passed in via --search-json (so orchestration can call any search API/tool).
+Note: Uses simple HTML text checks and a local search provider endpoint passed in via
+--search-json (so orchestration can call any search API/tool). Pages are streamed
+through scripts/html_text.py (charset from headers/meta, script/style dropped on the
+fly) and the download stops as soon as the name/keyword checks for that URL pass.
+
+Ranking: before any request, the candidateUrl and search results are scored offline
+(rank_plan): domain verdict, name tokens found in the hostname, same site as the
+candidateUrl, TLD vs. the entry's country and path hints like /impressum. Only the
+best --top URLs are fetched (in parallel with --workers > 1) and evaluated in rank
+order; the first that passes wins. --trace writes every decision (scores, reasons,
+fetch outcome) as JSON Lines.
+
+Concurrency: --workers N (N > 1) decides several entries at once and fetches an
+entry's --top ranked URLs (default 3, 0 = all) in parallel; a --workers 1 run fetches
+the same URLs one by one and stops at the first that passes. --per-host caps
+simultaneous requests per host and --sleep-ms becomes a per-host minimum interval
+instead of a global pause. Results are still evaluated in sequential order, so the
+same URL wins as in a --workers 1 run.
+
+Checkpoints: every decision is journaled in auto_verify_state.json (verify_journal.py)
+with its outcome and time. The data files and the journal are written atomically every
+--checkpoint-every decisions, so a killed run keeps its work. Entries that found no
+match (or whose pages were unreachable) back off exponentially before they are tried
+again, and --time-budget-s ends a run cleanly so big lakes are done in slices across
+cron invocations; the next run resumes with the entries that are due.
 """
 
 from __future__ import annotations
@@ -28,52 +51,24 @@ from __future__ import annotations
 import argparse
 import json
 import re
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import date
 from pathlib import Path
 from typing import Any
+from urllib.parse import urlparse, urlsplit
 
 import urllib.request
 
-ROOT = Path(__file__).resolve().parents[1]
+from domains import acceptable, classify_many, hostname
+from html_text import TextProbe, read_text
+from http_cache import DEFAULT_TTL_S, USER_AGENT, HttpCache
+from lake_dataset import TYPE_FILES, LakeDataset, norm
+from verify_journal import VerifyJournal, now_utc, outcome_of
 
-TYPE_FILES = {
-    "harbor": "harbors.json",
-    "anchor": "anchors.json",
-    "rental": "rentals.json",
-    "gastro": "gastros.json",
-    "service": "services.json",
-}
-
-# Domains we generally do NOT treat as official sources
-BLOCKLIST = {
-    "tripadvisor.",
-    "google.",
-    "goo.gl",
-    "facebook.",
-    "instagram.",
-    "yelp.",
-    "booking.",
-    "opentable.",
-    "thefork.",
-    "ubereats.",
-    "just-eat.",
-    "lieferando.",
-    "wikipedia.",
-    "wikidata.",
-    "openstreetmap.",
-    "osm.",
-}
-
-# For anchoring we allow community sources as requested
-ANCHOR_ALLOW = {
-    "navily.",
-    "noonsite.",
-    "cruisersforum.",
-    "forum.",
-    "seglerforum.",
-}
+ROOT = Path(__file__).resolve().parents[1]
 
 KEYWORDS_OFFICIAL = [
     "impressum",
@@ -86,56 +81,43 @@ KEYWORDS_OFFICIAL = [
 ]
 
 
-def norm(s: str) -> str:
-    return (s or "").strip()
+def probe_for(typ: str, name: str, is_candidate: bool) -> TextProbe:
+    """Stops a page download once accepts() is certain to pass on the text so far."""
+    needle = name[:6] if name else ""
 
+    def ready(found: set[str]) -> bool:
+        name_hit = bool(needle) and needle in found
+        official = any(k in found for k in KEYWORDS_OFFICIAL)
+        if is_candidate:
+            return name_hit or typ == "anchor" or official
+        if typ == "anchor":
+            return name_hit
+        return name_hit and official
 
-def is_verified(it: dict) -> bool:
-    return bool(norm(it.get("source")) and norm(it.get("lastVerified")))
+    return TextProbe([needle, *KEYWORDS_OFFICIAL], ready)
 
 
-def domain_ok(url: str, typ: str) -> bool:
-    u = (url or "").lower()
-    if not u.startswith("http"):
-        return False
-    if typ == "anchor":
-        # anchors: allow forums etc, but still avoid the worst aggregators
-        for b in BLOCKLIST:
-            if b in u:
-                return False
-        return True
-    for b in BLOCKLIST:
-        if b in u:
-            return False
-    return True
+# Set by main(); None disables the on-disk cache (--no-cache).
+HTTP_CACHE: HttpCache | None = None
 
 
-def looks_official_text(txt: str) -> bool:
-    t = (txt or "").lower()
-    return any(k in t for k in KEYWORDS_OFFICIAL)
+def fetch_text(url: str, timeout_s: int = 10, probe: TextProbe | None = None) -> str:
+    """Visible page text, lowercased; with a probe it may stop before the end."""
 
+    def reader(r, max_read: int) -> tuple[str, bool]:
+        return read_text(r, max_read, probe)
 
-def fetch_text(url: str, timeout_s: int = 10) -> str:
+    if HTTP_CACHE is not None:
+        return HTTP_CACHE.fetch(url, variant="text-v2", stream=reader, timeout_s=timeout_s)
     req = urllib.request.Request(
         url,
         headers={
-            "User-Agent": "Mozilla/5.0 (compatible; BodenseeSeglerBot/1.0; +https://github.com/Phailipp/bodensee-segler-site)",
+            "User-Agent": USER_AGENT,
             "Accept": "text/html,application/xhtml+xml",
         },
     )
     with urllib.request.urlopen(req, timeout=timeout_s) as r:
-        ctype = r.headers.get("Content-Type", "")
-        data = r.read(400_000)
-    try:
-        s = data.decode("utf-8", errors="ignore")
-    except Exception:
-        s = str(data)
-    # rough html strip
-    s = re.sub(r"<script[\s\S]*?</script>", " ", s, flags=re.I)
-    s = re.sub(r"<style[\s\S]*?</style>", " ", s, flags=re.I)
-    s = re.sub(r"<[^>]+>", " ", s)
-    s = re.sub(r"\s+", " ", s)
-    return s[:200_000]
+        return reader(r, 400_000)[0]
 
 
 def mk_query(lake_name: str, typ: str, it: dict) -> str:
@@ -154,41 +136,218 @@ def mk_query(lake_name: str, typ: str, it: dict) -> str:
     return f"{name} {loc} {lake_name} Website"
 
 
-def pick_best(typ: str, it: dict, results: list[dict[str, Any]]) -> str | None:
-    name = norm(it.get("name")).lower()
-    cand = norm(it.get("candidateUrl"))
+DEFAULT_TOP = 3
 
-    # If candidateUrl already exists and passes domain rules, try it first
-    if cand and domain_ok(cand, typ):
-        try:
-            txt = fetch_text(cand)
-            if name and name[:6] in txt.lower():
-                return cand
-            if typ == "anchor":
-                return cand
-            if looks_official_text(txt):
-                return cand
-        except Exception:
-            pass
+COUNTRY_TLDS = {"DE": "de", "CH": "ch", "AT": "at", "IT": "it", "FR": "fr", "LI": "li"}
+PATH_HINTS = ("impressum", "kontakt", "contact", "ueber-uns", "about", "hafen", "marina")
+FOLD = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss", "é": "e", "è": "e", "à": "a", "ò": "o", "ù": "u"})
+NAME_STOPWORDS = {"der", "die", "das", "und", "see", "the", "and", "del", "della", "gmbh", "club"}
+
+
+def name_tokens(s: str) -> list[str]:
+    return [t for t in re.split(r"[^a-z0-9]+", (s or "").lower().translate(FOLD)) if len(t) >= 3 and t not in NAME_STOPWORDS]
 
+
+def site_of(host: str) -> str:
+    """Approximate registrable domain: the last two labels."""
+    return ".".join(host.split(".")[-2:])
+
+
+@dataclass
+class Ranked:
+    url: str
+    is_candidate: bool
+    score: float
+    reasons: list[str]
+
+
+def rank_plan(typ: str, it: dict, results: list[dict[str, Any]]) -> list[Ranked]:
+    """Acceptable URLs for an entry, best first, scored without any network access."""
+    cand = norm(it.get("candidateUrl"))
+    urls: dict[str, bool] = {}
+    if cand:
+        urls[cand] = True
     for r in results:
-        url = norm(r.get("url") or "")
-        if not domain_ok(url, typ):
+        urls.setdefault(norm(r.get("url") or ""), False)
+
+    toks = name_tokens(it.get("name"))
+    cand_host = hostname(cand) if cand else None
+    tld_wanted = COUNTRY_TLDS.get(norm(it.get("country")).upper())
+
+    ranked: list[Ranked] = []
+    for pos, ((url, is_cand), v) in enumerate(zip(urls.items(), classify_many(urls))):
+        if not acceptable(v, typ):
+            continue
+        score = -0.05 * pos  # search engine order as the tie-breaker
+        reasons = []
+        if is_cand:
+            score += 3
+            reasons.append("candidateUrl +3")
+        host = v.host.removeprefix("www.").translate(FOLD)
+        if toks:
+            hits = [t for t in toks if t in host]
+            if hits:
+                score += 4 * len(hits) / len(toks)
+                reasons.append(f"name in host {len(hits)}/{len(toks)}")
+        if cand_host and not is_cand and site_of(v.host) == site_of(cand_host):
+            score += 2
+            reasons.append("same site as candidateUrl +2")
+        tld = v.host.rsplit(".", 1)[-1]
+        if tld_wanted and tld == tld_wanted:
+            score += 1
+            reasons.append(f".{tld} matches country +1")
+        elif tld_wanted and tld in COUNTRY_TLDS.values():
+            score -= 1
+            reasons.append(f".{tld} other country -1")
+        path = urlsplit(url).path.lower()
+        if any(h in path for h in PATH_HINTS):
+            score += 1
+            reasons.append("path hint +1")
+        if path.endswith(".pdf"):
+            score -= 2
+            reasons.append("pdf -2")
+        elif path.strip("/").count("/") >= 2:
+            score -= 0.5
+            reasons.append("deep path -0.5")
+        ranked.append(Ranked(url, is_cand, round(score, 3), reasons))
+
+    ranked.sort(key=lambda r: r.score, reverse=True)
+    return ranked
+
+
+def trace_row(r: Ranked, **kw: Any) -> dict[str, Any]:
+    return {"url": r.url, "candidate": r.is_candidate, "score": r.score, "reasons": r.reasons, **kw}
+
+
+def accepts(typ: str, name: str, txt: str, is_candidate: bool) -> bool:
+    # txt comes lowercased from fetch_text
+    name_hit = bool(name and name[:6] in txt)
+    official = any(k in txt for k in KEYWORDS_OFFICIAL)
+    if is_candidate:
+        return name_hit or typ == "anchor" or official
+    if typ == "anchor":
+        # anchors: accept if the name appears at least once
+        return name_hit
+    # other types: require name + at least one official-ish keyword
+    return name_hit and official
+
+
+def pick_best(
+    typ: str,
+    it: dict,
+    results: list[dict[str, Any]],
+    top: int = DEFAULT_TOP,
+    trace: list[dict[str, Any]] | None = None,
+) -> str | None:
+    """Fetch the best `top` ranked URLs one by one; the first that passes wins."""
+    name = norm(it.get("name")).lower()
+    ranked = rank_plan(typ, it, results)
+    best = None
+    for i, r in enumerate(ranked):
+        if best or (top and i >= top):
+            if trace is not None:
+                trace.append(trace_row(r, fetched=False))
             continue
+        row = trace_row(r, fetched=True)
         try:
-            txt = fetch_text(url)
-            low = txt.lower()
-            if typ == "anchor":
-                # anchors: accept if the name appears at least once
-                if name and name[:6] in low:
-                    return url
+            txt = fetch_text(r.url, probe=probe_for(typ, name, r.is_candidate))
+            row["accepted"] = accepts(typ, name, txt, r.is_candidate)
+        except Exception as e:
+            row["error"] = f"{type(e).__name__}: {e}"
+            row["accepted"] = False
+        if row["accepted"]:
+            best = r.url
+        if trace is not None:
+            trace.append(row)
+    return best
+
+
+class HostLimiter:
+    """Per-host concurrency cap plus a minimum interval between requests to one host."""
+
+    def __init__(self, per_host: int, interval_s: float) -> None:
+        self.per_host = max(1, per_host)
+        self.interval_s = max(0.0, interval_s)
+        self._lock = threading.Lock()
+        self._slots: dict[str, threading.Semaphore] = {}
+        self._next_at: dict[str, float] = {}
+
+    def _slot(self, host: str) -> threading.Semaphore:
+        with self._lock:
+            sem = self._slots.get(host)
+            if sem is None:
+                sem = self._slots[host] = threading.Semaphore(self.per_host)
+            return sem
+
+    def _wait_turn(self, host: str) -> None:
+        with self._lock:
+            now = time.monotonic()
+            at = max(now, self._next_at.get(host, 0.0))
+            self._next_at[host] = at + self.interval_s
+        if at > now:
+            time.sleep(at - now)
+
+    def fetch(self, url: str, probe: TextProbe | None = None) -> str:
+        host = (urlparse(url).hostname or "").lower()
+        with self._slot(host):
+            self._wait_turn(host)
+            return fetch_text(url, probe=probe)
+
+
+class FetchPool:
+    """Thread pool for page fetches; max_workers is the global concurrency cap."""
+
+    def __init__(self, workers: int, per_host: int, interval_s: float) -> None:
+        self.limiter = HostLimiter(per_host, interval_s)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="fetch")
+
+    def submit(self, url: str, probe: TextProbe | None = None) -> Future:
+        return self._pool.submit(self.limiter.fetch, url, probe)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+def pick_best_concurrent(
+    typ: str,
+    it: dict,
+    results: list[dict[str, Any]],
+    pool: FetchPool,
+    top: int = DEFAULT_TOP,
+    trace: list[dict[str, Any]] | None = None,
+) -> str | None:
+    """Same decision as pick_best(), but the top URLs are fetched in parallel.
+
+    Pages are evaluated in rank order, so a lower-ranked URL can never win over a
+    better one that also passes; pending fetches are cancelled once the winner is known.
+    """
+    name = norm(it.get("name")).lower()
+    ranked = rank_plan(typ, it, results)
+    chosen = ranked[:top] if top else ranked
+    futures = [pool.submit(r.url, probe_for(typ, name, r.is_candidate)) for r in chosen]
+    best = None
+    try:
+        for r, fut in zip(chosen, futures):
+            if best:
+                if trace is not None:
+                    trace.append(trace_row(r, fetched=False))
                 continue
-            # other types: require name + at least one official-ish keyword
-            if name and name[:6] in low and looks_official_text(txt):
-                return url
-        except Exception:
-            continue
-    return None
+            row = trace_row(r, fetched=True)
+            try:
+                row["accepted"] = accepts(typ, name, fut.result(), r.is_candidate)
+            except Exception as e:
+                row["error"] = f"{type(e).__name__}: {e}"
+                row["accepted"] = False
+            if row["accepted"]:
+                best = r.url
+            if trace is not None:
+                trace.append(row)
+        if trace is not None:
+            trace.extend(trace_row(r, fetched=False) for r in ranked[len(chosen) :])
+        return best
+    finally:
+        for fut in futures:
+            fut.cancel()
 
 
 def main() -> None:
@@ -197,9 +356,24 @@ def main() -> None:
     ap.add_argument("--lake-name", required=True)
     ap.add_argument("--limit", type=int, default=15)
     ap.add_argument("--search-json", required=True, help="Path to a JSON file containing search results per query")
-    ap.add_argument("--sleep-ms", type=int, default=250)
+    ap.add_argument("--sleep-ms", type=int, default=250, help="Pause per entry (--workers 1) or per-host request interval (--workers > 1)")
+    ap.add_argument("--workers", type=int, default=1, help="Concurrent fetches overall; 1 keeps the sequential run")
+    ap.add_argument("--per-host", type=int, default=2, help="Concurrent fetches per host (only with --workers > 1)")
+    ap.add_argument("--cache-dir", default=None, help="HTTP response cache directory (default: .cache/http)")
+    ap.add_argument("--cache-ttl-h", type=float, default=DEFAULT_TTL_S / 3600, help="Serve cached pages without revalidation for this long")
+    ap.add_argument("--no-cache", action="store_true", help="Always download pages, bypassing the HTTP cache")
+    ap.add_argument("--top", type=int, default=DEFAULT_TOP, help="Fetch only the best N ranked URLs per entry (0 = all)")
+    ap.add_argument("--trace", default=None, help="Write the per-entry decision trace (JSON Lines) to this file")
+    ap.add_argument("--state", default=None, help="Checkpoint state file (default: auto_verify_state.json)")
+    ap.add_argument("--checkpoint-every", type=int, default=10, help="Save data and journal every N decisions")
+    ap.add_argument("--time-budget-s", type=float, default=0, help="Stop cleanly after this many seconds (0 = no limit)")
+    ap.add_argument("--no-journal", action="store_true", help="Ignore backoff and do not record decisions")
     args = ap.parse_args()
 
+    global HTTP_CACHE
+    if not args.no_cache:
+        HTTP_CACHE = HttpCache(args.cache_dir, ttl_s=args.cache_ttl_h * 3600)
+
     lake_id = args.lake
     lake_name = args.lake_name
     today = date.today().isoformat()
@@ -209,35 +383,106 @@ def main() -> None:
 
     changed = 0
     attempted = 0
+    skipped = 0
     per_type = {}
+    outcomes: dict[str, int] = {}
+    stopped = None
+    t0 = time.monotonic()
 
-    base = ROOT / "data" / "lakes" / lake_id
+    ds = LakeDataset.load(lake_id)
+    journal = None if args.no_journal else VerifyJournal(lake_id, Path(args.state) if args.state else None)
+    run_at = now_utc()
 
-    for typ, fname in TYPE_FILES.items():
-        p = base / fname
-        if not p.exists():
-            continue
-        data = json.loads(p.read_text(encoding="utf-8"))
-        for it in data:
-            if changed >= args.limit:
-                break
-            if is_verified(it):
-                continue
-            if not norm(it.get("name")):
-                continue
+    def is_due(typ: str, it: dict) -> bool:
+        return journal is None or journal.due(typ, norm(it.get("id")), run_at)
 
-            q = mk_query(lake_name, typ, it)
-            results = search_db.get(q, [])
-            attempted += 1
-            best = pick_best(typ, it, results)
-            if best:
-                it["source"] = best
-                it["lastVerified"] = today
-                changed += 1
-                per_type[typ] = per_type.get(typ, 0) + 1
-            time.sleep(args.sleep_ms / 1000.0)
+    def remaining() -> int:
+        return sum(1 for typ in TYPE_FILES for it in ds.unverified(typ) if norm(it.get("name")) and is_due(typ, it))
+
+    def checkpoint() -> None:
+        ds.save()
+        if journal is not None:
+            journal.save()
+
+    concurrent = args.workers > 1
+    pool = FetchPool(args.workers, args.per_host, args.sleep_ms / 1000.0) if concurrent else None
+    entry_pool = ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="entry") if concurrent else None
 
-        p.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    trace_fh = open(args.trace, "w", encoding="utf-8") if args.trace else None
+
+    def decide(job: tuple[str, dict]) -> tuple[str | None, list[dict[str, Any]]]:
+        typ, it = job
+        results = search_db.get(mk_query(lake_name, typ, it), [])
+        trace: list[dict[str, Any]] = []
+        if pool is not None:
+            return pick_best_concurrent(typ, it, results, pool, args.top, trace), trace
+        return pick_best(typ, it, results, args.top, trace), trace
+
+    try:
+        since_checkpoint = 0
+        for typ in TYPE_FILES:
+            todo = []
+            for it in ds.unverified(typ):
+                if not norm(it.get("name")):
+                    continue
+                if is_due(typ, it):
+                    todo.append(it)
+                else:
+                    skipped += 1
+
+            # Sequential: one entry per batch. Concurrent: decide --workers entries at
+            # once, then apply them in file order so --limit cuts at the same entry.
+            step = args.workers if concurrent else 1
+            for start in range(0, len(todo), step):
+                if changed >= args.limit:
+                    stopped = stopped or "limit"
+                    break
+                if args.time_budget_s and time.monotonic() - t0 >= args.time_budget_s:
+                    stopped = "time-budget"
+                    break
+                batch = [(typ, it) for it in todo[start : start + step]]
+                if entry_pool is not None:
+                    decisions = list(entry_pool.map(decide, batch))
+                else:
+                    decisions = [decide(batch[0])]
+                for (_, it), (best, trace) in zip(batch, decisions):
+                    if changed >= args.limit:
+                        break
+                    attempted += 1
+                    if trace_fh is not None:
+                        row = {"type": typ, "id": it.get("id"), "name": it.get("name"), "picked": best, "trace": trace}
+                        trace_fh.write(json.dumps(row, ensure_ascii=False) + "\n")
+                    if best:
+                        it["source"] = best
+                        it["lastVerified"] = today
+                        changed += 1
+                        per_type[typ] = per_type.get(typ, 0) + 1
+                    outcome = outcome_of(best, trace)
+                    outcomes[outcome] = outcomes.get(outcome, 0) + 1
+                    if journal is not None and norm(it.get("id")):
+                        journal.record(typ, norm(it.get("id")), outcome, best)
+                    since_checkpoint += 1
+                if since_checkpoint >= args.checkpoint_every:
+                    checkpoint()
+                    since_checkpoint = 0
+                if not concurrent:
+                    time.sleep(args.sleep_ms / 1000.0)
+
+            if stopped == "time-budget":
+                break
+            ds.save()
+    finally:
+        if trace_fh is not None:
+            trace_fh.close()
+        if entry_pool is not None:
+            entry_pool.shutdown(wait=True)
+        if pool is not None:
+            pool.shutdown()
+        # also on errors/KeyboardInterrupt: keep what was decided so far
+        ds.save()
+        if journal is not None:
+            journal.prune(run_at)
+            journal.save(remaining())
 
     print(
         json.dumps(
@@ -245,7 +490,13 @@ def main() -> None:
                 "lake": lake_id,
                 "changed": changed,
                 "attempted": attempted,
+                "skippedBackoff": skipped,
+                "outcomes": outcomes,
+                "stopped": stopped,
+                "remaining": journal.lake.get("remaining") if journal is not None else None,
                 "perType": per_type,
+                "workers": args.workers,
+                "httpCache": HTTP_CACHE.stats if HTTP_CACHE is not None else None,
             },
             ensure_ascii=False,
         )
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Benchmark dedup_lake.find_duplicates (grid index) against the old pair scan.
+
+Builds a synthetic lake of each size with gen_synthetic_lake.generate (name collisions,
+near-duplicate coordinates, some already verified OSM entries), times the grid-based
+dedup over every type file as dedup() does and, for sizes up to --ref-max, checks that
+the O(n^2) reference scan produces the exact same keep/drop decisions and merges.
+
+Usage:
+  python3 scripts/bench_dedup_lake.py --sizes 1000,10000,100000
+
+Prints one JSON line per size.
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from dedup_lake import find_duplicates, haversine_m, is_verified, norm_name
+from gen_synthetic_lake import LAKE_ID, generate
+from lake_dataset import TYPE_FILES
+
+
+def synth(n: int, seed: int = 1) -> dict[str, list[dict]]:
+    """type -> raw entries of a synthetic lake with n POIs (scripts/gen_synthetic_lake.py)."""
+    with tempfile.TemporaryDirectory(prefix="bench-dedup-") as tmp:
+        generate(n, Path(tmp), LAKE_ID, seed)
+        lake_dir = Path(tmp) / "lakes" / LAKE_ID
+        return {typ: json.loads((lake_dir / fname).read_text(encoding="utf-8")) for typ, fname in TYPE_FILES.items()}
+
+
+def pair_scan(data: list[dict], max_m: float) -> tuple[set[int], int]:
+    """The original nested-loop dedup, kept as the correctness reference."""
+    idx = [i for i, it in enumerate(data) if (it.get("candidateSource") == "osm") and it.get("lat") is not None and it.get("lng") is not None]
+    to_remove: set[int] = set()
+    merges = 0
+    for a_i in range(len(idx)):
+        i = idx[a_i]
+        if i in to_remove:
+            continue
+        A = data[i]
+        nA = norm_name(A.get("name"))
+        for b_i in range(a_i + 1, len(idx)):
+            j = idx[b_i]
+            if j in to_remove:
+                continue
+            B = data[j]
+            nB = norm_name(B.get("name"))
+            if not nA or not nB:
+                continue
+            if nA not in nB and nB not in nA:
+                continue
+            if haversine_m(A["lat"], A["lng"], B["lat"], B["lng"]) > max_m:
+                continue
+            candA = (A.get("candidateUrl") or "").strip()
+            candB = (B.get("candidateUrl") or "").strip()
+            keep, drop, drop_idx = A, B, j
+            if is_verified(B) and not is_verified(A):
+                keep, drop, drop_idx = B, A, i
+            elif candB and not candA:
+                keep, drop, drop_idx = B, A, i
+            if not (keep.get("candidateUrl") or "").strip() and (drop.get("candidateUrl") or "").strip():
+                keep["candidateUrl"] = drop.get("candidateUrl")
+                merges += 1
+            to_remove.add(drop_idx)
+    return to_remove, merges
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1000,10000,100000")
+    ap.add_argument("--max-m", type=int, default=60)
+    ap.add_argument("--ref-max", type=int, default=2000, help="Largest size to also run the O(n^2) reference on")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    for n in [int(x) for x in args.sizes.split(",") if x.strip()]:
+        data = synth(n, args.seed)
+        ref_data = copy.deepcopy(data) if n <= args.ref_max else None
+
+        t0 = time.perf_counter()
+        found = {typ: find_duplicates(items, args.max_m) for typ, items in data.items()}
+        grid_s = time.perf_counter() - t0
+
+        row = {
+            "n": n,
+            "removed": sum(len(r) for r, _ in found.values()),
+            "merged": sum(m for _, m in found.values()),
+            "gridSeconds": round(grid_s, 4),
+        }
+        if ref_data is not None:
+            t0 = time.perf_counter()
+            ref = {typ: pair_scan(items, args.max_m) for typ, items in ref_data.items()}
+            row["pairScanSeconds"] = round(time.perf_counter() - t0, 4)
+            row["identical"] = ref == found and ref_data == data
+        print(json.dumps(row), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""Time the per-lake pipeline scripts on synthetic lakes of growing size.
+
+For every size a fresh lake is generated with gen_synthetic_lake.py into a temp
+directory, then each script runs as its own process, in cron order, with
+BS_DATA_DIR pointing at that directory (the real data/ is never touched):
+
+  apply_candidates -> sanitize_urls -> dedup_lake -> rank_review_queue -> gen_detail_pages
+
+Per run the wall time and the peak RSS of that process (os.wait4) are recorded,
+together with the script's stdout summary. Results go to --out as JSON:
+
+  {"env": {...}, "sizes": [...], "runs": [{"script", "pois", "seconds", "peakRssMb", "ok", "output"}]}
+
+--baseline compares against an earlier results file: a run that is more than
+--max-slowdown times slower (or uses more than that times the memory) than the
+baseline run of the same script and size is listed under "regressions", and the
+exit status is 1.
+
+Usage:
+  python3 scripts/bench_pipeline.py --sizes 1000,10000,50000 --out /tmp/bench.json
+  python3 scripts/bench_pipeline.py --sizes 1000,10000 --baseline /tmp/bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from gen_synthetic_lake import LAKE_ID, generate
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = ROOT / "scripts"
+DEFAULT_SIZES = "1000,10000,50000,200000"
+# a run must also be this much slower in absolute terms to count (noise on tiny sizes)
+MIN_DELTA_S = 0.25
+
+
+def script_args(name: str, lake: str, work: Path, cand_path: str, max_km: float | None) -> list[str]:
+    return {
+        "apply_candidates": ["--lake", lake, "--candidates", cand_path, *(["--max-km", str(max_km)] if max_km else [])],
+        "sanitize_urls": ["--lake", lake],
+        "dedup_lake": ["--lake", lake],
+        "rank_review_queue": ["--lake", lake, "--out", str(work / "review.txt")],
+        "gen_detail_pages": ["--out-root", str(work / "site")],
+    }[name]
+
+
+STEPS = ("apply_candidates", "sanitize_urls", "dedup_lake", "rank_review_queue", "gen_detail_pages")
+
+
+def run_script(name: str, args: list[str], env: dict[str, str], timeout: float | None) -> dict[str, Any]:
+    """Run scripts/<name>.py; wall time and peak RSS of exactly that process.
+
+    Output goes to temp files rather than pipes so the child can be reaped with
+    os.wait4, whose rusage covers only this child (RUSAGE_CHILDREN would be the max
+    over every process run so far).
+    """
+    with tempfile.TemporaryFile("w+") as out, tempfile.TemporaryFile("w+") as err:
+        t0 = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, str(SCRIPTS / f"{name}.py"), *args], cwd=ROOT, env=env, stdout=out, stderr=err, text=True)
+        timer = threading.Timer(timeout, proc.kill) if timeout else None
+        if timer:
+            timer.start()
+        _, status, usage = os.wait4(proc.pid, 0)
+        seconds = time.perf_counter() - t0
+        if timer:
+            timer.cancel()
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        out.seek(0)
+        err.seek(0)
+        return {
+            "seconds": seconds,
+            "returncode": proc.returncode,
+            "timedOut": proc.returncode == -signal.SIGKILL,
+            # ru_maxrss is KiB on Linux, bytes on macOS
+            "peakRssMb": round(usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1),
+            "stdout": out.read(),
+            "stderr": err.read(),
+        }
+
+
+def bench_size(pois: int, seed: int, timeout: float | None, keep: Path | None, max_km: float | None = None) -> list[dict[str, Any]]:
+    with tempfile.TemporaryDirectory(prefix=f"bench-{pois}-") as tmp:
+        work = keep / str(pois) if keep else Path(tmp)
+        t0 = time.perf_counter()
+        gen = generate(pois, work, LAKE_ID, seed)
+        rows = [{"script": "gen_synthetic_lake", "pois": pois, "seconds": round(time.perf_counter() - t0, 3), "ok": True, "output": gen}]
+        env = {**os.environ, "BS_DATA_DIR": gen["dataDir"]}
+        for name in STEPS:
+            r = run_script(name, script_args(name, LAKE_ID, work, gen["candidates"], max_km), env, timeout)
+            rows.append(
+                {
+                    "script": name,
+                    "pois": pois,
+                    "seconds": round(r["seconds"], 3),
+                    "peakRssMb": r["peakRssMb"],
+                    "ok": r["returncode"] == 0 and not r["timedOut"],
+                    "timedOut": r["timedOut"],
+                    "output": r["stdout"].strip()[-500:],
+                    **({"stderr": r["stderr"].strip()[-2000:]} if r["returncode"] else {}),
+                }
+            )
+        return rows
+
+
+def regressions(runs: list[dict], baseline: dict, max_slowdown: float) -> list[dict]:
+    base = {(r["script"], r["pois"]): r for r in baseline.get("runs", [])}
+    out = []
+    for r in runs:
+        b = base.get((r["script"], r["pois"]))
+        if not b or not b.get("ok") or r["script"] == "gen_synthetic_lake":
+            continue
+        if not r["ok"]:
+            out.append({"script": r["script"], "pois": r["pois"], "failed": True})
+            continue
+        slow = r["seconds"] > b["seconds"] * max_slowdown and r["seconds"] - b["seconds"] > MIN_DELTA_S
+        fat = (r.get("peakRssMb") or 0) > (b.get("peakRssMb") or 0) * max_slowdown
+        if slow or fat:
+            out.append(
+                {
+                    "script": r["script"],
+                    "pois": r["pois"],
+                    "seconds": r["seconds"],
+                    "baselineSeconds": b["seconds"],
+                    "peakRssMb": r.get("peakRssMb"),
+                    "baselinePeakRssMb": b.get("peakRssMb"),
+                }
+            )
+    return out
+
+
+def git_rev() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated POI counts")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out", default=None, help="Write the results JSON here (default: stdout only)")
+    ap.add_argument("--baseline", default=None, help="Earlier results file to compare against")
+    ap.add_argument("--max-slowdown", type=float, default=1.5, help="Time/memory factor over the baseline that counts as a regression")
+    ap.add_argument("--timeout-s", type=float, default=1800, help="Kill a script after this long (0 = no limit)")
+    ap.add_argument("--max-km", type=float, default=None, help="Pass --max-km to apply_candidates (default: none, as in the cron)")
+    ap.add_argument("--keep", default=None, help="Keep the generated lakes and outputs under this directory")
+    args = ap.parse_args()
+
+    sizes = [int(x) for x in args.sizes.split(",") if x.strip()]
+    results: dict[str, Any] = {
+        "env": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "git": git_rev(),
+            "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "seed": args.seed,
+            "maxKm": args.max_km,
+        },
+        "sizes": sizes,
+        "runs": [],
+    }
+    for n in sizes:
+        rows = bench_size(n, args.seed, args.timeout_s or None, Path(args.keep) if args.keep else None, args.max_km)
+        results["runs"] += rows
+        for r in rows:
+            print(json.dumps({k: r[k] for k in ("script", "pois", "seconds", "peakRssMb", "ok") if k in r}), file=sys.stderr, flush=True)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        results["baseline"] = {"path": args.baseline, "git": baseline.get("env", {}).get("git"), "maxSlowdown": args.max_slowdown}
+        results["regressions"] = regressions(results["runs"], baseline, args.max_slowdown)
+
+    text = json.dumps(results, ensure_ascii=False, indent=2) + "\n"
+    if args.out:
+        Path(args.out).write_text(text, encoding="utf-8")
+    print(json.dumps({"ok": all(r["ok"] for r in results["runs"]), "runs": len(results["runs"]), "regressions": len(results.get("regressions", [])), "out": args.out}))
+    if results.get("regressions") or not all(r["ok"] for r in results["runs"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
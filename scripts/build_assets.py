@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""Build the deployable site into dist/: minified, fingerprinted and pre-compressed.
+
+Steps (sources are never modified):
+1. copy the site files (SITE_PATHS) into dist/
+2. JSON/GeoJSON is re-serialized compactly; POI lists (data/*.json and
+   data/lakes/<lake>/*.json) lose the candidate bookkeeping the site never reads
+   (DROP_FIELDS) and empty candidate* values
+3. static assets (FINGERPRINT_DIRS: images, i18n, css, js) get a content hash in their
+   name, name.<sha256[:10]>.ext; leaves first, so css is hashed after its url() refs
+   point at the hashed images
+4. href/src references in every HTML page and url() in css are rewritten; index.html
+   also gets window.ASSET_MAP (original path -> hashed path) for what app.js loads
+   at runtime (i18n)
+5. every text asset gets .gz (and .br when the optional brotli module is installed)
+   if that is smaller
+
+The size report lists before/after bytes per asset (--report writes all of it; stdout
+gets the totals and the largest assets).
+
+Usage:
+  python3 scripts/build_assets.py                 # -> dist/
+  python3 scripts/build_assets.py --out /tmp/site --report /tmp/assets.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parents[1]
+DIST = ROOT / "dist"
+HASH_LEN = 10
+
+SITE_PATHS = (
+    "index.html",
+    "impressum.html",
+    "datenschutz.html",
+    "robots.txt",
+    "sitemap.xml",
+    "css",
+    "js",
+    "i18n",
+    "assets",
+    "data",
+    "detail",
+    "artikel",
+)
+# hashed in this order: things referenced by later entries come first
+FINGERPRINT_DIRS = ("assets", "i18n", "css", "js")
+TEXT_EXT = {".html", ".css", ".js", ".json", ".geojson", ".xml", ".txt", ".svg"}
+JSON_EXT = {".json", ".geojson"}
+
+# candidate bookkeeping of the import scripts; js/app.js reads none of it
+DROP_FIELDS = {"candidateSource", "candidateFoundAt", "candidateOsmType", "candidateOsmId", "candidatePhone", "candidateHours"}
+
+REF_RE = re.compile(r"""(?P<attr>\b(?:href|src)=)(?P<q>["'])(?P<url>[^"']+)(?P=q)""")
+CSS_URL_RE = re.compile(r"""url\((?P<q>["']?)(?P<url>[^"')]+)(?P=q)\)""")
+
+
+try:
+    import brotli  # optional dependency
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+
+def rel(p: Path, base: Path) -> str:
+    return p.relative_to(base).as_posix()
+
+
+def is_poi_list(path: str) -> bool:
+    parts = path.split("/")
+    if parts[0] != "data" or not path.endswith(".json"):
+        return False
+    return len(parts) == 2 or (len(parts) == 4 and parts[1] == "lakes")
+
+
+def slim_record(it: Any) -> Any:
+    if not isinstance(it, dict):
+        return it
+    return {
+        k: v
+        for k, v in it.items()
+        if k not in DROP_FIELDS and not (k.startswith("candidate") and v in (None, "", [], {}))
+    }
+
+
+def minify_json(path: str, raw: bytes) -> bytes:
+    data = json.loads(raw.decode("utf-8"))
+    if is_poi_list(path) and isinstance(data, list):
+        data = [slim_record(it) for it in data]
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def hashed_name(path: str, data: bytes) -> str:
+    stem, ext = posixpath.splitext(path)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LEN]}{ext}"
+
+
+def resolve(page: str, url: str) -> str | None:
+    """Site-relative path an href/src on `page` points to, or None for external refs."""
+    if not url or url.startswith(("http:", "https:", "//", "#", "mailto:", "tel:", "data:", "javascript:")):
+        return None
+    path = url.split("#", 1)[0].split("?", 1)[0]
+    if not path:
+        return None
+    if path.startswith("/"):
+        return posixpath.normpath(path.lstrip("/"))
+    return posixpath.normpath(posixpath.join(posixpath.dirname(page), path))
+
+
+def relative_to_page(page: str, target: str) -> str:
+    r = posixpath.relpath(target, posixpath.dirname(page) or ".")
+    return r if r.startswith(".") else f"./{r}"
+
+
+def rewrite_refs(page: str, text: str, renamed: dict[str, str], pattern: re.Pattern) -> str:
+    def sub(m: re.Match) -> str:
+        url = m.group("url")
+        target = resolve(page, url)
+        if target not in renamed:
+            return m.group(0)
+        suffix = url[len(url.split("#", 1)[0].split("?", 1)[0]) :]
+        return m.group(0).replace(url, relative_to_page(page, renamed[target]) + suffix)
+
+    return pattern.sub(sub, text)
+
+
+def asset_map_script(renamed: dict[str, str]) -> str:
+    runtime = {f"./{k}": f"./{v}" for k, v in sorted(renamed.items()) if k.startswith("i18n/")}
+    return f"<script>window.ASSET_MAP={json.dumps(runtime, separators=(',', ':'))};</script>\n"
+
+
+def compress(data: bytes) -> dict[str, bytes]:
+    out = {".gz": gzip.compress(data, 9, mtime=0)}
+    if brotli is not None:
+        out[".br"] = brotli.compress(data, quality=11)
+    return {ext: c for ext, c in out.items() if len(c) < len(data)}
+
+
+def collect(root: Path) -> dict[str, bytes]:
+    files: dict[str, bytes] = {}
+    for name in SITE_PATHS:
+        p = root / name
+        if p.is_file():
+            files[name] = p.read_bytes()
+        elif p.is_dir():
+            for f in sorted(p.rglob("*")):
+                if f.is_file() and not f.name.startswith("."):
+                    files[rel(f, root)] = f.read_bytes()
+    return files
+
+
+def build(out: Path = DIST, root: Path = ROOT) -> dict[str, Any]:
+    files = collect(root)
+    original = {k: len(v) for k, v in files.items()}
+
+    for path in list(files):
+        if posixpath.splitext(path)[1] in JSON_EXT:
+            files[path] = minify_json(path, files[path])
+
+    renamed: dict[str, str] = {}
+    for d in FINGERPRINT_DIRS:
+        for path in sorted(p for p in files if p.startswith(d + "/")):
+            if path.endswith(".css"):
+                files[path] = rewrite_refs(path, files[path].decode("utf-8"), renamed, CSS_URL_RE).encode("utf-8")
+            new = hashed_name(path, files[path])
+            renamed[path] = new
+            files[new] = files.pop(path)
+            original[new] = original.pop(path)
+
+    for path in [p for p in files if p.endswith(".html")]:
+        text = rewrite_refs(path, files[path].decode("utf-8"), renamed, REF_RE)
+        if path == "index.html":
+            js = renamed.get("js/app.js")
+            tag = f'<script src="{relative_to_page(path, js)}"></script>' if js else None
+            if tag and tag in text:
+                text = text.replace(tag, asset_map_script(renamed) + "  " + tag, 1)
+        files[path] = text.encode("utf-8")
+
+    if out.exists():
+        shutil.rmtree(out)
+    assets = []
+    for path, data in sorted(files.items()):
+        p = out / path
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_bytes(data)
+        row: dict[str, Any] = {"path": path, "before": original.get(path, len(data)), "after": len(data)}
+        if posixpath.splitext(path)[1] in TEXT_EXT:
+            for ext, c in compress(data).items():
+                p.with_name(p.name + ext).write_bytes(c)
+                row[ext[1:]] = len(c)
+        assets.append(row)
+
+    def total(key: str) -> int:
+        return sum(r.get(key, r["after"]) for r in assets)
+
+    return {
+        "out": str(out),
+        "files": len(assets),
+        "fingerprinted": len(renamed),
+        "brotli": brotli is not None,
+        "before": sum(r["before"] for r in assets),
+        "after": total("after"),
+        "gz": total("gz"),
+        "br": total("br") if brotli is not None else None,
+        "assets": assets,
+        "renamed": renamed,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--out", default=str(DIST), help="Output directory (replaced)")
+    ap.add_argument("--report", default=None, help="Write the full per-asset size report (JSON) here")
+    ap.add_argument("--top", type=int, default=15, help="Largest assets to list on stdout")
+    args = ap.parse_args()
+
+    report = build(Path(args.out))
+    if args.report:
+        Path(args.report).write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    largest = sorted(report["assets"], key=lambda r: r["before"], reverse=True)[: args.top]
+    summary = {k: v for k, v in report.items() if k not in ("assets", "renamed")}
+    print(json.dumps({**summary, "largest": largest}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@
 This script does not call any web APIs. It:
 - Picks up to N unverified entries for a lake (priority: harbor, rental, gastro, service, anchor)
 - Builds query strings matching scripts/auto_verify.py
-- Loads /home/phil/clawd/memory/auto-verify-search-cache.json (if present)
+- Looks the queries up in the auto-verify search cache (SQLite, scripts/search_cache.py)
 - Writes /tmp/auto_verify_search.json with any cached results available
 - Writes /tmp/auto_verify_needed_queries.json with queries still missing (for the agent to web_search)
 
@@ -18,25 +18,12 @@ import json
 from datetime import datetime, timezone
 from pathlib import Path
 
-ROOT = Path(__file__).resolve().parents[1]
-CACHE_PATH = Path("/home/phil/clawd/memory/auto-verify-search-cache.json")
-
-TYPE_FILES = {
-    "harbor": "harbors.json",
-    "rental": "rentals.json",
-    "gastro": "gastros.json",
-    "service": "services.json",
-    "anchor": "anchors.json",
-}
-PRIO = ["harbor", "rental", "gastro", "service", "anchor"]
-
-
-def norm(s: str) -> str:
-    return (s or "").strip()
+from lake_dataset import LakeDataset, norm
+from search_cache import SearchCache
 
+ROOT = Path(__file__).resolve().parents[1]
 
-def is_verified(it: dict) -> bool:
-    return bool(norm(it.get("source")) and norm(it.get("lastVerified")))
+PRIO = ["harbor", "rental", "gastro", "service", "anchor"]
 
 
 def mk_query(lake_name: str, typ: str, it: dict) -> str:
@@ -60,26 +47,17 @@ def main() -> None:
     ap.add_argument("--lake", required=True)
     ap.add_argument("--lake-name", required=True)
     ap.add_argument("--limit", type=int, default=8)
+    ap.add_argument("--cache-db", default=None, help="Search cache SQLite path (default: search_cache.DB_PATH)")
     args = ap.parse_args()
 
-    base = ROOT / "data" / "lakes" / args.lake
-
-    cache = {}
-    if CACHE_PATH.exists():
-        try:
-            cache = json.loads(CACHE_PATH.read_text(encoding="utf-8"))
-        except Exception:
-            cache = {}
+    ds = LakeDataset.load(args.lake)
 
     picked = []
     for typ in PRIO:
-        p = base / TYPE_FILES[typ]
-        if not p.exists():
-            continue
-        data = json.loads(p.read_text(encoding="utf-8"))
+        todo = ds.unverified(typ)
         # prefer entries with candidateUrl
-        cand = [it for it in data if (not is_verified(it)) and norm(it.get("candidateUrl"))]
-        nocand = [it for it in data if (not is_verified(it)) and (not norm(it.get("candidateUrl")))]
+        cand = [it for it in todo if norm(it.get("candidateUrl"))]
+        nocand = [it for it in todo if not norm(it.get("candidateUrl"))]
         for it in cand + nocand:
             if len(picked) >= args.limit:
                 break
@@ -89,10 +67,14 @@ def main() -> None:
         if len(picked) >= args.limit:
             break
 
+    queries = [mk_query(args.lake_name, typ, it) for typ, it in picked]
+    with SearchCache(args.cache_db) as sc:
+        cache = sc.get_many(queries)
+        cache_path = sc.path
+
     search_json = {}
     needed = []
-    for typ, it in picked:
-        q = mk_query(args.lake_name, typ, it)
+    for q in queries:
         if q in cache and isinstance(cache[q], list) and cache[q]:
             search_json[q] = cache[q]
         else:
@@ -108,7 +90,7 @@ def main() -> None:
                 "lake": args.lake,
                 "picked": len(picked),
                 "needed": len(needed),
-                "cachePath": str(CACHE_PATH),
+                "cachePath": str(cache_path),
                 "ts": datetime.now(timezone.utc).isoformat(timespec="seconds"),
             },
             ensure_ascii=False,
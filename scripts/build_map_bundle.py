@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""Build one compact map bundle per lake for js/app.js.
+
+The site used to fetch six pretty-printed files per lake (harbors, anchors, rentals,
+gastros, services, layers), mostly candidate bookkeeping the map never shows. The bundle
+holds only the fields app.js renders (FIELDS), under short keys, with empty values
+dropped and coordinates rounded to COORD_DIGITS (the map shows 5 decimals):
+
+  {"v": 1, "lake": "bodensee", "keys": {"n": "name", ...},
+   "harbors": [{"i": "...", "n": "...", "y": 47.5, "x": 9.6}, ...], ..., "layers": [...]}
+
+Layers are map config and are copied as they are. Files are named
+data/bundles/<lake>.<sha256[:10]>.json, so they can be cached forever; the small
+data/bundles/manifest.json (fetched without cache) points the site at the current one.
+
+LakeDataset.save() and apply_whatsapp_reply rebuild the bundle (and search index and
+tiles) of the lake they wrote (lake_dataset.rebuild_site_data); after hand edits run
+this script.
+
+Every bundle is expanded again and compared with the source data before it is written;
+a mismatch fails the build. --check rebuilds in memory only and exits 1 if a bundle on
+disk is missing or stale (the data changed without a rebuild).
+
+Usage:
+  python3 scripts/build_map_bundle.py              # all lakes, prints bytes saved per lake
+  python3 scripts/build_map_bundle.py bodensee
+  python3 scripts/build_map_bundle.py --check      # CI / cron guard
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any
+
+from lake_dataset import DATA_DIR, TYPE_FILES
+
+ROOT = Path(__file__).resolve().parents[1]
+BUNDLE_DIR = DATA_DIR.parent / "bundles"  # data/bundles; follows BS_DATA_DIR
+MANIFEST_PATH = BUNDLE_DIR / "manifest.json"
+VERSION = 1
+COORD_DIGITS = 5
+HASH_LEN = 10
+
+# long field -> short key; only these fields reach the site
+FIELDS = {
+    "id": "i",
+    "name": "n",
+    "lat": "y",
+    "lng": "x",
+    "type": "t",
+    "country": "c",
+    "region": "r",
+    "location": "lo",
+    "details": "dt",
+    "notes": "no",
+    "features": "f",
+    "amenities": "am",
+    "url": "u",
+    "phone": "p",
+    "email": "e",
+    "vhf": "v",
+    "hours": "h",
+    "prices": "pr",
+    "price": "pc",
+    "priceFrom": "pf",
+    "berths": "b",
+    "guestBerths": "gb",
+    "guestPolicy": "gp",
+    "maxDraftM": "md",
+    "maxLengthM": "ml",
+    "maxBeamM": "mb",
+    "fleetSize": "fs",
+    "berthing": "bt",
+    "depthMinM": "d0",
+    "depthMaxM": "d1",
+    "ground": "g",
+    "holding": "ho",
+    "protection": "pt",
+    "swell": "sw",
+    "restrictions": "rs",
+    "overnight": "o",
+    "source": "s",
+    "lastVerified": "lv",
+    "candidateUrl": "cu",
+    "candidateUrlKind": "ck",
+}
+COORD_FIELDS = ("lat", "lng")
+LAYERS_FILE = "layers.json"
+
+
+class BundleDrift(Exception):
+    pass
+
+
+def empty(v: Any) -> bool:
+    return v is None or v == "" or v == [] or v == {}
+
+
+def project(it: dict) -> dict:
+    """The part of a record the map sees, under the long field names."""
+    out = {}
+    for k in FIELDS:
+        v = it.get(k)
+        if empty(v):
+            continue
+        if k in COORD_FIELDS and isinstance(v, (int, float)):
+            v = round(v, COORD_DIGITS)
+        out[k] = v
+    return out
+
+
+def compact(it: dict) -> dict:
+    return {FIELDS[k]: v for k, v in project(it).items()}
+
+
+def expand(bundle: dict) -> dict[str, list[dict]]:
+    """Inverse of the bundle encoding (what app.js does), keyed by file stem."""
+    keys = bundle["keys"]
+    return {stem: [{keys[k]: v for k, v in row.items()} for row in bundle[stem]] for stem in stems()}
+
+
+def stems() -> list[str]:
+    return [fname[: -len(".json")] for fname in TYPE_FILES.values()]
+
+
+def read_list(p: Path) -> tuple[list, int]:
+    if not p.exists():
+        return [], 0
+    raw = p.read_bytes()
+    data = json.loads(raw.decode("utf-8"))
+    return (data if isinstance(data, list) else []), len(raw)
+
+
+def encode(bundle: dict) -> bytes:
+    return (json.dumps(bundle, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def build_lake(lake_id: str) -> dict[str, Any]:
+    """Bundle bytes, name and sizes for one lake; raises BundleDrift if it does not round-trip."""
+    lake_dir = DATA_DIR / lake_id
+    bundle: dict[str, Any] = {"v": VERSION, "lake": lake_id, "keys": {s: k for k, s in FIELDS.items()}}
+    source_bytes = 0
+    source: dict[str, list[dict]] = {}
+    for stem, fname in zip(stems(), TYPE_FILES.values()):
+        items, size = read_list(lake_dir / fname)
+        source_bytes += size
+        items = [it for it in items if isinstance(it, dict)]
+        bundle[stem] = [compact(it) for it in items]
+        source[stem] = [project(it) for it in items]
+    layers, size = read_list(lake_dir / LAYERS_FILE)
+    source_bytes += size
+    bundle["layers"] = layers
+
+    data = encode(bundle)
+    back = json.loads(data.decode("utf-8"))
+    if expand(back) != source or back["layers"] != layers:
+        raise BundleDrift(f"{lake_id}: bundle does not round-trip to the source data")
+
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LEN]
+    return {
+        "data": data,
+        "file": f"{lake_id}.{digest}.json",
+        "hash": digest,
+        "sourceBytes": source_bytes,
+        "bytes": len(data),
+        "gzipBytes": len(gzip.compress(data, 9, mtime=0)),
+    }
+
+
+def lake_ids() -> list[str]:
+    return sorted(p.name for p in DATA_DIR.iterdir() if p.is_dir()) if DATA_DIR.exists() else []
+
+
+def load_manifest() -> dict:
+    try:
+        return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def write_atomic(p: Path, data: bytes) -> None:
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_name(f".{p.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, p)
+
+
+def check(lakes: list[str]) -> list[str]:
+    """Lakes whose bundle on disk is missing or differs from the current data."""
+    manifest = load_manifest()
+    stale = []
+    for lake in lakes:
+        b = build_lake(lake)
+        entry = manifest.get(lake) or {}
+        p = BUNDLE_DIR / b["file"]
+        if entry.get("file") != b["file"] or not p.exists() or p.read_bytes() != b["data"]:
+            stale.append(lake)
+    return stale
+
+
+def build(lakes: list[str]) -> dict[str, dict]:
+    manifest = load_manifest()
+    report = {}
+    for lake in lakes:
+        b = build_lake(lake)
+        p = BUNDLE_DIR / b["file"]
+        if not p.exists() or p.read_bytes() != b["data"]:
+            write_atomic(p, b["data"])
+        for old in BUNDLE_DIR.glob(f"{lake}.*.json"):
+            if old.name != b["file"] and old.name[len(lake) + 1 : -len(".json")].isalnum():
+                old.unlink()
+        manifest[lake] = {"file": b["file"], "hash": b["hash"], "bytes": b["bytes"]}
+        saved = b["sourceBytes"] - b["bytes"]
+        report[lake] = {
+            "file": b["file"],
+            "sourceBytes": b["sourceBytes"],
+            "bytes": b["bytes"],
+            "gzipBytes": b["gzipBytes"],
+            "saved": saved,
+            "savedPct": round(100 * saved / b["sourceBytes"], 1) if b["sourceBytes"] else 0.0,
+        }
+    for lake in [k for k in manifest if k not in lake_ids()]:
+        del manifest[lake]
+    write_atomic(MANIFEST_PATH, (json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True) + "\n").encode("utf-8"))
+    return report
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("lakes", nargs="*", help="Lake ids (default: all lakes under data/lakes)")
+    ap.add_argument("--check", action="store_true", help="Do not write; exit 1 if a bundle is stale")
+    args = ap.parse_args()
+
+    lakes = args.lakes or lake_ids()
+    try:
+        if args.check:
+            stale = check(lakes)
+            print(json.dumps({"ok": not stale, "stale": stale}, ensure_ascii=False))
+            if stale:
+                sys.exit(1)
+            return
+        report = build(lakes)
+    except BundleDrift as e:
+        print(json.dumps({"ok": False, "error": str(e)}, ensure_ascii=False))
+        sys.exit(1)
+
+    total_src = sum(r["sourceBytes"] for r in report.values())
+    total = sum(r["bytes"] for r in report.values())
+    print(json.dumps({"ok": True, "lakes": report, "sourceBytes": total_src, "bytes": total, "saved": total_src - total}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
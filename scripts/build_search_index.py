@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""Build a prebuilt full-text index per lake for the map's search box (js/app.js).
+
+matchesQuery() used to join and lowercase the searchable fields of every item on every
+keystroke. The index does that work once, here:
+
+- text: name, location, region, features, details, ground, protection (SEARCH_FIELDS,
+  the fields matchesQuery looked at)
+- tokens are lowercased, accents stripped and umlauts folded; a word with umlauts is
+  indexed both as "zuerich" and "zurich", queries are folded to the plain form
+- DE/EN/FR/IT stop words and 1-letter tokens are dropped (the list ships in the index,
+  app.js filters queries with it)
+- per type: the sorted vocabulary, a two-letter prefix table into it and a posting
+  list of item ordinals (positions in the lake's <type>.json) per token, delta-encoded
+
+A query matches an item when every query word occurs in one of its tokens: words of 3+
+letters anywhere inside (so "hafen" still finds "Yachthafen"), shorter ones as a prefix,
+looked up through the prefix table. The last query word is kept even if it is a stop
+word, since it may still be being typed. Lookups scan the vocabulary, never the items.
+
+Files: data/search/<lake>.<sha256[:10]>.json and data/search/manifest.json, like the
+map bundles (scripts/build_map_bundle.py). The index records the content hash of the
+lake's bundle ("bundle") and the item count per type; app.js falls back to the linear
+scan unless both match the loaded data.
+
+Usage:
+  python3 scripts/build_search_index.py                    # all lakes
+  python3 scripts/build_search_index.py --check            # exit 1 if an index is stale
+  python3 scripts/build_search_index.py --bench 50000      # latency vs. linear scan, synthetic lake
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import hashlib
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any
+
+from build_map_bundle import build_lake as build_bundle
+from lake_dataset import DATA_DIR, TYPE_FILES
+
+ROOT = Path(__file__).resolve().parents[1]
+SEARCH_DIR = DATA_DIR.parent / "search"  # data/search; follows BS_DATA_DIR
+MANIFEST_PATH = SEARCH_DIR / "manifest.json"
+VERSION = 2
+HASH_LEN = 10
+PREFIX_LEN = 2
+MIN_INFIX = 3
+
+SEARCH_FIELDS = ("name", "location", "region", "features", "details", "ground", "protection")
+
+UMLAUTS = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    # de
+    "der", "die", "das", "den", "dem", "des", "ein", "eine", "einen", "und", "oder", "im",
+    "in", "am", "an", "auf", "bei", "mit", "von", "vom", "zum", "zur", "zu", "fuer", "fur",
+    "ist", "nicht", "auch",
+    # en
+    "the", "and", "or", "of", "at", "on", "to", "for", "with", "by", "an", "is",
+    # fr
+    "le", "la", "les", "de", "du", "et", "au", "aux", "en", "sur", "un", "une", "pour", "par",
+    # it
+    "il", "lo", "gli", "di", "da", "del", "della", "dei", "delle", "al", "alla", "e", "su",
+    "con", "per", "uno",
+}
+
+
+# -- normalization --------------------------------------------------------------------
+
+
+def strip_accents(s: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFKD", s) if not unicodedata.combining(c))
+
+
+def fold(text: str) -> str:
+    """Query form: lowercase, ß -> ss, every accent and umlaut stripped (ü -> u)."""
+    return strip_accents(text.lower().replace("ß", "ss"))
+
+
+def words(text: str) -> list[str]:
+    return TOKEN_RE.findall(fold(text))
+
+
+def index_tokens(text: str) -> set[str]:
+    """Tokens for one item: plain folding plus the ae/oe/ue spelling of umlaut words."""
+    low = text.lower()
+    toks = set(TOKEN_RE.findall(fold(low))) | set(TOKEN_RE.findall(strip_accents(low.translate(UMLAUTS))))
+    return {t for t in toks if len(t) > 1 and t not in STOPWORDS}
+
+
+def query_tokens(q: str) -> list[str]:
+    """Query words without stop words; the last word survives unless the query ends in a space."""
+    ws = words(q)
+    keep_last = bool(ws) and not q[-1:].isspace()
+    return [w for i, w in enumerate(ws) if w not in STOPWORDS or (keep_last and i == len(ws) - 1)]
+
+
+def item_text(it: dict) -> str:
+    parts = []
+    for k in SEARCH_FIELDS:
+        v = it.get(k)
+        if isinstance(v, list):
+            v = " ".join(str(x) for x in v if x)
+        if v:
+            parts.append(str(v))
+    return " ".join(parts)
+
+
+# -- index ----------------------------------------------------------------------------
+
+
+def delta(nums: list[int]) -> list[int]:
+    return [n - (nums[i - 1] if i else 0) for i, n in enumerate(nums)]
+
+
+def undelta(nums: list[int]) -> list[int]:
+    out, acc = [], 0
+    for n in nums:
+        acc += n
+        out.append(acc)
+    return out
+
+
+def build_type_index(items: list[Any]) -> dict[str, Any]:
+    """{"n", "tokens", "prefix": {"ab": [start, end]}, "post": [delta ordinals]}"""
+    postings: dict[str, list[int]] = {}
+    for i, it in enumerate(items):
+        if isinstance(it, dict):
+            for tok in index_tokens(item_text(it)):
+                postings.setdefault(tok, []).append(i)
+    tokens = sorted(postings)
+    prefix: dict[str, list[int]] = {}
+    for j, tok in enumerate(tokens):
+        p = prefix.setdefault(tok[:PREFIX_LEN], [j, j])
+        p[1] = j + 1
+    return {"n": len(items), "tokens": tokens, "prefix": prefix, "post": [delta(postings[t]) for t in tokens]}
+
+
+class TypeIndex:
+    """Python mirror of the lookup in app.js (used by --bench)."""
+
+    def __init__(self, idx: dict[str, Any]) -> None:
+        self.n = idx["n"]
+        self.tokens: list[str] = idx["tokens"]
+        self.prefix: dict[str, list[int]] = idx["prefix"]
+        self.post = [undelta(p) for p in idx["post"]]
+
+    def token_ids(self, w: str) -> set[int]:
+        """Tokens containing w (3+ letters) or starting with it (shorter words)."""
+        if len(w) >= MIN_INFIX:
+            return {j for j, t in enumerate(self.tokens) if w in t}
+        start, end = self.prefix.get(w, (0, 0)) if len(w) == PREFIX_LEN else (0, len(self.tokens))
+        lo = bisect.bisect_left(self.tokens, w, start, end)
+        ids = set()
+        while lo < end and self.tokens[lo].startswith(w):
+            ids.add(lo)
+            lo += 1
+        return ids
+
+    def lookup(self, q: str) -> list[int] | None:
+        """Sorted matching ordinals, or None when the query has no searchable words."""
+        hits: set[int] | None = None
+        for w in query_tokens(q):
+            found: set[int] = set()
+            for j in self.token_ids(w):
+                found.update(self.post[j])
+            hits = found if hits is None else hits & found
+            if not hits:
+                return []
+        return None if hits is None else sorted(hits)
+
+
+def linear_scan(items: list[dict], q: str) -> list[int]:
+    """matchesQuery() as it was: substring of the joined, lowercased fields."""
+    ql = q.lower()
+    return [i for i, it in enumerate(items) if ql in item_text(it).lower()]
+
+
+# -- build ----------------------------------------------------------------------------
+
+
+def stems() -> list[str]:
+    return [fname[: -len(".json")] for fname in TYPE_FILES.values()]
+
+
+def build_lake(lake_id: str) -> dict[str, Any]:
+    # ordinals are positions in the bundle's lists; the hash ties the index to it
+    index: dict[str, Any] = {"v": VERSION, "lake": lake_id, "bundle": build_bundle(lake_id)["hash"], "stop": sorted(STOPWORDS)}
+    for stem, fname in zip(stems(), TYPE_FILES.values()):
+        p = DATA_DIR / lake_id / fname
+        items = json.loads(p.read_text(encoding="utf-8")) if p.exists() else []
+        index[stem] = build_type_index(items if isinstance(items, list) else [])
+    data = (json.dumps(index, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LEN]
+    return {"data": data, "file": f"{lake_id}.{digest}.json", "hash": digest, "bytes": len(data)}
+
+
+def lake_ids() -> list[str]:
+    return sorted(p.name for p in DATA_DIR.iterdir() if p.is_dir()) if DATA_DIR.exists() else []
+
+
+def load_manifest() -> dict:
+    try:
+        return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def write_atomic(p: Path, data: bytes) -> None:
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_name(f".{p.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, p)
+
+
+def check(lakes: list[str]) -> list[str]:
+    manifest = load_manifest()
+    stale = []
+    for lake in lakes:
+        b = build_lake(lake)
+        p = SEARCH_DIR / b["file"]
+        if (manifest.get(lake) or {}).get("file") != b["file"] or not p.exists():
+            stale.append(lake)
+    return stale
+
+
+def build(lakes: list[str]) -> dict[str, dict]:
+    manifest = load_manifest()
+    report = {}
+    for lake in lakes:
+        b = build_lake(lake)
+        p = SEARCH_DIR / b["file"]
+        if not p.exists() or p.read_bytes() != b["data"]:
+            write_atomic(p, b["data"])
+        for old in SEARCH_DIR.glob(f"{lake}.*.json"):
+            if old.name != b["file"] and old.name[len(lake) + 1 : -len(".json")].isalnum():
+                old.unlink()
+        manifest[lake] = {"file": b["file"], "hash": b["hash"], "bytes": b["bytes"]}
+        report[lake] = {"file": b["file"], "bytes": b["bytes"]}
+    for lake in [k for k in manifest if k not in lake_ids()]:
+        del manifest[lake]
+    write_atomic(MANIFEST_PATH, (json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True) + "\n").encode("utf-8"))
+    return report
+
+
+# -- benchmark ------------------------------------------------------------------------
+
+BENCH_WORDS = (
+    "yachthafen marina hafen seglerhafen bootshaus restaurant gasthof seeblick ristorante "
+    "lido strandbad werft segelschule bootsverleih zürich überlingen lindau bregenz "
+    "konstanz genève lausanne locarno stresa luzern brunnen zug thun spiez hafenmeister "
+    "terrasse fischrestaurant badeplatz ankerplatz schutz westwind bise kies schlamm "
+    "grund club nautique société cantiere porto darsena campeggio camping"
+).split()
+BENCH_QUERIES = ("hafen", "zurich", "zürich", "res", "see", "marina lindau", "bootsverleih thun", "ankerplatz kies", "xyz", "über")
+
+
+def synthetic_items(n: int, seed: int = 1) -> list[dict]:
+    rnd = random.Random(seed)
+    items = []
+    for i in range(n):
+        items.append(
+            {
+                "id": f"poi-{i}",
+                "name": " ".join(rnd.choice(BENCH_WORDS).title() for _ in range(rnd.randint(2, 4))) + f" {i}",
+                "location": rnd.choice(BENCH_WORDS).title(),
+                "region": rnd.choice(("Bodensee", "Genfersee", "Lago Maggiore", "Zürichsee")),
+                "features": rnd.sample(BENCH_WORDS, rnd.randint(0, 4)),
+            }
+        )
+    return items
+
+
+def timed(fn, reps: int) -> float:
+    runs = []
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    return statistics.median(runs) * 1000
+
+
+def bench(n: int, reps: int) -> dict[str, Any]:
+    items = synthetic_items(n)
+    t0 = time.perf_counter()
+    raw = build_type_index(items)
+    build_s = time.perf_counter() - t0
+    idx = TypeIndex(raw)
+    size = len(json.dumps(raw, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+    queries = []
+    for q in BENCH_QUERIES:
+        hits = idx.lookup(q)
+        queries.append(
+            {
+                "q": q,
+                "linearMs": round(timed(lambda: linear_scan(items, q), reps), 3),
+                "indexMs": round(timed(lambda: idx.lookup(q), reps), 3),
+                "linearHits": len(linear_scan(items, q)),
+                "indexHits": n if hits is None else len(hits),
+            }
+        )
+    return {
+        "items": n,
+        "tokens": len(raw["tokens"]),
+        "indexBytes": size,
+        "buildSeconds": round(build_s, 3),
+        "linearMedianMs": round(statistics.median(r["linearMs"] for r in queries), 3),
+        "indexMedianMs": round(statistics.median(r["indexMs"] for r in queries), 3),
+        "queries": queries,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("lakes", nargs="*", help="Lake ids (default: all lakes under data/lakes)")
+    ap.add_argument("--check", action="store_true", help="Do not write; exit 1 if an index is stale")
+    ap.add_argument("--bench", type=int, default=0, metavar="N", help="Benchmark on a synthetic lake with N POIs instead of building")
+    ap.add_argument("--reps", type=int, default=5, help="Repetitions per query for --bench")
+    args = ap.parse_args()
+
+    if args.bench:
+        print(json.dumps(bench(args.bench, args.reps), ensure_ascii=False))
+        return
+
+    lakes = args.lakes or lake_ids()
+    if args.check:
+        stale = check(lakes)
+        print(json.dumps({"ok": not stale, "stale": stale}, ensure_ascii=False))
+        if stale:
+            sys.exit(1)
+        return
+    report = build(lakes)
+    print(json.dumps({"ok": True, "lakes": report, "bytes": sum(r["bytes"] for r in report.values())}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""Partition each lake's map POIs into a slippy-map tile pyramid for js/app.js.
+
+For lakes with more than --min-pois markers (harbors, anchors, rentals, gastros) the map
+stops adding every POI as a Leaflet marker and loads only the tiles in view:
+
+- zoom MIN_ZOOM .. DETAIL_ZOOM-1: cluster tiles. Each tile is cut into a
+  2^CLUSTER_SUB x 2^CLUSTER_SUB grid; every occupied cell becomes one summary per type,
+  [type, count, lat, lng] with the members' centroid.
+- zoom DETAIL_ZOOM: point tiles listing item ordinals (positions in <type>.json) per
+  type. The client already holds the items for its lists, so a tile carries no
+  coordinates; deeper zooms reuse the detail tiles under the viewport.
+
+Layout: data/tiles/<lake>/<z>/<x>/<y>.json plus data/tiles/<lake>/index.json
+({"v", "bundle", "minZoom", "detailZoom", "counts", "tiles": {"z/x/y": bytes}}) and
+data/tiles/manifest.json naming the tiled lakes. "v" is a hash of the lake's source
+files; the client appends it to tile URLs, so tiles can be cached. "bundle" is the
+content hash of the lake's map bundle (scripts/build_map_bundle.py): ordinals are
+positions in its lists, and app.js ignores the tiles unless it loaded that bundle.
+
+Incremental: a lake whose source and bundle hashes match its index.json is skipped,
+and tile files are only rewritten when their bytes change; tiles that fell empty are
+deleted. lake_dataset.rebuild_site_data runs this after every save.
+
+Usage:
+  python3 scripts/build_tiles.py                   # all lakes; prints tile counts and sizes
+  python3 scripts/build_tiles.py bodensee --full --min-pois 0
+  python3 scripts/build_tiles.py --check           # exit 1 if a lake's tiles are stale
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import statistics
+import sys
+from pathlib import Path
+from typing import Any
+
+from build_map_bundle import build_lake as build_bundle
+from lake_dataset import DATA_DIR
+
+ROOT = Path(__file__).resolve().parents[1]
+TILES_DIR = DATA_DIR.parent / "tiles"  # data/tiles; follows BS_DATA_DIR
+VERSION = 3
+
+MAP_TYPES = ("harbors", "anchors", "rentals", "gastros")
+MIN_ZOOM = 7
+DETAIL_ZOOM = 13
+CLUSTER_SUB = 2
+DEFAULT_MIN_POIS = 1500
+HASH_LEN = 10
+
+
+def tile_xy(lat: float, lng: float, z: int) -> tuple[float, float]:
+    """Fractional slippy-map tile coordinates."""
+    n = 2**z
+    lat = max(-85.0511, min(85.0511, lat))
+    x = (lng + 180.0) / 360.0 * n
+    y = (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n
+    return x, y
+
+
+def load_points(lake_dir: Path) -> tuple[dict[str, list[tuple[int, float, float]]], dict[str, int], str]:
+    """(type -> [(ordinal, lat, lng)], type -> item count, source hash) for the map types.
+
+    Ordinals and counts cover every item, with or without coordinates, as the bundle
+    lists do: that is the ordinal space app.js checks against the list it loaded.
+    """
+    points: dict[str, list[tuple[int, float, float]]] = {}
+    counts: dict[str, int] = {}
+    h = hashlib.sha256()
+    for typ in MAP_TYPES:
+        p = lake_dir / f"{typ}.json"
+        raw = p.read_bytes() if p.exists() else b"[]"
+        h.update(typ.encode() + b"\0" + raw)
+        items = json.loads(raw.decode("utf-8"))
+        # the bundle keeps only dict entries, so ordinals skip anything else too
+        items = [it for it in items if isinstance(it, dict)] if isinstance(items, list) else []
+        counts[typ] = len(items)
+        pts = []
+        for i, it in enumerate(items):
+            lat, lng = it.get("lat"), it.get("lng")
+            if isinstance(lat, (int, float)) and isinstance(lng, (int, float)):
+                pts.append((i, float(lat), float(lng)))
+        points[typ] = pts
+    return points, counts, h.hexdigest()[:HASH_LEN]
+
+
+def cluster_tiles(points: dict[str, list[tuple[int, float, float]]], z: int) -> dict[str, dict]:
+    # key -> type -> cell -> [n, sum lat, sum lng]
+    acc: dict[str, dict[str, dict[tuple[int, int], list[float]]]] = {}
+    sub = 2**CLUSTER_SUB
+    for typ, pts in points.items():
+        for _, lat, lng in pts:
+            fx, fy = tile_xy(lat, lng, z)
+            key = f"{z}/{int(fx)}/{int(fy)}"
+            cell = (int(fx * sub) % sub, int(fy * sub) % sub)
+            c = acc.setdefault(key, {}).setdefault(typ, {}).setdefault(cell, [0, 0.0, 0.0])
+            c[0] += 1
+            c[1] += lat
+            c[2] += lng
+    tiles = {}
+    for key, by_type in acc.items():
+        rows = []
+        for typ in MAP_TYPES:
+            for cell in sorted(by_type.get(typ, {})):
+                n, slat, slng = by_type[typ][cell]
+                rows.append([typ, int(n), round(slat / n, 5), round(slng / n, 5)])
+        tiles[key] = {"c": rows}
+    return tiles
+
+
+def point_tiles(points: dict[str, list[tuple[int, float, float]]], z: int) -> dict[str, dict]:
+    tiles: dict[str, dict[str, list[int]]] = {}
+    for typ, pts in points.items():
+        for i, lat, lng in pts:
+            fx, fy = tile_xy(lat, lng, z)
+            tiles.setdefault(f"{z}/{int(fx)}/{int(fy)}", {}).setdefault(typ, []).append(i)
+    return tiles
+
+
+def encode(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def write_if_changed(p: Path, data: bytes) -> bool:
+    if p.exists() and p.read_bytes() == data:
+        return False
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_name(f".{p.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, p)
+    return True
+
+
+def size_stats(sizes: list[int]) -> dict[str, Any]:
+    if not sizes:
+        return {"tiles": 0, "bytes": 0}
+    s = sorted(sizes)
+    return {
+        "tiles": len(s),
+        "bytes": sum(s),
+        "min": s[0],
+        "median": int(statistics.median(s)),
+        "p90": s[min(len(s) - 1, int(len(s) * 0.9))],
+        "max": s[-1],
+    }
+
+
+def read_index(p: Path) -> dict:
+    try:
+        return json.loads(p.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def drop_lake(out_dir: Path) -> None:
+    if out_dir.exists():
+        for p in sorted(out_dir.rglob("*"), reverse=True):
+            p.unlink() if p.is_file() else p.rmdir()
+        out_dir.rmdir()
+
+
+def build_lake(
+    lake_id: str,
+    tiles_dir: Path = TILES_DIR,
+    min_zoom: int = MIN_ZOOM,
+    detail_zoom: int = DETAIL_ZOOM,
+    min_pois: int = DEFAULT_MIN_POIS,
+    full: bool = False,
+) -> dict[str, Any]:
+    points, counts, src_hash = load_points(DATA_DIR / lake_id)
+    total = sum(len(pts) for pts in points.values())
+    out_dir = tiles_dir / lake_id
+    if total <= min_pois:
+        drop_lake(out_dir)
+        return {"tiled": False, "pois": total}
+
+    index_path = out_dir / "index.json"
+    head = {"v": src_hash, "version": VERSION, "bundle": build_bundle(lake_id)["hash"]}
+    params = {"minZoom": min_zoom, "detailZoom": detail_zoom, "clusterSub": CLUSTER_SUB}
+    old = read_index(index_path)
+    if not full and all(old.get(k) == v for k, v in {**head, **params}.items()):
+        sizes = list(old.get("tiles", {}).values())
+        return {"tiled": True, "pois": total, "skipped": True, **size_stats(sizes)}
+
+    tiles: dict[str, dict] = {}
+    for z in range(min_zoom, detail_zoom):
+        tiles.update(cluster_tiles(points, z))
+    tiles.update(point_tiles(points, detail_zoom))
+
+    written = 0
+    sizes: dict[str, int] = {}
+    per_zoom: dict[int, list[int]] = {}
+    for key in sorted(tiles):
+        data = encode(tiles[key])
+        sizes[key] = len(data)
+        per_zoom.setdefault(int(key.split("/")[0]), []).append(len(data))
+        written += write_if_changed(out_dir / f"{key}.json", data)
+    removed = 0
+    for key in old.get("tiles", {}):
+        if key not in tiles:
+            p = out_dir / f"{key}.json"
+            if p.exists():
+                p.unlink()
+                removed += 1
+    for d in sorted((p for p in out_dir.rglob("*") if p.is_dir()), reverse=True):
+        if not any(d.iterdir()):
+            d.rmdir()
+
+    index = {**head, **params, "counts": counts, "tiles": sizes}
+    write_if_changed(index_path, encode(index))
+    return {
+        "tiled": True,
+        "pois": total,
+        "written": written,
+        "removed": removed,
+        **size_stats(list(sizes.values())),
+        "perZoom": {str(z): size_stats(s) for z, s in sorted(per_zoom.items())},
+    }
+
+
+def lake_ids() -> list[str]:
+    return sorted(p.name for p in DATA_DIR.iterdir() if p.is_dir()) if DATA_DIR.exists() else []
+
+
+def check(
+    lakes: list[str],
+    tiles_dir: Path = TILES_DIR,
+    min_zoom: int = MIN_ZOOM,
+    detail_zoom: int = DETAIL_ZOOM,
+    min_pois: int = DEFAULT_MIN_POIS,
+) -> list[str]:
+    """Lakes whose tiles do not match their data and bundle (what build would change)."""
+    manifest = read_index(tiles_dir / "manifest.json")
+    stale = []
+    for lake in lakes:
+        points, counts, src_hash = load_points(DATA_DIR / lake)
+        out_dir = tiles_dir / lake
+        if sum(len(pts) for pts in points.values()) <= min_pois:
+            if lake in manifest or out_dir.exists():
+                stale.append(lake)
+            continue
+        old = read_index(out_dir / "index.json")
+        want = {
+            "v": src_hash,
+            "version": VERSION,
+            "bundle": build_bundle(lake)["hash"],
+            "minZoom": min_zoom,
+            "detailZoom": detail_zoom,
+            "clusterSub": CLUSTER_SUB,
+            "counts": counts,
+        }
+        if (
+            any(old.get(k) != v for k, v in want.items())
+            or (manifest.get(lake) or {}).get("v") != src_hash
+            or not all((out_dir / f"{key}.json").is_file() for key in old.get("tiles", {}))
+        ):
+            stale.append(lake)
+    return stale
+
+
+def build(
+    lakes: list[str],
+    tiles_dir: Path = TILES_DIR,
+    min_zoom: int = MIN_ZOOM,
+    detail_zoom: int = DETAIL_ZOOM,
+    min_pois: int = DEFAULT_MIN_POIS,
+    full: bool = False,
+) -> dict[str, dict]:
+    manifest_path = tiles_dir / "manifest.json"
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except Exception:
+        manifest = {}
+    report = {}
+    for lake in lakes:
+        r = build_lake(lake, tiles_dir, min_zoom, detail_zoom, min_pois, full)
+        report[lake] = r
+        if r["tiled"]:
+            index = json.loads((tiles_dir / lake / "index.json").read_text(encoding="utf-8"))
+            manifest[lake] = {"v": index["v"], "minZoom": min_zoom, "detailZoom": detail_zoom}
+        else:
+            manifest.pop(lake, None)
+    for lake in [k for k in manifest if k not in lake_ids()]:
+        del manifest[lake]
+    write_if_changed(manifest_path, (json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True) + "\n").encode("utf-8"))
+    return report
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("lakes", nargs="*", help="Lake ids (default: all lakes under data/lakes)")
+    ap.add_argument("--out-dir", default=None, help="Tile root (default: data/tiles)")
+    ap.add_argument("--min-zoom", type=int, default=MIN_ZOOM)
+    ap.add_argument("--detail-zoom", type=int, default=DETAIL_ZOOM)
+    ap.add_argument("--min-pois", type=int, default=DEFAULT_MIN_POIS, help="Only tile lakes with more map POIs than this")
+    ap.add_argument("--full", action="store_true", help="Rebuild even if the source data is unchanged")
+    ap.add_argument("--check", action="store_true", help="Do not write; exit 1 if a lake's tiles are stale")
+    args = ap.parse_args()
+
+    tiles_dir = Path(args.out_dir) if args.out_dir else TILES_DIR
+    if args.check:
+        stale = check(args.lakes or lake_ids(), tiles_dir, args.min_zoom, args.detail_zoom, args.min_pois)
+        print(json.dumps({"ok": not stale, "stale": stale}, ensure_ascii=False))
+        if stale:
+            sys.exit(1)
+        return
+    report = build(args.lakes or lake_ids(), tiles_dir, args.min_zoom, args.detail_zoom, args.min_pois, args.full)
+    print(json.dumps({"ok": True, "lakes": report}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
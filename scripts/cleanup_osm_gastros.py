@@ -13,11 +13,21 @@ This is used after we tighten the gastro candidate query to only harbor/marina-a
 
 import argparse
 import json
-from pathlib import Path
 
+from lake_dataset import LakeDataset
 
-def is_verified(it: dict) -> bool:
-    return bool((it.get("source") or "").strip() and (it.get("lastVerified") or "").strip())
+
+def cleanup_gastros(ds: LakeDataset) -> dict:
+    if not ds.exists("gastro"):
+        return {"lake": ds.lake_id, "kept": 0, "removed": 0}
+
+    drop = [
+        it
+        for it in ds.unverified("gastro")
+        if (it.get("candidateSource") or "").strip() == "osm"
+    ]
+    removed = ds.remove("gastro", drop)
+    return {"lake": ds.lake_id, "kept": len(ds.records("gastro")), "removed": removed}
 
 
 def main():
@@ -25,25 +35,10 @@ def main():
     ap.add_argument("--lake", required=True)
     args = ap.parse_args()
 
-    p = Path("data") / "lakes" / args.lake / "gastros.json"
-    if not p.exists():
-        print(json.dumps({"lake": args.lake, "kept": 0, "removed": 0}, ensure_ascii=False))
-        return
-
-    data = json.loads(p.read_text(encoding="utf-8"))
-    kept = []
-    removed = 0
-    for it in data:
-        if is_verified(it):
-            kept.append(it)
-            continue
-        if (it.get("candidateSource") or "").strip() != "osm":
-            kept.append(it)
-            continue
-        removed += 1
-
-    p.write_text(json.dumps(kept, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
-    print(json.dumps({"lake": args.lake, "kept": len(kept), "removed": removed}, ensure_ascii=False))
+    ds = LakeDataset.load(args.lake)
+    summary = cleanup_gastros(ds)
+    ds.save()
+    print(json.dumps(summary, ensure_ascii=False))
 
 
 if __name__ == "__main__":
@@ -11,6 +11,10 @@ Merge strategy:
 - merge candidateUrl if missing
 - do NOT change coordinates/name
 
+Candidate pairs come from a fixed-cell grid sized from --max-m: every entry is only
+compared with later entries in its own and the 8 adjacent cells, which yields the
+same keep/drop decisions as the full pair scan (see scripts/bench_dedup_lake.py).
+
 Outputs JSON summary.
 """
 
@@ -20,15 +24,8 @@ import argparse
 import json
 import math
 import re
-from pathlib import Path
 
-TYPE_FILES = {
-    "harbors": "harbors.json",
-    "anchors": "anchors.json",
-    "rentals": "rentals.json",
-    "gastros": "gastros.json",
-    "services": "services.json",
-}
+from lake_dataset import TYPE_FILES, LakeDataset, is_verified
 
 
 def norm_name(s: str) -> str:
@@ -38,10 +35,6 @@ def norm_name(s: str) -> str:
     return s
 
 
-def is_verified(it: dict) -> bool:
-    return bool((it.get("source") or "").strip() and (it.get("lastVerified") or "").strip())
-
-
 def haversine_m(lat1, lon1, lat2, lon2) -> float:
     R = 6371000.0
     p1 = math.radians(lat1)
@@ -52,72 +45,119 @@ def haversine_m(lat1, lon1, lat2, lon2) -> float:
     return 2*R*math.asin(math.sqrt(a))
 
 
+class GridIndex:
+    """Fixed-cell lat/lng grid; any two points within max_m share or touch a cell."""
+
+    def __init__(self, points: list[tuple[float, float]], max_m: float) -> None:
+        max_m = max(float(max_m), 1.0)
+        # great-circle distance >= R*dlat, and >= R*cos(lat)*dlng (1% margin for
+        # the small-angle approximation), so cells this size never split a pair
+        self.cell_lat = math.degrees(max_m / 6371000.0)
+        max_abs_lat = max((abs(lat) for lat, _ in points), default=0.0)
+        cos_lat = max(math.cos(math.radians(min(max_abs_lat, 89.0))), 1e-6)
+        self.cell_lng = self.cell_lat / cos_lat * 1.01
+        self.cells: dict[tuple[int, int], list[int]] = {}
+        for pos, (lat, lng) in enumerate(points):
+            self.cells.setdefault(self.key(lat, lng), []).append(pos)
+
+    def key(self, lat: float, lng: float) -> tuple[int, int]:
+        return (math.floor(lat / self.cell_lat), math.floor(lng / self.cell_lng))
+
+    def near(self, lat: float, lng: float) -> list[int]:
+        """Positions in the 3x3 block around (lat, lng); superset of all within max_m."""
+        ci, cj = self.key(lat, lng)
+        out: list[int] = []
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                out.extend(self.cells.get((ci + di, cj + dj), ()))
+        return out
+
+    def neighbours_after(self, pos: int, lat: float, lng: float) -> list[int]:
+        """Positions > pos in the 3x3 block around (lat, lng), ascending."""
+        return sorted(p for p in self.near(lat, lng) if p > pos)
+
+
+def find_duplicates(data: list, max_m: float) -> tuple[set[int], int]:
+    """Return (indices to remove, candidateUrl merges). Mutates kept entries.
+
+    data is a list of dicts or lake_dataset.Record objects.
+    """
+    # work list of osm candidates only
+    idx = [i for i, it in enumerate(data) if (it.get("candidateSource") == "osm") and it.get("lat") is not None and it.get("lng") is not None]
+    to_remove: set[int] = set()
+    merges = 0
+    if not idx:
+        return to_remove, merges
+
+    names = [norm_name(data[i].get("name")) for i in idx]
+    grid = GridIndex([(data[i]["lat"], data[i]["lng"]) for i in idx], max_m)
+
+    for a_i in range(len(idx)):
+        i = idx[a_i]
+        if i in to_remove:
+            continue
+        A = data[i]
+        nA = names[a_i]
+        for b_i in grid.neighbours_after(a_i, A["lat"], A["lng"]):
+            j = idx[b_i]
+            if j in to_remove:
+                continue
+            B = data[j]
+            nB = names[b_i]
+            if not nA or not nB:
+                continue
+            # simple similarity: one contains the other (after normalization)
+            if nA not in nB and nB not in nA:
+                continue
+            d = haversine_m(A["lat"], A["lng"], B["lat"], B["lng"])
+            if d > max_m:
+                continue
+
+            # Decide keep/drop
+            candA = (A.get("candidateUrl") or "").strip()
+            candB = (B.get("candidateUrl") or "").strip()
+            keep, drop = (A, B)
+            drop_idx = j
+
+            if is_verified(B) and not is_verified(A):
+                keep, drop = (B, A)
+                drop_idx = i
+            elif (candB and not candA):
+                keep, drop = (B, A)
+                drop_idx = i
+
+            # Merge candidateUrl
+            if not (keep.get("candidateUrl") or "").strip() and (drop.get("candidateUrl") or "").strip():
+                keep["candidateUrl"] = drop.get("candidateUrl")
+                merges += 1
+
+            to_remove.add(drop_idx)
+
+    return to_remove, merges
+
+
+def dedup(ds: LakeDataset, max_m: float = 60) -> dict:
+    removed_total = 0
+    merges_total = 0
+    for typ in TYPE_FILES:
+        data = ds.records(typ)
+        to_remove, merges = find_duplicates(data, max_m)
+        merges_total += merges
+        removed_total += ds.remove(typ, [data[k] for k in to_remove])
+    return {"lake": ds.lake_id, "removed": removed_total, "merged": merges_total}
+
+
 def main() -> None:
     ap = argparse.ArgumentParser()
     ap.add_argument("--lake", required=True)
     ap.add_argument("--max-m", type=int, default=60)
     args = ap.parse_args()
 
-    base = Path("data") / "lakes" / args.lake
-    removed_total = 0
-    merges_total = 0
+    ds = LakeDataset.load(args.lake)
+    summary = dedup(ds, args.max_m)
+    ds.save()
 
-    for key, fname in TYPE_FILES.items():
-        p = base / fname
-        if not p.exists():
-            continue
-        data = json.loads(p.read_text(encoding="utf-8"))
-        # work list of osm candidates only
-        idx = [i for i, it in enumerate(data) if (it.get("candidateSource") == "osm") and it.get("lat") is not None and it.get("lng") is not None]
-        to_remove = set()
-
-        for a_i in range(len(idx)):
-            i = idx[a_i]
-            if i in to_remove:
-                continue
-            A = data[i]
-            nA = norm_name(A.get("name"))
-            for b_i in range(a_i + 1, len(idx)):
-                j = idx[b_i]
-                if j in to_remove:
-                    continue
-                B = data[j]
-                nB = norm_name(B.get("name"))
-                if not nA or not nB:
-                    continue
-                # simple similarity: one contains the other (after normalization)
-                if nA not in nB and nB not in nA:
-                    continue
-                d = haversine_m(A["lat"], A["lng"], B["lat"], B["lng"])
-                if d > args.max_m:
-                    continue
-
-                # Decide keep/drop
-                candA = (A.get("candidateUrl") or "").strip()
-                candB = (B.get("candidateUrl") or "").strip()
-                keep, drop = (A, B)
-                drop_idx = j
-
-                if is_verified(B) and not is_verified(A):
-                    keep, drop = (B, A)
-                    drop_idx = i
-                elif (candB and not candA):
-                    keep, drop = (B, A)
-                    drop_idx = i
-
-                # Merge candidateUrl
-                if not (keep.get("candidateUrl") or "").strip() and (drop.get("candidateUrl") or "").strip():
-                    keep["candidateUrl"] = drop.get("candidateUrl")
-                    merges_total += 1
-
-                to_remove.add(drop_idx)
-
-        if to_remove:
-            out = [it for k, it in enumerate(data) if k not in to_remove]
-            removed_total += len(to_remove)
-            p.write_text(json.dumps(out, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
-
-    print(json.dumps({"lake": args.lake, "removed": removed_total, "merged": merges_total}, ensure_ascii=False))
+    print(json.dumps(summary, ensure_ascii=False))
 
 
 if __name__ == "__main__":
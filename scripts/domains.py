@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Domain classification shared by auto_verify, sanitize_urls and apply_whatsapp_reply.
+
+A URL is judged by its hostname only (parsed once), never by substrings of the whole
+URL, so "osm." no longer matches cosmos.ch and "x.com" no longer matches wix.com.
+
+Two kinds of rules, both compiled into one dict lookup per hostname suffix:
+- DOMAINS: exact registrable domains; they also match every subdomain
+  (fb.com matches m.fb.com)
+- BRANDS: a label followed only by a public suffix of short labels, i.e. any country
+  or generic TLD (google.de, google.co.uk, maps.google.com, tripadvisor.ch)
+
+Verdict kinds:
+- social        social network profiles
+- aggregator    review/booking/delivery/search portals
+- blocked       references that are never an operator's site (wikis, map databases)
+- community     sailing forums and cruising guides (acceptable for anchors only)
+- official-candidate  anything else with a valid http(s) host
+- invalid       no http(s) URL or no dotted hostname
+
+classify_many() classifies a whole list, memoized per hostname.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, NamedTuple
+from urllib.parse import urlsplit
+
+SOCIAL = "social"
+AGGREGATOR = "aggregator"
+BLOCKED = "blocked"
+COMMUNITY = "community"
+CANDIDATE = "official-candidate"
+INVALID = "invalid"
+
+# Earlier kinds win when several rules match (e.g. forum.facebook.com is social).
+PRECEDENCE = (SOCIAL, AGGREGATOR, BLOCKED, COMMUNITY)
+
+DOMAINS = {
+    "fb.com": SOCIAL,
+    "fb.me": SOCIAL,
+    "x.com": SOCIAL,
+    "t.co": SOCIAL,
+    "goo.gl": AGGREGATOR,
+    "g.page": AGGREGATOR,
+    "osm.org": BLOCKED,
+}
+
+BRANDS = {
+    "facebook": SOCIAL,
+    "instagram": SOCIAL,
+    "tiktok": SOCIAL,
+    "twitter": SOCIAL,
+    "tripadvisor": AGGREGATOR,
+    "google": AGGREGATOR,
+    "yelp": AGGREGATOR,
+    "booking": AGGREGATOR,
+    "opentable": AGGREGATOR,
+    "thefork": AGGREGATOR,
+    "ubereats": AGGREGATOR,
+    "just-eat": AGGREGATOR,
+    "lieferando": AGGREGATOR,
+    "wikipedia": BLOCKED,
+    "wikidata": BLOCKED,
+    "openstreetmap": BLOCKED,
+    "osm": BLOCKED,
+    "navily": COMMUNITY,
+    "noonsite": COMMUNITY,
+}
+
+# a hostname label ending in "forum" (forum.example.de, seglerforum.ch,
+# cruisersforum.com) marks a community site
+COMMUNITY_LABEL_SUFFIX = "forum"
+
+# labels of a public suffix: tld, "co.uk", "com.au", ...
+MAX_SUFFIX_LABEL = 3
+
+
+class Verdict(NamedTuple):
+    kind: str
+    host: str
+    rule: str | None = None
+
+    @property
+    def official(self) -> bool:
+        return self.kind == CANDIDATE
+
+
+def hostname(url: str) -> str | None:
+    """Lowercased hostname of an http(s) URL, or None."""
+    u = (url or "").strip()
+    if not u.lower().startswith(("http://", "https://")):
+        return None
+    try:
+        host = (urlsplit(u).hostname or "").rstrip(".")
+    except ValueError:
+        return None
+    if not host or "." not in host:
+        return None
+    return host
+
+
+class DomainClassifier:
+    def __init__(self, domains: dict[str, str] = DOMAINS, brands: dict[str, str] = BRANDS) -> None:
+        self.domains = dict(domains)
+        self.brands = dict(brands)
+        self._rank = {k: i for i, k in enumerate(PRECEDENCE)}
+        self._memo: dict[str, Verdict] = {}
+
+    def classify_host(self, host: str) -> Verdict:
+        hit = self._memo.get(host)
+        if hit is not None:
+            return hit
+        labels = host.split(".")
+        best: tuple[int, str, str] | None = None
+
+        def take(kind: str, rule: str) -> None:
+            nonlocal best
+            r = self._rank[kind]
+            if best is None or r < best[0]:
+                best = (r, kind, rule)
+
+        for i in range(len(labels) - 1):
+            suffix = ".".join(labels[i:])
+            kind = self.domains.get(suffix)
+            if kind:
+                take(kind, suffix)
+            label = labels[i]
+            kind = self.brands.get(label)
+            if kind and all(len(l) <= MAX_SUFFIX_LABEL for l in labels[i + 1 :]):
+                take(kind, f"{label}.*")
+            if label.endswith(COMMUNITY_LABEL_SUFFIX):
+                take(COMMUNITY, f"*{COMMUNITY_LABEL_SUFFIX}.")
+
+        v = Verdict(best[1], host, best[2]) if best else Verdict(CANDIDATE, host)
+        self._memo[host] = v
+        return v
+
+    def classify(self, url: str) -> Verdict:
+        host = hostname(url)
+        if host is None:
+            return Verdict(INVALID, "")
+        return self.classify_host(host)
+
+    def classify_many(self, urls: Iterable[str]) -> list[Verdict]:
+        return [self.classify(u) for u in urls]
+
+
+CLASSIFIER = DomainClassifier()
+
+
+def classify(url: str) -> Verdict:
+    return CLASSIFIER.classify(url)
+
+
+def classify_many(urls: Iterable[str]) -> list[Verdict]:
+    return CLASSIFIER.classify_many(urls)
+
+
+def acceptable(v: Verdict, typ: str) -> bool:
+    """May a URL with verdict v become the official source of a `typ` entry?
+
+    Anchors also accept community sites (forums, cruising guides); every other type
+    needs an official candidate.
+    """
+    if typ == "anchor":
+        return v.kind in (CANDIDATE, COMMUNITY)
+    return v.kind == CANDIDATE
+
+
+def source_ok(url: str, typ: str) -> bool:
+    return acceptable(classify(url), typ)
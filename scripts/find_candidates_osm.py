@@ -6,19 +6,65 @@ Strict rule: this script NEVER sets official sources. It only proposes candidate
 Output: JSON list of candidates (stdout)
 
 Design: best-effort. Overpass is flaky; return partial results rather than failing.
+
+Response cache: every successful Overpass response is stored content-addressed
+(sha256 of endpoint + query text, which includes the bbox) under .cache/overpass/
+(override: BS_OVERPASS_CACHE). A cached response younger than --max-age-h is reused
+without a request; if the endpoint fails after all retries, the last good response is
+used instead (reported in "overpass" as "stale"). --offline never touches the network
+and replays cached responses only, so import/dedup can be developed and benchmarked
+without Overpass.
+
+Deadline: find_candidates / find_candidates_batch take an optional deadline
+(time.monotonic() value). Every request's timeout is capped at the time left and no
+retry or backoff starts after it, so a caller's time budget (run_pipeline's find
+stage) holds even while Overpass keeps failing.
+
+Local extract: --extract PATH (.osm/.osm.gz/.osm.bz2 or .osm.pbf) streams a downloaded
+OSM extract instead of querying Overpass and applies the same marina / boat_rental /
+restaurant-near-harbour rules (see scripts/osm_extract.py). Same output shape.
+
+Batched mode: --all-lakes (or several --lake) sends the three searches once for all
+lakes instead of once per lake: each query is a union over every lake bbox, so overlap
+between neighbouring lakes (Zürichsee / Zugersee / Vierwaldstättersee) is fetched once.
+Elements come back with their bounding box (`out bb`) and are partitioned to lakes in
+memory through a coarse grid of lake bboxes (BBoxIndex). 3 round-trips per cron run
+instead of 3 per lake. Restaurants are matched with a 150 m margin around each bbox,
+since the harbour they were found through lies inside it.
 """
 
+import hashlib
 import json
+import os
 import time
 import argparse
+import math
 from pathlib import Path
 from datetime import date
 
-import requests
+ROOT = Path(__file__).resolve().parents[1]
 
 # Prefer one stable endpoint to avoid long failovers.
 ENDPOINT = "https://overpass.kumi.systems/api/interpreter"
 
+CACHE_DIR = Path(os.environ.get("BS_OVERPASS_CACHE") or ROOT / ".cache" / "overpass")
+DEFAULT_MAX_AGE_H = 20
+REQUEST_TIMEOUT_S = 180
+
+KINDS = ("marina", "gastro", "rental")
+# ~150 m (the harbour radius of the gastro search) in degrees latitude; BBoxIndex
+# widens it east-west by 1/cos(lat)
+GASTRO_MARGIN_DEG = 0.0014
+
+
+def load_bboxes() -> dict:
+    """lake id -> bbox (south, west, north, east) for every lake in data/lakes.json."""
+    try:
+        lakes = json.loads((ROOT / 'data' / 'lakes.json').read_text(encoding='utf-8'))
+        return {l['id']: tuple(l['bbox']) for l in lakes if l.get('id') and l.get('bbox')}
+    except Exception:
+        return {}
+
 
 def load_bbox(lake_id: str):
     try:
@@ -42,72 +88,129 @@ def norm_url(u: str) -> str:
     return "https://" + u
 
 
-def post_overpass(query: str):
-    r = requests.post(ENDPOINT, data={"data": query}, timeout=180)
+def post_overpass(query: str, timeout: float = REQUEST_TIMEOUT_S):
+    # only live queries need the HTTP client (keeps --offline dependency-free)
+    import requests
+
+    r = requests.post(ENDPOINT, data={"data": query}, timeout=timeout)
     r.raise_for_status()
     return r.json()
 
 
-def collect(query: str, kind: str):
-    """Return (candidates, error)."""
-    today = date.today().isoformat()
+def cache_path(query: str) -> Path:
+    h = hashlib.sha256(f"{ENDPOINT}\n{query.strip()}".encode("utf-8")).hexdigest()
+    return CACHE_DIR / f"{h}.json"
+
+
+def cache_load(query: str):
+    """Return (response, age_seconds) or (None, None)."""
+    try:
+        entry = json.loads(cache_path(query).read_text(encoding="utf-8"))
+        return entry["response"], time.time() - entry["fetchedAt"]
+    except Exception:
+        return None, None
+
+
+def cache_store(query: str, js: dict) -> None:
+    p = cache_path(query)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"fetchedAt": time.time(), "query": query, "response": js}, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, p)
+
+
+def time_left(deadline):
+    """Seconds until a time.monotonic() deadline (None: no deadline)."""
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def fetch_overpass(query: str, max_age_s: float, offline: bool = False, deadline=None):
+    """Return (response | None, status, error). status: cache|live|stale|offline-miss|failed.
+
+    With a deadline, request timeouts are capped at the time left and retries stop
+    once it has passed.
+    """
+    cached, age = cache_load(query)
+    if cached is not None and (offline or age < max_age_s):
+        return cached, "cache", None
+    if offline:
+        return None, "offline-miss", "offline: no cached response"
+
+    last = None
     for attempt in range(3):
+        left = time_left(deadline)
+        if left is not None and left <= 0:
+            last = last or "deadline passed before the request"
+            break
         try:
-            js = post_overpass(query)
-            out = []
-            for el in js.get("elements", []):
-                tags = el.get("tags", {})
-                name = tags.get("name")
-                if not name:
-                    continue
-                website = tags.get("website") or tags.get("contact:website")
-                website = norm_url(website)
-
-                lat = el.get("lat")
-                lon = el.get("lon")
-                if lat is None or lon is None:
-                    center = el.get("center") or {}
-                    lat = center.get("lat")
-                    lon = center.get("lon")
-
-                out.append(
-                    {
-                        "name": name,
-                        "website": website or '',
-                        "kind": kind,
-                        "osmType": el.get("type"),
-                        "osmId": el.get("id"),
-                        "tags": {
-                            "amenity": tags.get("amenity"),
-                            "leisure": tags.get("leisure"),
-                            "waterway": tags.get("waterway"),
-                            "seamark:type": tags.get("seamark:type"),
-                            "addr:country": tags.get("addr:country"),
-                            "contact:phone": tags.get("contact:phone") or tags.get("phone"),
-                            "opening_hours": tags.get("opening_hours"),
-                        },
-                        "lat": lat,
-                        "lng": lon,
-                        "foundAt": today,
-                        "foundVia": "osm",
-                        "overpass": ENDPOINT,
-                    }
-                )
-            return out, None
+            js = post_overpass(query, REQUEST_TIMEOUT_S if left is None else min(REQUEST_TIMEOUT_S, left))
+            cache_store(query, js)
+            return js, "live", None
         except Exception as e:
-            err = f"{type(e).__name__}: {e}"
-            time.sleep(1.5 * (attempt + 1))
-            last = err
-    return [], last
+            last = f"{type(e).__name__}: {e}"
+            backoff = 1.5 * (attempt + 1)
+            left = time_left(deadline)
+            time.sleep(backoff if left is None else max(0.0, min(backoff, left)))
+    if cached is not None:
+        # endpoint down: fall back to the last good response
+        return cached, "stale", None
+    return None, "failed", last
 
 
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--lake", default="bodensee")
-    args = ap.parse_args()
-    lake_id = (args.lake or "bodensee").strip()
-    bbox = load_bbox(lake_id)
+def parse_elements(js: dict, kind: str, origin: str = ENDPOINT) -> list:
+    today = date.today().isoformat()
+    out = []
+    for el in js.get("elements", []):
+        tags = el.get("tags", {})
+        name = tags.get("name")
+        if not name:
+            continue
+        website = tags.get("website") or tags.get("contact:website")
+        website = norm_url(website)
+
+        lat = el.get("lat")
+        lon = el.get("lon")
+        if lat is None or lon is None:
+            center = el.get("center") or {}
+            lat = center.get("lat")
+            lon = center.get("lon")
+
+        out.append(
+            {
+                "name": name,
+                "website": website or '',
+                "kind": kind,
+                "osmType": el.get("type"),
+                "osmId": el.get("id"),
+                "tags": {
+                    "amenity": tags.get("amenity"),
+                    "leisure": tags.get("leisure"),
+                    "waterway": tags.get("waterway"),
+                    "seamark:type": tags.get("seamark:type"),
+                    "addr:country": tags.get("addr:country"),
+                    "contact:phone": tags.get("contact:phone") or tags.get("phone"),
+                    "opening_hours": tags.get("opening_hours"),
+                },
+                "lat": lat,
+                "lng": lon,
+                "foundAt": today,
+                "foundVia": "osm",
+                "overpass": origin,
+            }
+        )
+    return out
+
+
+def collect(query: str, kind: str, max_age_s: float = DEFAULT_MAX_AGE_H * 3600, offline: bool = False, deadline=None):
+    """Return (candidates, error, cache status)."""
+    js, status, err = fetch_overpass(query, max_age_s, offline, deadline)
+    if js is None:
+        return [], err, status
+    return parse_elements(js, kind), None, status
 
+
+def build_queries(bbox) -> list[tuple[str, str]]:
+    """(kind, Overpass QL) for the marina, harbour-gastro and rental searches."""
     marina_query = f"""
 [out:json][timeout:120];
 (
@@ -147,19 +250,129 @@ out center tags;
 out center tags;
 """
 
-    all_candidates = []
-    errors = {}
+    return [
+        ("marina", marina_query),
+        ("gastro", gastro_query),
+        ("rental", rental_query),
+    ]
+
 
-    for kind, q in [
+def build_batch_queries(bboxes: list) -> list[tuple[str, str]]:
+    """Like build_queries, but each search is one union over all bboxes.
+
+    Uses `out bb` so every way/relation carries its bounds for partitioning.
+    """
+    boxes = sorted(set(tuple(b) for b in bboxes))
+
+    def union(*filters: str) -> str:
+        return "\n".join(f"  nwr{f}({b[0]},{b[1]},{b[2]},{b[3]});" for b in boxes for f in filters)
+
+    marina_query = f"""
+[out:json][timeout:180];
+(
+{union('["leisure"="marina"]["website"]', '["leisure"="marina"]["contact:website"]')}
+);
+out bb tags;
+"""
+    gastro_query = f"""
+[out:json][timeout:180];
+(
+{union('["leisure"="marina"]', '["seamark:type"="harbour"]', '["harbour"]')}
+)->.h;
+(
+  nwr["amenity"="restaurant"](around.h:150);
+)->.r;
+(
+  nwr.r["website"];
+  nwr.r["contact:website"];
+  nwr.r["contact:phone"];
+  nwr.r["phone"];
+  nwr.r["opening_hours"];
+);
+out bb tags;
+"""
+    rental_query = f"""
+[out:json][timeout:180];
+(
+{union('["amenity"="boat_rental"]["website"]', '["amenity"="boat_rental"]["contact:website"]')}
+);
+out bb tags;
+"""
+    return [
         ("marina", marina_query),
         ("gastro", gastro_query),
         ("rental", rental_query),
-    ]:
-        cands, err = collect(q, kind)
-        all_candidates += cands
-        if err:
-            errors[kind] = err
+    ]
+
+
+def widen(b, margin: float) -> tuple:
+    """(s, w, n, e) grown by `margin` degrees latitude, and the same distance east-west."""
+    if not margin:
+        return tuple(b)
+    lat = min(89.0, max(abs(b[0]), abs(b[2])))
+    margin_lng = margin / math.cos(math.radians(lat))
+    return (b[0] - margin, b[1] - margin_lng, b[2] + margin, b[3] + margin_lng)
+
+
+class BBoxIndex:
+    """Coarse grid over lake bboxes: element bounds -> lakes whose bbox they intersect.
+
+    `margin` is a distance in degrees of latitude; east-west it is divided by cos(lat) at
+    the bbox edge nearest the pole, so the widened box is at least `margin` away on all
+    sides (0.0014 deg is ~150 m north-south but only ~106 m east-west at 47 N).
+    """
+
+    def __init__(self, bboxes: dict, cell_deg: float = 0.25, margin: float = 0.0) -> None:
+        self.cell = cell_deg
+        self.boxes = {lake: widen(b, margin) for lake, b in bboxes.items()}
+        self.cells: dict = {}
+        for lake, b in self.boxes.items():
+            for key in self._keys(b):
+                self.cells.setdefault(key, []).append(lake)
+
+    def _keys(self, b):
+        for i in range(math.floor(b[0] / self.cell), math.floor(b[2] / self.cell) + 1):
+            for j in range(math.floor(b[1] / self.cell), math.floor(b[3] / self.cell) + 1):
+                yield (i, j)
+
+    def lakes_for(self, s: float, w: float, n: float, e: float) -> list:
+        found = []
+        for key in self._keys((s, w, n, e)):
+            for lake in self.cells.get(key, ()):
+                if lake in found:
+                    continue
+                b = self.boxes[lake]
+                if s <= b[2] and n >= b[0] and w <= b[3] and e >= b[1]:
+                    found.append(lake)
+        return found
+
+
+def element_bounds(el: dict):
+    """(s, w, n, e) of a node or an `out bb` way/relation; None without geometry."""
+    if el.get("lat") is not None and el.get("lon") is not None:
+        return (el["lat"], el["lon"], el["lat"], el["lon"])
+    b = el.get("bounds")
+    if b:
+        return (b["minlat"], b["minlon"], b["maxlat"], b["maxlon"])
+    return None
+
+
+def partition_elements(js: dict, index: BBoxIndex) -> dict:
+    """Split one batched response into {lake: [elements]} (with `out center` geometry)."""
+    out: dict = {lake: [] for lake in index.boxes}
+    for el in js.get("elements", []):
+        bb = element_bounds(el)
+        if bb is None:
+            continue
+        if "bounds" in el:
+            # same point Overpass reports for `out center` (centre of the bounding box)
+            el = {**el, "center": {"lat": (bb[0] + bb[2]) / 2, "lon": (bb[1] + bb[3]) / 2}}
+        for lake in index.lakes_for(*bb):
+            out[lake].append(el)
+    return out
 
+
+def dedup_candidates(all_candidates: list) -> list:
     # de-dup by website+name
     seen = set()
     uniq = []
@@ -169,8 +382,109 @@ out center tags;
             continue
         seen.add(key)
         uniq.append(c)
+    return uniq
+
+
+def find_candidates(lake_id: str, max_age_h: float = DEFAULT_MAX_AGE_H, offline: bool = False, deadline=None) -> dict:
+    """Run all queries for a lake.
+
+    Returns {"candidates": [...], "errors": {kind: msg}, "overpass": {kind: cache status}}.
+    """
+    bbox = load_bbox(lake_id)
+
+    all_candidates = []
+    errors = {}
+    statuses = {}
+
+    for kind, q in build_queries(bbox):
+        cands, err, status = collect(q, kind, max_age_h * 3600, offline, deadline)
+        all_candidates += cands
+        statuses[kind] = status
+        if err:
+            errors[kind] = err
+
+    return {"candidates": dedup_candidates(all_candidates), "errors": errors, "overpass": statuses}
+
+
+def find_candidates_batch(lake_ids: list, max_age_h: float = DEFAULT_MAX_AGE_H, offline: bool = False, deadline=None) -> dict:
+    """One union query per search for several lakes -> {lake: result as find_candidates}."""
+    bboxes = load_bboxes()
+    wanted = {lake: bboxes.get(lake) or load_bbox(lake) for lake in lake_ids}
+    indexes = {
+        "marina": BBoxIndex(wanted),
+        "gastro": BBoxIndex(wanted, margin=GASTRO_MARGIN_DEG),
+        "rental": BBoxIndex(wanted),
+    }
+
+    cands = {lake: [] for lake in lake_ids}
+    errors = {lake: {} for lake in lake_ids}
+    statuses = {}
+    for kind, q in build_batch_queries(list(wanted.values())):
+        js, status, err = fetch_overpass(q, max_age_h * 3600, offline, deadline)
+        statuses[kind] = status
+        if js is None:
+            for lake in lake_ids:
+                errors[lake][kind] = err
+            continue
+        for lake, els in partition_elements(js, indexes[kind]).items():
+            cands[lake] += parse_elements({"elements": els}, kind)
+
+    return {
+        lake: {"candidates": dedup_candidates(cands[lake]), "errors": errors[lake], "overpass": dict(statuses)}
+        for lake in lake_ids
+    }
+
+
+def find_candidates_extract(lake_ids: list, extract: str) -> dict:
+    """One streaming pass over a local extract for several lakes -> {lake: result}."""
+    from osm_extract import scan_extract
+
+    bboxes = load_bboxes()
+    wanted = {lake: bboxes.get(lake) or load_bbox(lake) for lake in lake_ids}
+    scan = scan_extract(extract, wanted)
+    origin = f"extract:{Path(extract).name}"
+    out = {}
+    for lake in lake_ids:
+        by_kind = scan.result(lake)
+        cands = []
+        for kind in KINDS:
+            cands += parse_elements({"elements": by_kind[kind]}, kind, origin)
+        out[lake] = {"candidates": dedup_candidates(cands), "errors": {}, "overpass": {k: "extract" for k in by_kind}}
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--lake", action="append", default=None, help="Lake id (repeat for a batched multi-lake run)")
+    ap.add_argument("--all-lakes", action="store_true", help="Batched run over every lake in data/lakes.json")
+    ap.add_argument("--out-dir", default=None, help="Batched: write osm_candidates_<lake>.json here instead of stdout")
+    ap.add_argument("--max-age-h", type=float, default=DEFAULT_MAX_AGE_H, help="Reuse cached Overpass responses younger than this")
+    ap.add_argument("--offline", action="store_true", help="Replay cached responses only; never query Overpass")
+    ap.add_argument("--extract", default=None, help="Local .osm/.osm.pbf extract to stream instead of Overpass")
+    args = ap.parse_args()
+    lake_ids = list(load_bboxes()) if args.all_lakes else [l.strip() for l in (args.lake or ["bodensee"]) if l.strip()]
+
+    if len(lake_ids) == 1 and not args.out_dir:
+        lake_id = lake_ids[0]
+        if args.extract:
+            res = find_candidates_extract([lake_id], args.extract)[lake_id]
+        else:
+            res = find_candidates(lake_id, args.max_age_h, args.offline)
+        print(json.dumps(res, ensure_ascii=False, indent=2))
+        return
 
-    print(json.dumps({"candidates": uniq, "errors": errors}, ensure_ascii=False, indent=2))
+    if args.extract:
+        results = find_candidates_extract(lake_ids, args.extract)
+    else:
+        results = find_candidates_batch(lake_ids, args.max_age_h, args.offline)
+    if not args.out_dir:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+    out = Path(args.out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    for lake, res in results.items():
+        (out / f"osm_candidates_{lake}.json").write_text(json.dumps(res, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(json.dumps({lake: len(res["candidates"]) for lake, res in results.items()}))
 
 
 if __name__ == "__main__":
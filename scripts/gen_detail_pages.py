@@ -3,26 +3,36 @@
 
 Creates detail/<lake>/<type>/<id>/index.html and a sitemap.xml.
 Strict: uses existing data only; does not invent facts.
+
+Incremental by default: detail/manifest.json stores a content hash and lastmod per
+page. A page is only rewritten when its rendered HTML (record or template) changed,
+pages of entries that were removed or unverified are deleted, and unchanged pages keep
+their previous sitemap lastmod. sitemap.xml/robots.txt are only written when their
+content differs. --full rewrites every page and resets lastmod to today. --out-root writes
+the pages, sitemap and manifest under another directory (used by scripts/bench_pipeline.py).
 """
 
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
+import re
 from pathlib import Path
 from datetime import date
 
+from lake_dataset import TYPE_FILES, LakeDataset, load_lakes
+
 ROOT = Path(__file__).resolve().parents[1]
 SITE_BASE = "https://phailipp.github.io/bodensee-segler-site"
+MANIFEST = Path("detail") / "manifest.json"
 
-TYPES = {
-    'harbor': 'harbors.json',
-    'anchor': 'anchors.json',
-    'rental': 'rentals.json',
-    'gastro': 'gastros.json',
-    'service': 'services.json',
+# Hand-written pages listed in the sitemap: url path -> file
+STATIC_PAGES = {
+    "/": "index.html",
+    "/artikel/hafen-heute-abend/": "artikel/hafen-heute-abend/index.html",
 }
 
-
 def esc(s: str) -> str:
     return (
         (s or "")
@@ -33,72 +43,37 @@ def esc(s: str) -> str:
     )
 
 
-def is_verified(it: dict) -> bool:
-    return bool((it.get("source") or "").strip() and (it.get("lastVerified") or "").strip())
-
-
 def label_country(c: str) -> str:
     return (c or "").upper()
 
 
-def main() -> None:
-    out_root = ROOT / "detail"
-    out_root.mkdir(parents=True, exist_ok=True)
-
-    urls = []
-    today = date.today().isoformat()
-
-    lakes = []
-    try:
-        lakes = json.loads((ROOT / 'data/lakes.json').read_text(encoding='utf-8'))
-    except Exception:
-        lakes = [{'id': 'bodensee', 'name': 'Bodensee'}]
-
-    for lake in lakes:
-        lake_id = lake.get('id') or 'bodensee'
-        lake_name = lake.get('name') or lake_id
-        base_dir = ROOT / 'data' / 'lakes' / lake_id
-
-        for typ, fname in TYPES.items():
-            pth = base_dir / fname
-            if not pth.exists():
-                continue
-            data = json.loads(pth.read_text(encoding='utf-8'))
-            for it in data:
-                pid = it.get("id")
-                name = it.get("name") or pid
-                if not pid:
-                    continue
-
-                ver = is_verified(it)
-                # premium site: only publish verified pages for indexability
-                if not ver:
-                    continue
+def sha(s: str) -> str:
+    return hashlib.sha256(s.encode("utf-8")).hexdigest()
 
-                country = label_country(it.get("country"))
-                region = it.get("region") or it.get("location") or ""
-                coords = ""
-                if it.get("lat") is not None and it.get("lng") is not None:
-                    coords = f"{it['lat']:.5f}, {it['lng']:.5f}"
 
-                source = (it.get("source") or "").strip()
-                lastv = (it.get("lastVerified") or "").strip()
-                title = f"{name} – {lake_name}"
-                desc = f"Verified entry: {name}. Official source and last verified date included." if name else "Verified entry with official source."
+def render_page(lake_id: str, lake_name: str, typ: str, it: dict) -> str:
+    pid = it.get("id")
+    name = it.get("name") or pid
+    country = label_country(it.get("country"))
+    region = it.get("region") or it.get("location") or ""
+    coords = ""
+    if it.get("lat") is not None and it.get("lng") is not None:
+        coords = f"{it['lat']:.5f}, {it['lng']:.5f}"
 
-                page_dir = out_root / lake_id / typ / pid
-                page_dir.mkdir(parents=True, exist_ok=True)
-                url = f"{SITE_BASE}/detail/{lake_id}/{typ}/{pid}/"
-                urls.append(url)
+    source = (it.get("source") or "").strip()
+    lastv = (it.get("lastVerified") or "").strip()
+    title = f"{name} – {lake_name}"
+    desc = f"Verified entry: {name}. Official source and last verified date included." if name else "Verified entry with official source."
+    url = f"{SITE_BASE}/detail/{lake_id}/{typ}/{pid}/"
 
-                html = f"""<!doctype html>
+    html = f"""<!doctype html>
 <html lang=\"de\">
 <head>
   <meta charset=\"utf-8\" />
   <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\" />
   <title>{esc(title)}</title>
   <meta name=\"description\" content=\"{esc(desc)}\" />
-  <link rel=\"stylesheet\" href=\"../../../css/styles.css\" />
+  <link rel=\"stylesheet\" href=\"../../../../css/styles.css\" />
   <meta property=\"og:title\" content=\"{esc(title)}\" />
   <meta property=\"og:description\" content=\"{esc(desc)}\" />
   <meta property=\"og:type\" content=\"website\" />
@@ -137,23 +112,135 @@ def main() -> None:
 </body>
 </html>
 """
-                (page_dir / "index.html").write_text(html, encoding="utf-8")
+    return html
+
+
+def load_manifest(root: Path = ROOT) -> dict:
+    try:
+        return json.loads((root / MANIFEST).read_text(encoding="utf-8")).get("pages", {})
+    except Exception:
+        return {}
+
+
+def sitemap_lastmods(root: Path = ROOT) -> dict[str, str]:
+    """url -> lastmod from the current sitemap.xml (bootstrap when no manifest exists)."""
+    try:
+        xml = (root / "sitemap.xml").read_text(encoding="utf-8")
+    except Exception:
+        return {}
+    return dict(re.findall(r"<loc>(.*?)</loc><lastmod>(.*?)</lastmod>", xml))
+
+
+def write_if_changed(path: Path, content: str) -> bool:
+    try:
+        if path.read_text(encoding="utf-8") == content:
+            return False
+    except FileNotFoundError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+    return True
+
+
+def existing_pages(out_root: Path, root: Path = ROOT) -> set[str]:
+    """Relative paths of generated pages on disk (detail/<lake>/<type>/<id>/index.html)."""
+    return {str(p.relative_to(root)) for p in out_root.glob("*/*/*/index.html")}
+
+
+def remove_page(rel: str, root: Path = ROOT) -> None:
+    page = root / rel
+    page.unlink(missing_ok=True)
+    # prune now-empty id/type/lake directories
+    d = page.parent
+    while d != root / "detail" and d.is_dir() and not any(d.iterdir()):
+        d.rmdir()
+        d = d.parent
+
+
+def generate(full: bool = False, root: Path = ROOT) -> dict:
+    """Write the pages, sitemap.xml and robots.txt under `root` (the site checkout by default)."""
+    out_root = root / "detail"
+    out_root.mkdir(parents=True, exist_ok=True)
+
+    today = date.today().isoformat()
+    old = {} if full else load_manifest(root)
+    old_lastmod = {} if full else sitemap_lastmods(root)
+    pages: dict[str, dict] = {}
+    written = 0
+
+    def track(rel: str, url: str, digest: str) -> bool:
+        """Record a page in the new manifest; True if its content changed."""
+        prev = old.get(rel)
+        if prev and prev.get("hash") == digest:
+            lastmod = prev.get("lastmod") or today
+            changed = False
+        elif not prev and old_lastmod.get(url) and (root / rel).exists() and sha((root / rel).read_text(encoding="utf-8")) == digest:
+            lastmod = old_lastmod[url]
+            changed = False
+        else:
+            lastmod = today
+            changed = True
+        pages[rel] = {"url": url, "hash": digest, "lastmod": lastmod}
+        return changed
+
+    for lake in load_lakes():
+        lake_id = lake.get('id') or 'bodensee'
+        lake_name = lake.get('name') or lake_id
+        ds = LakeDataset.load(lake_id)
+
+        for typ in TYPE_FILES:
+            # premium site: only publish verified pages for indexability
+            for it in ds.verified(typ):
+                pid = it.get("id")
+                if not pid:
+                    continue
+
+                html = render_page(lake_id, lake_name, typ, it)
+                rel = f"detail/{lake_id}/{typ}/{pid}/index.html"
+                url = f"{SITE_BASE}/detail/{lake_id}/{typ}/{pid}/"
+                changed = track(rel, url, sha(html))
+                if (changed or full or not (root / rel).exists()) and write_if_changed(root / rel, html):
+                    written += 1
+
+    # pages of entries that were removed or lost their verification
+    stale = {rel for rel in existing_pages(out_root, root) | set(old) if rel.startswith("detail/")} - set(pages)
+    for rel in sorted(stale):
+        remove_page(rel, root)
+
+    for path, fname in STATIC_PAGES.items():
+        f = root / fname
+        if f.exists():
+            track(fname, SITE_BASE + path, sha(f.read_text(encoding="utf-8")))
 
     # robots + sitemap
-    (ROOT / "robots.txt").write_text("User-agent: *\nAllow: /\nSitemap: " + SITE_BASE + "/sitemap.xml\n", encoding="utf-8")
+    write_if_changed(root / "robots.txt", "User-agent: *\nAllow: /\nSitemap: " + SITE_BASE + "/sitemap.xml\n")
 
     sm = [
         "<?xml version=\"1.0\" encoding=\"UTF-8\"?>",
         "<urlset xmlns=\"http://www.sitemaps.org/schemas/sitemap/0.9\">",
-        f"  <url><loc>{SITE_BASE}/</loc><lastmod>{today}</lastmod></url>",
-        f"  <url><loc>{SITE_BASE}/artikel/hafen-heute-abend/</loc><lastmod>{today}</lastmod></url>",
     ]
-    for u in sorted(set(urls)):
-        sm.append(f"  <url><loc>{u}</loc><lastmod>{today}</lastmod></url>")
+    for fname in STATIC_PAGES.values():
+        if fname in pages:
+            sm.append(f"  <url><loc>{pages[fname]['url']}</loc><lastmod>{pages[fname]['lastmod']}</lastmod></url>")
+    detail = sorted((v for k, v in pages.items() if k.startswith("detail/")), key=lambda v: v["url"])
+    for v in detail:
+        sm.append(f"  <url><loc>{v['url']}</loc><lastmod>{v['lastmod']}</lastmod></url>")
     sm.append("</urlset>\n")
-    (ROOT / "sitemap.xml").write_text("\n".join(sm), encoding="utf-8")
+    write_if_changed(root / "sitemap.xml", "\n".join(sm))
+
+    write_if_changed(root / MANIFEST, json.dumps({"pages": dict(sorted(pages.items()))}, ensure_ascii=False, indent=2) + "\n")
+
+    return {"pages": len(detail), "written": written, "removed": len(stale)}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--full", action="store_true", help="Rewrite every page and reset lastmod to today")
+    ap.add_argument("--out-root", default=None, help="Site root to write detail/, sitemap.xml and robots.txt under (default: the repo)")
+    args = ap.parse_args()
 
-    print(f"generated_pages={len(urls)}")
+    res = generate(args.full, Path(args.out_root) if args.out_root else ROOT)
+    print(f"generated_pages={res['pages']} written={res['written']} removed={res['removed']}")
 
 
 if __name__ == "__main__":
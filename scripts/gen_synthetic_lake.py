@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""Generate a deterministic synthetic lake for load testing the pipeline scripts.
+
+Writes <out>/lakes/<lake>/{harbors,anchors,rentals,gastros,services,layers}.json in the
+exact schema of data/lakes/<lake>/ plus <out>/lakes.json, and an OSM candidate file
+(<out>/osm_candidates_<lake>.json, the find_candidates_osm.py output shape) for
+apply_candidates.py. Point BS_DATA_DIR at <out>/lakes to run the scripts against it.
+
+The data is shaped like the real lakes, only bigger:
+- POIs cluster around a few dozen harbour towns in the lake bbox (Bodensee by default)
+- names come from a small vocabulary, so many entries share names and name tokens
+- DUP_SHARE of the OSM entries are near-duplicates of an earlier entry: same or
+  longer name, a few metres off (what dedup_lake.py exists for); PROMOTED_SHARE of
+  them are already verified, which changes which duplicate dedup keeps
+- curated entries (verified or not) sit next to OSM candidates; candidate URLs mix
+  web, http://, tracking fragments, stray whitespace, social and aggregator hosts
+  (what sanitize_urls.py normalizes and classifies)
+
+The same --pois/--seed always produce byte-identical files (dates are fixed).
+
+Usage:
+  python3 scripts/gen_synthetic_lake.py --pois 50000 --out /tmp/synth
+  BS_DATA_DIR=/tmp/synth/lakes python3 scripts/dedup_lake.py --lake synthsee
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import Any
+
+from import_osm_candidates import mk_id
+from lake_dataset import TYPE_FILES, dump_json
+
+LAKE_ID = "synthsee"
+BBOX = (47.30, 8.70, 47.90, 10.20)
+FOUND_AT = "2026-02-11"
+VERIFIED_AT = "2026-02-10"
+
+# share of all POIs per type (roughly the Bodensee mix, which is mostly OSM gastros)
+TYPE_MIX = {"gastro": 0.55, "harbor": 0.15, "rental": 0.10, "anchor": 0.10, "service": 0.10}
+CURATED_SHARE = 0.10  # hand-maintained entries; the rest are OSM candidates
+VERIFIED_SHARE = 0.5  # of the curated entries
+DUP_SHARE = 0.12
+PROMOTED_SHARE = 0.05  # OSM entries auto_verify already gave a source/lastVerified
+CANDIDATES_PER_POI = 0.25
+
+PLACES = [
+    "Lindau", "Bregenz", "Konstanz", "Arbon", "Meersburg", "Kressbronn", "Romanshorn", "Hard",
+    "Überlingen", "Friedrichshafen", "Langenargen", "Immenstaad", "Hagnau", "Radolfzell",
+    "Steckborn", "Kreuzlingen", "Rorschach", "Wasserburg", "Nonnenhorn", "Allensbach",
+    "Ludwigshafen", "Sipplingen", "Uhldingen", "Gaienhofen", "Ermatingen", "Altnau",
+    "Güttingen", "Uttwil", "Lochau", "Fussach", "Gohren", "Reichenau",
+]
+NAME_WORDS = {
+    "gastro": ["Restaurant", "Café", "Gasthaus", "Pizzeria", "Seeblick", "Krone", "Linde", "Hafenrestaurant", "Strandbar", "Zum Anker"],
+    "harbor": ["Yachthafen", "Marina", "Hafen", "Gondelhafen", "Segelclub", "Bootshafen", "Motorboot-Club"],
+    "rental": ["Bootsverleih", "Tretboot", "SUP Verleih", "Segelschule", "Charter", "Kanu"],
+    "anchor": ["Bucht", "Ankerplatz", "Reede", "Schilfkante", "Landzunge"],
+    "service": ["Slip", "Tankstelle", "Werft", "Segelmacher", "Kran", "Pumpstation"],
+}
+SUFFIXES = ["am See", "Nord", "Süd", "West", "Ost", "am Hafen", "Mole", "Strand"]
+OSM_KINDS = {"gastro": "gastro", "harbor": "marina", "rental": "rental"}
+COUNTRIES = ["DE", "AT", "CH"]
+URL_HOSTS = [
+    "https://www.facebook.com/{s}",
+    "https://www.instagram.com/{s}/",
+    "https://www.tripadvisor.ch/Restaurant-{s}",
+    "http://www.{s}.de/",
+    "https://www.{s}.de/#utm_source=osm",
+    "  https://{s}.ch/  ",
+]
+
+
+def ascii_slug(s: str) -> str:
+    out = "".join(c if c.isascii() and c.isalnum() else "-" for c in s.lower())
+    return "-".join(p for p in out.split("-") if p) or "poi"
+
+
+class Synth:
+    def __init__(self, seed: int, bbox: tuple[float, float, float, float] = BBOX) -> None:
+        self.rnd = random.Random(seed)
+        s, w, n, e = bbox
+        self.bbox = bbox
+        self.towns = [(p, self.rnd.uniform(s, n), self.rnd.uniform(w, e)) for p in PLACES]
+        self.osm_id = 100_000_000
+
+    def point(self) -> tuple[str, float, float]:
+        s, w, n, e = self.bbox
+        town, lat0, lng0 = self.rnd.choice(self.towns)
+        lat = min(n, max(s, self.rnd.gauss(lat0, 0.015)))
+        lng = min(e, max(w, self.rnd.gauss(lng0, 0.02)))
+        return town, round(lat, 7), round(lng, 7)
+
+    def name(self, typ: str, town: str) -> str:
+        r = self.rnd.random()
+        word = self.rnd.choice(NAME_WORDS[typ])
+        if r < 0.6:
+            return f"{word} {town}"
+        if r < 0.85:
+            return f"{word} {self.rnd.choice(SUFFIXES)}"
+        return f"{word} {self.rnd.choice(NAME_WORDS[typ])} {town}"
+
+    def url(self, name: str) -> str:
+        s = ascii_slug(name)
+        if self.rnd.random() < 0.7:
+            return f"https://www.{s}.de/"
+        return self.rnd.choice(URL_HOSTS).format(s=s)
+
+    def curated(self, typ: str, k: int) -> dict[str, Any]:
+        town, lat, lng = self.point()
+        name = self.name(typ, town)
+        verified = self.rnd.random() < VERIFIED_SHARE
+        url = self.url(name) if verified or self.rnd.random() < 0.3 else ""
+        it: dict[str, Any] = {"id": f"{ascii_slug(name)}-{k}", "name": name, "country": self.rnd.choice(COUNTRIES)}
+        it.update(CURATED_FIELDS[typ](self.rnd, town))
+        it.update({"lat": lat, "lng": lng})
+        it.update(CURATED_TAIL[typ](self.rnd))
+        it.update(
+            {
+                "url": url.strip(),
+                "source": url.strip() if verified else "",
+                "lastVerified": VERIFIED_AT if verified else "",
+                "candidateUrl": None,
+                "candidateFoundAt": None,
+                "candidateSource": None,
+            }
+        )
+        it.update({f: "" for f in CONTACT_FIELDS[typ]})
+        if typ == "harbor":
+            it.update({"maxLengthM": None, "maxBeamM": None, "amenities": [], "guestPolicy": ""})
+        return it
+
+    def osm(self, typ: str, prev: list[dict]) -> dict[str, Any]:
+        self.osm_id += self.rnd.randint(1, 5000)
+        if prev and self.rnd.random() < DUP_SHARE:
+            src = self.rnd.choice(prev)
+            name = src["name"] if self.rnd.random() < 0.5 else f"{src['name']} {self.rnd.choice(SUFFIXES)}"
+            lat = round(src["lat"] + self.rnd.uniform(-0.0004, 0.0004), 7)
+            lng = round(src["lng"] + self.rnd.uniform(-0.0004, 0.0004), 7)
+        else:
+            town, lat, lng = self.point()
+            name = self.name(typ, town)
+        osm_type = "node" if self.rnd.random() < 0.85 else "way"
+        it: dict[str, Any] = {
+            "id": mk_id({"osmType": osm_type, "osmId": self.osm_id, "name": name}),
+            "name": name,
+            "lat": lat,
+            "lng": lng,
+            "candidateSource": "osm",
+            "candidateFoundAt": FOUND_AT,
+            "candidateOsmType": osm_type,
+            "candidateOsmId": self.osm_id,
+        }
+        if self.rnd.random() < 0.6:
+            it["candidateUrl"] = self.url(name)
+        if self.rnd.random() < 0.5:
+            it["candidatePhone"] = f"+49 7{self.rnd.randint(100, 999)} {self.rnd.randint(10000, 999999)}"
+        if self.rnd.random() < 0.4:
+            it["candidateHours"] = "Mo-Su 11:30-14:00,17:00-22:00"
+        if self.rnd.random() < PROMOTED_SHARE:
+            it["source"] = (it.get("candidateUrl") or self.url(name)).strip()
+            it["lastVerified"] = VERIFIED_AT
+        return it
+
+    def candidate(self, typ: str, items: list[dict]) -> dict[str, Any]:
+        """An OSM search hit; mostly near an existing entry of the same type, under a similar name."""
+        self.osm_id += self.rnd.randint(1, 5000)
+        if items and self.rnd.random() < 0.7:
+            src = self.rnd.choice(items)
+            name, lat, lng = src["name"], src["lat"], src["lng"]
+            if self.rnd.random() < 0.4:
+                name = f"{name} {self.rnd.choice(SUFFIXES)}"
+        else:
+            town, lat, lng = self.point()
+            name = self.name(typ, town)
+        return {
+            "name": name,
+            "website": self.url(name) if self.rnd.random() < 0.8 else "",
+            "kind": OSM_KINDS[typ],
+            "osmType": "node",
+            "osmId": self.osm_id,
+            "tags": {"amenity": None, "leisure": None, "waterway": None, "seamark:type": None, "addr:country": None, "contact:phone": None, "opening_hours": None},
+            "lat": round(lat + self.rnd.uniform(-0.0003, 0.0003), 7),
+            "lng": round(lng + self.rnd.uniform(-0.0003, 0.0003), 7),
+            "foundAt": FOUND_AT,
+            "foundVia": "osm",
+            "overpass": "synthetic",
+        }
+
+
+# -- per-type schema (field order as in data/lakes/bodensee) ---------------------------
+
+CURATED_FIELDS = {
+    "harbor": lambda rnd, town: {"region": f"{town}, Obersee"},
+    "anchor": lambda rnd, town: {"region": f"{town}, Obersee"},
+    "rental": lambda rnd, town: {"location": town},
+    "gastro": lambda rnd, town: {"location": town},
+    "service": lambda rnd, town: {"type": rnd.choice(["slip", "fuel", "yard", "crane"]), "details": "Öffentlich"},
+}
+CURATED_TAIL = {
+    "harbor": lambda rnd: {
+        "berths": rnd.randint(20, 600),
+        "guestBerths": rnd.randint(0, 60),
+        "maxDraftM": round(rnd.uniform(1.2, 3.5), 1),
+        "features": rnd.sample(["Strom", "Wasser", "WLAN", "Sanitär", "Kran 8t", "Winterlager"], 3),
+        "notes": "",
+    },
+    "anchor": lambda rnd: {
+        "depthMinM": rnd.randint(2, 5),
+        "depthMaxM": rnd.randint(6, 12),
+        "ground": rnd.choice(["Sand", "Schlick", "Kies"]),
+        "protection": rnd.choice(["W/NW", "N/NE", "S/SW"]),
+        "overnight": rnd.random() < 0.3,
+        "notes": "",
+    },
+    "rental": lambda rnd: {"fleetSize": rnd.randint(2, 40), "priceFrom": rnd.randint(20, 300), "features": ["Segelboote"]},
+    "gastro": lambda rnd: {"price": rnd.choice(["€", "€€", "€€€"]), "berthing": rnd.random() < 0.4, "features": ["Terrasse"]},
+    "service": lambda rnd: {},
+}
+CONTACT_FIELDS = {
+    "harbor": ("vhf", "phone", "email", "hours", "prices"),
+    "anchor": ("holding", "swell", "restrictions"),
+    "rental": ("phone", "email", "hours"),
+    "gastro": ("phone", "hours"),
+    "service": ("phone", "email", "hours", "prices"),
+}
+
+
+def generate(pois: int, out: Path, lake_id: str = LAKE_ID, seed: int = 1, bbox: tuple[float, float, float, float] = BBOX) -> dict[str, Any]:
+    syn = Synth(seed, bbox)
+    by_type: dict[str, list[dict]] = {}
+    for typ, share in TYPE_MIX.items():
+        n = max(1, round(pois * share))
+        n_curated = n if typ not in OSM_KINDS else max(1, round(n * CURATED_SHARE))
+        items = [syn.curated(typ, k) for k in range(n_curated)]
+        osm: list[dict] = []
+        for _ in range(n - n_curated):
+            osm.append(syn.osm(typ, osm))
+        by_type[typ] = items + osm
+
+    cands = [
+        syn.candidate(typ, by_type[typ])
+        for typ in OSM_KINDS
+        for _ in range(round(len(by_type[typ]) * CANDIDATES_PER_POI))
+    ]
+
+    lake_dir = out / "lakes" / lake_id
+    lake_dir.mkdir(parents=True, exist_ok=True)
+    for typ, fname in TYPE_FILES.items():
+        (lake_dir / fname).write_text(dump_json(by_type[typ]), encoding="utf-8")
+    (lake_dir / "layers.json").write_text(dump_json([]), encoding="utf-8")
+
+    s, w, n, e = bbox
+    lakes_path = out / "lakes.json"
+    try:
+        lakes = [l for l in json.loads(lakes_path.read_text(encoding="utf-8")) if l.get("id") != lake_id]
+    except Exception:
+        lakes = []
+    lakes.append({"id": lake_id, "name": lake_id.capitalize(), "center": [round((s + n) / 2, 4), round((w + e) / 2, 4)], "zoom": 10, "bbox": list(bbox)})
+    lakes_path.write_text(dump_json(sorted(lakes, key=lambda l: l["id"])), encoding="utf-8")
+
+    cand_path = out / f"osm_candidates_{lake_id}.json"
+    cand_path.write_text(json.dumps({"candidates": cands, "errors": {}, "overpass": {}}, ensure_ascii=False), encoding="utf-8")
+
+    return {
+        "lake": lake_id,
+        "dataDir": str(out / "lakes"),
+        "candidates": str(cand_path),
+        "pois": sum(len(v) for v in by_type.values()),
+        "perType": {typ: len(v) for typ, v in by_type.items()},
+        "candidateCount": len(cands),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pois", type=int, required=True, help="Total POIs across all types (e.g. 1000 .. 200000)")
+    ap.add_argument("--out", required=True, help="Directory to write lakes/<lake>/ and lakes.json into")
+    ap.add_argument("--lake", default=LAKE_ID)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    print(json.dumps(generate(args.pois, Path(args.out), args.lake, args.seed), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
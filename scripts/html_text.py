@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Streaming HTML -> lowercase text for the page checks in auto_verify.
+
+- Bytes are decoded incrementally with the page's charset: Content-Type header first,
+  then a BOM or <meta charset> / http-equiv in the first bytes, UTF-8 as fallback.
+- html.parser tokenizes on the fly; script/style/noscript/template content is dropped
+  as it streams past, tags become word breaks, entities are resolved and whitespace
+  is collapsed.
+- A TextProbe (the needles a caller is waiting for) lets the reader stop as soon as
+  the decision is made; pages are otherwise read up to max_read bytes and the text is
+  capped at MAX_TEXT characters.
+"""
+
+from __future__ import annotations
+
+import codecs
+import re
+from html.parser import HTMLParser
+from typing import Any, Callable, Iterable
+
+CHUNK = 16 * 1024
+MAX_TEXT = 200_000
+SNIFF_BYTES = 4096
+
+SKIP_TAGS = {"script", "style", "noscript", "template"}
+
+META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([A-Za-z0-9_\-:.]+)""", re.I)
+WS_RE = re.compile(r"\s+")
+
+BOMS = ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
+
+
+def lookup_charset(name: str | None) -> str | None:
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name.strip().strip("\"'")).name
+    except LookupError:
+        return None
+
+
+def sniff_charset(head: bytes, header_charset: str | None = None) -> str:
+    """Charset from the Content-Type header, a BOM or a <meta> tag; UTF-8 otherwise."""
+    enc = lookup_charset(header_charset)
+    if enc:
+        return enc
+    for bom, name in BOMS:
+        if head.startswith(bom):
+            return name
+    m = META_CHARSET_RE.search(head[:SNIFF_BYTES])
+    return lookup_charset(m.group(1).decode("ascii", "ignore") if m else None) or "utf-8"
+
+
+class TextExtractor(HTMLParser):
+    """Collects visible text, lowercased and whitespace-collapsed."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self.size = 0
+        self._skip = 0
+        self._space = True
+
+    def handle_starttag(self, tag: str, attrs: Any) -> None:
+        if tag in SKIP_TAGS:
+            self._skip += 1
+        self._brk()
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in SKIP_TAGS and self._skip:
+            self._skip -= 1
+        self._brk()
+
+    def handle_data(self, data: str) -> None:
+        if self._skip or self.size >= MAX_TEXT:
+            return
+        s = WS_RE.sub(" ", data.lower())
+        if not s:
+            return
+        if self._space and s[0] == " ":
+            s = s[1:]
+        if not s:
+            return
+        s = s[: MAX_TEXT - self.size]
+        self.parts.append(s)
+        self.size += len(s)
+        self._space = s[-1] == " "
+
+    def _brk(self) -> None:
+        if not self._space and self.size < MAX_TEXT:
+            self.parts.append(" ")
+            self.size += 1
+            self._space = True
+
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    @property
+    def full(self) -> bool:
+        return self.size >= MAX_TEXT
+
+
+class TextProbe:
+    """Watches the growing text for needles; done() says when reading can stop.
+
+    `ready` gets the set of needles found so far.
+    """
+
+    def __init__(self, needles: Iterable[str], ready: Callable[[set[str]], bool]) -> None:
+        self.needles = [n for n in dict.fromkeys(needles) if n]
+        self.ready = ready
+        self.found: set[str] = set()
+        self._tail = ""
+        self._keep = max((len(n) for n in self.needles), default=1) - 1
+
+    def feed(self, new_text: str) -> bool:
+        """Scan newly extracted text (plus the previous tail for needles on a boundary)."""
+        window = self._tail + new_text
+        for n in self.needles:
+            if n not in self.found and n in window:
+                self.found.add(n)
+        self._tail = window[-self._keep :] if self._keep else ""
+        return self.done()
+
+    def done(self) -> bool:
+        return self.ready(self.found)
+
+
+def read_text(resp: Any, max_read: int = 400_000, probe: TextProbe | None = None) -> tuple[str, bool]:
+    """Stream an HTTP response into text; returns (text, complete).
+
+    complete is False when the probe ended the read early.
+    """
+    if probe is not None and probe.done():
+        return "", False
+    header_charset = None
+    try:
+        header_charset = resp.headers.get_content_charset()
+    except Exception:
+        pass
+
+    head = resp.read(min(CHUNK, max_read))
+    total = len(head)
+    decoder = codecs.getincrementaldecoder(sniff_charset(head, header_charset))(errors="replace")
+    parser = TextExtractor()
+
+    chunk = head
+    while True:
+        n = len(parser.parts)
+        parser.feed(decoder.decode(chunk, final=not chunk))
+        if probe is not None and probe.feed("".join(parser.parts[n:])):
+            return parser.text(), False
+        if not chunk or total >= max_read or parser.full:
+            break
+        chunk = resp.read(min(CHUNK, max_read - total))
+        total += len(chunk)
+    parser.close()
+    return parser.text(), True
+
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""Persistent on-disk HTTP response cache shared by the page fetchers.
+
+Used by scripts/auto_verify.py and tools/fill_contacts_from_source.py so nightly
+runs stop re-downloading the same operator homepages.
+
+- One JSON file per (variant, url) under .cache/http/ (override: BS_HTTP_CACHE).
+- Stores the processed body (e.g. stripped text) plus ETag / Last-Modified.
+- Fresh entries (younger than ttl) are served locally without any request.
+- Stale entries are revalidated with If-None-Match / If-Modified-Since; a 304
+  only refreshes the timestamp.
+- Size-bounded LRU: a hit touches the file mtime, eviction drops the oldest files
+  until the directory is below max_bytes.
+
+Errors (HTTP >= 400, timeouts) are raised to the caller and never cached. Neither
+are partial bodies: a `stream` reader that stops early (see html_text.read_text)
+returns its text without storing it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_DIR = Path(os.environ.get("BS_HTTP_CACHE") or ROOT / ".cache" / "http")
+DEFAULT_TTL_S = 12 * 3600
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+USER_AGENT = "Mozilla/5.0 (compatible; BodenseeSeglerBot/1.0; +https://github.com/Phailipp/bodensee-segler-site)"
+
+
+def decode_body(data: bytes) -> str:
+    return data.decode("utf-8", errors="ignore")
+
+
+class HttpCache:
+    def __init__(
+        self,
+        path: Path | str | None = None,
+        ttl_s: float = DEFAULT_TTL_S,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.path = Path(path) if path else DEFAULT_DIR
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self.stats = {"hit": 0, "revalidated": 0, "fetched": 0, "partial": 0, "evicted": 0}
+        self._lock = threading.Lock()
+        self._size: int | None = None
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += n
+
+    # -- storage -----------------------------------------------------------
+
+    def _file(self, variant: str, url: str) -> Path:
+        h = hashlib.sha256(f"{variant}\n{url}".encode("utf-8")).hexdigest()
+        return self.path / h[:2] / f"{h}.json"
+
+    def _load(self, f: Path) -> dict | None:
+        try:
+            return json.loads(f.read_text(encoding="utf-8"))
+        except Exception:
+            return None
+
+    def _store(self, f: Path, entry: dict) -> None:
+        f.parent.mkdir(parents=True, exist_ok=True)
+        raw = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        tmp = f.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        old = f.stat().st_size if f.exists() else 0
+        tmp.write_bytes(raw)
+        os.replace(tmp, f)
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(raw) - old
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def _scan_size(self) -> int:
+        return sum(p.stat().st_size for p in self.path.glob("*/*.json"))
+
+    def evict(self) -> int:
+        """Drop least recently used entries until the cache fits max_bytes."""
+        with self._lock:
+            files = []
+            for p in self.path.glob("*/*.json"):
+                try:
+                    st = p.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((st.st_mtime, st.st_size, p))
+            files.sort()
+            total = sum(size for _, size, _ in files)
+            removed = 0
+            for _, size, p in files:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    p.unlink()
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+            self._size = total
+        self._count("evicted", removed)
+        return removed
+
+    # -- fetching ----------------------------------------------------------
+
+    def fetch(
+        self,
+        url: str,
+        *,
+        variant: str = "raw",
+        transform: Callable[[bytes], str] = decode_body,
+        timeout_s: float = 10,
+        max_read: int = 400_000,
+        headers: dict[str, str] | None = None,
+        stream: Callable[[Any, int], tuple[str, bool]] | None = None,
+    ) -> str:
+        """Return transform(body) for url, from cache when fresh or unchanged.
+
+        variant separates entries that store a different transform of the same URL
+        (e.g. stripped text vs raw HTML). stream(response, max_read) -> (text, complete)
+        replaces read + transform; incomplete results are not cached.
+        """
+        f = self._file(variant, url)
+        entry = self._load(f)
+        now = time.time()
+
+        if entry and now - entry.get("fetchedAt", 0) < self.ttl_s:
+            try:
+                os.utime(f)
+            except OSError:
+                pass
+            self._count("hit")
+            return entry["text"]
+
+        hdrs = {"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml"}
+        hdrs.update(headers or {})
+        if entry and entry.get("etag"):
+            hdrs["If-None-Match"] = entry["etag"]
+        if entry and entry.get("lastModified"):
+            hdrs["If-Modified-Since"] = entry["lastModified"]
+
+        req = urllib.request.Request(url, headers=hdrs)
+        try:
+            with urllib.request.urlopen(req, timeout=timeout_s) as r:
+                etag = r.headers.get("ETag")
+                last_mod = r.headers.get("Last-Modified")
+                if stream is not None:
+                    text, complete = stream(r, max_read)
+                else:
+                    text, complete = transform(r.read(max_read)), True
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and entry:
+                entry["fetchedAt"] = now
+                self._store(f, entry)
+                self._count("revalidated")
+                return entry["text"]
+            raise
+
+        if not complete:
+            self._count("partial")
+            return text
+        self._store(
+            f,
+            {
+                "url": url,
+                "fetchedAt": now,
+                "etag": etag,
+                "lastModified": last_mod,
+                "text": text,
+            },
+        )
+        self._count("fetched")
+        return text
@@ -17,6 +17,8 @@ import re
 from datetime import date
 from pathlib import Path
 
+from lake_dataset import LakeDataset
+
 STOP = {"am","an","bei","zum","zur","und","the","der","die","das","im","in","of","a","la","le"}
 
 
@@ -35,48 +37,28 @@ def mk_id(c: dict) -> str:
     return f"{base}-{slug(c.get('name'))}"
 
 
-def load_json(path: Path):
-    try:
-        return json.loads(path.read_text(encoding="utf-8"))
-    except Exception:
-        return []
-
-
-def save_json(path: Path, data):
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
-
-
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--lake", default="bodensee")
-    ap.add_argument("--candidates", required=True)
-    args = ap.parse_args()
-
-    lake_id = (args.lake or "bodensee").strip()
-    cand_path = Path(args.candidates)
-    today = date.today().isoformat()
-
-    js = json.loads(cand_path.read_text(encoding="utf-8"))
-    candidates = js.get("candidates", [])
+# candidate kind -> dataset type
+KIND_TYPES = {
+    "marina": "harbor",
+    "gastro": "gastro",
+    "rental": "rental",
+}
 
-    base = Path("data") / "lakes" / lake_id
-    base.mkdir(parents=True, exist_ok=True)
 
-    targets = {
-        "marina": base / "harbors.json",
-        "gastro": base / "gastros.json",
-        "rental": base / "rentals.json",
-    }
+def import_candidates(ds: LakeDataset, candidates: list, today: str | None = None) -> dict:
+    today = today or date.today().isoformat()
 
-    existing = {k: load_json(p) for k, p in targets.items()}
-    index = {k: {it.get("id"): it for it in existing[k] if it.get("id")} for k in existing}
+    # bootstrap: new lakes get their candidate files even if nothing matches yet
+    for typ in KIND_TYPES.values():
+        if not ds.exists(typ):
+            ds.mark_dirty(typ)
 
     added = 0
     updated = 0
 
     for c in candidates:
-        kind = c.get("kind")
-        if kind not in targets:
+        typ = KIND_TYPES.get(c.get("kind"))
+        if not typ:
             continue
         lat = c.get("lat")
         lng = c.get("lng")
@@ -85,20 +67,21 @@ def main():
             continue
 
         pid = mk_id(c)
-        it = index[kind].get(pid)
+        it = ds.get(typ, pid)
         if not it:
-            it = {
-                "id": pid,
-                "name": name,
-                "lat": lat,
-                "lng": lng,
-                "candidateSource": "osm",
-                "candidateFoundAt": c.get("foundAt") or today,
-                "candidateOsmType": c.get("osmType"),
-                "candidateOsmId": c.get("osmId"),
-            }
-            existing[kind].append(it)
-            index[kind][pid] = it
+            it = ds.add(
+                typ,
+                {
+                    "id": pid,
+                    "name": name,
+                    "lat": lat,
+                    "lng": lng,
+                    "candidateSource": "osm",
+                    "candidateFoundAt": c.get("foundAt") or today,
+                    "candidateOsmType": c.get("osmType"),
+                    "candidateOsmId": c.get("osmId"),
+                },
+            )
             added += 1
         else:
             updated += 1
@@ -114,10 +97,26 @@ def main():
         if tags.get("opening_hours") and not (it.get("candidateHours") or "").strip():
             it["candidateHours"] = tags.get("opening_hours")
 
-    for kind, path in targets.items():
-        save_json(path, existing[kind])
+    return {"added": added, "touched": added + updated}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--lake", default="bodensee")
+    ap.add_argument("--candidates", required=True)
+    args = ap.parse_args()
+
+    lake_id = (args.lake or "bodensee").strip()
+    cand_path = Path(args.candidates)
+
+    js = json.loads(cand_path.read_text(encoding="utf-8"))
+    candidates = js.get("candidates", [])
+
+    ds = LakeDataset.load(lake_id)
+    summary = import_candidates(ds, candidates)
+    ds.save()
 
-    print(json.dumps({"added": added, "touched": added + updated}, ensure_ascii=False))
+    print(json.dumps(summary, ensure_ascii=False))
 
 
 if __name__ == "__main__":
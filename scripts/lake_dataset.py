@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""Shared in-memory dataset for data/lakes/<lake>/*.json.
+
+Loads the POI files of one lake once, wraps every entry in a small __slots__ record
+and indexes them by (type, id), by type and by verification state. Writes go through
+Record item assignment (or LakeDataset.add/remove), which marks the owning file dirty;
+save() then rewrites only the dirty files, atomically (tmp file + os.replace), in the
+same pretty-printed format the scripts always used.
+
+The per-lake scripts expose their work as functions taking a LakeDataset, so one
+process can run the whole pipeline without reparsing:
+
+  ds = LakeDataset.load("bodensee")
+  import_candidates(ds, cands); apply_candidates(ds, cands); sanitize(ds); dedup(ds)
+  ds.save()
+
+Note: in-place mutation of nested values (e.g. features.append) is not tracked; call
+ds.mark_dirty(typ) in that case.
+
+The site reads a lake through its map bundle, search index and map tiles
+(data/bundles/, data/search/, data/tiles/), not these files. save() therefore rebuilds
+all three for the lake whenever it wrote something (rebuild_site_data); scripts that
+write the JSON any other way must call rebuild_site_data themselves, and after a hand
+edit run
+
+  python3 scripts/build_map_bundle.py <lake> && python3 scripts/build_search_index.py <lake> \
+    && python3 scripts/build_tiles.py <lake>
+
+or CI's --check steps fail.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA_DIR = Path(os.environ.get("BS_DATA_DIR") or ROOT / "data" / "lakes")
+
+TYPE_FILES = {
+    "harbor": "harbors.json",
+    "anchor": "anchors.json",
+    "rental": "rentals.json",
+    "gastro": "gastros.json",
+    "service": "services.json",
+}
+
+VERIFY_FIELDS = ("source", "lastVerified")
+
+_MISSING = object()
+
+
+def norm(s: Any) -> str:
+    return (s or "").strip() if isinstance(s, str) or s is None else str(s).strip()
+
+
+def is_verified(it: Any) -> bool:
+    return bool(norm(it.get("source")) and norm(it.get("lastVerified")))
+
+
+def dump_json(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, indent=2) + "\n"
+
+
+def write_json_atomic(path: Path, data: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(dump_json(data), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def rebuild_site_data(lake_ids: Iterable[str]) -> dict[str, Any]:
+    """Rebuild the map bundle, search index and map tiles of these lakes (what js/app.js loads)."""
+    lakes = sorted(set(lake_ids))
+    if not lakes:
+        return {}
+    # imported here: the builders import this module
+    from build_map_bundle import build as build_bundles
+    from build_search_index import build as build_search
+    from build_tiles import build as build_tiles
+
+    return {"bundles": build_bundles(lakes), "search": build_search(lakes), "tiles": build_tiles(lakes)}
+
+
+def load_lakes() -> list[dict]:
+    try:
+        # data/lakes.json sits next to data/lakes/, so BS_DATA_DIR also moves the lake list
+        return json.loads((DATA_DIR.parent / "lakes.json").read_text(encoding="utf-8"))
+    except Exception:
+        return [{"id": "bodensee", "name": "Bodensee"}]
+
+
+class Record:
+    """One POI entry. Dict-like access to the raw JSON object with change tracking."""
+
+    __slots__ = ("type", "data", "_ds")
+
+    def __init__(self, typ: str, data: dict, ds: "LakeDataset | None" = None) -> None:
+        self.type = typ
+        self.data = data
+        self._ds = ds
+
+    def __repr__(self) -> str:
+        return f"Record({self.type}:{self.id})"
+
+    # dict-like access -------------------------------------------------------
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.data.get(key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        return self.data[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.data
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        cur = self.data.get(key, _MISSING)
+        if cur is not _MISSING and type(cur) is type(value) and cur == value:
+            return
+        self.data[key] = value
+        if self._ds is not None:
+            self._ds._changed(self, key)
+
+    # typed accessors ----------------------------------------------------------
+
+    @property
+    def id(self) -> str:
+        return norm(self.data.get("id"))
+
+    @property
+    def name(self) -> str:
+        return norm(self.data.get("name"))
+
+    @property
+    def lat(self) -> float | None:
+        return self.data.get("lat")
+
+    @property
+    def lng(self) -> float | None:
+        return self.data.get("lng")
+
+    @property
+    def verified(self) -> bool:
+        return is_verified(self.data)
+
+
+class LakeDataset:
+    def __init__(self, lake_id: str, base: Path | None = None) -> None:
+        self.lake_id = lake_id
+        self.dir = Path(base or DATA_DIR) / lake_id
+        self.files: dict[str, list[Record]] = {t: [] for t in TYPE_FILES}
+        self.present: set[str] = set()
+        self.dirty: set[str] = set()
+        self.by_id: dict[tuple[str, str], Record] = {}
+        self._unverified: set[Record] = set()
+
+    @classmethod
+    def load(cls, lake_id: str, base: Path | None = None) -> "LakeDataset":
+        ds = cls(lake_id, base)
+        for typ, fname in TYPE_FILES.items():
+            p = ds.dir / fname
+            if not p.exists():
+                continue
+            ds.present.add(typ)
+            data = json.loads(p.read_text(encoding="utf-8"))
+            for raw in data if isinstance(data, list) else []:
+                ds._index(Record(typ, raw, ds))
+        return ds
+
+    # indexing -------------------------------------------------------------------
+
+    def _index(self, rec: Record) -> None:
+        self.files[rec.type].append(rec)
+        if rec.id:
+            self.by_id.setdefault((rec.type, rec.id), rec)
+        if not rec.verified:
+            self._unverified.add(rec)
+
+    def _changed(self, rec: Record, key: str) -> None:
+        self.dirty.add(rec.type)
+        if key in VERIFY_FIELDS:
+            if rec.verified:
+                self._unverified.discard(rec)
+            else:
+                self._unverified.add(rec)
+        elif key == "id":
+            self.by_id = {k: r for k, r in self.by_id.items() if r is not rec}
+            if rec.id:
+                self.by_id.setdefault((rec.type, rec.id), rec)
+
+    def path(self, typ: str) -> Path:
+        return self.dir / TYPE_FILES[typ]
+
+    def exists(self, typ: str) -> bool:
+        return typ in self.present
+
+    def records(self, typ: str) -> list[Record]:
+        return self.files[typ]
+
+    def __iter__(self) -> Iterator[Record]:
+        for typ in TYPE_FILES:
+            yield from self.files[typ]
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self.files.values())
+
+    def get(self, typ: str, item_id: str) -> Record | None:
+        return self.by_id.get((typ, item_id))
+
+    def unverified(self, typ: str | None = None) -> list[Record]:
+        """Unverified records in file order (all types in TYPE_FILES order if typ is None)."""
+        types = [typ] if typ else list(TYPE_FILES)
+        return [r for t in types for r in self.files[t] if r in self._unverified]
+
+    def verified(self, typ: str | None = None) -> list[Record]:
+        types = [typ] if typ else list(TYPE_FILES)
+        return [r for t in types for r in self.files[t] if r not in self._unverified]
+
+    # mutation -------------------------------------------------------------------
+
+    def mark_dirty(self, typ: str) -> None:
+        self.dirty.add(typ)
+
+    def add(self, typ: str, data: dict) -> Record:
+        rec = Record(typ, data, self)
+        self._index(rec)
+        self.dirty.add(typ)
+        return rec
+
+    def remove(self, typ: str, records: Iterable[Record]) -> int:
+        drop = {id(r) for r in records}
+        if not drop:
+            return 0
+        keep = [r for r in self.files[typ] if id(r) not in drop]
+        removed = len(self.files[typ]) - len(keep)
+        for r in self.files[typ]:
+            if id(r) in drop:
+                self._unverified.discard(r)
+                if self.by_id.get((typ, r.id)) is r:
+                    del self.by_id[(typ, r.id)]
+                r._ds = None
+        self.files[typ] = keep
+        if removed:
+            self.dirty.add(typ)
+        return removed
+
+    # persistence ------------------------------------------------------------------
+
+    def save(self, rebuild: bool = True) -> list[Path]:
+        """Write dirty files atomically; returns the paths written.
+
+        With rebuild (the default) the lake's bundle, search index and tiles are rebuilt
+        when anything was written; run_pipeline passes False and rebuilds all lakes
+        once at the end.
+        """
+        written = []
+        for typ in TYPE_FILES:
+            if typ not in self.dirty:
+                continue
+            p = self.path(typ)
+            write_json_atomic(p, [r.data for r in self.files[typ]])
+            self.present.add(typ)
+            written.append(p)
+        self.dirty.clear()
+        # the builders read DATA_DIR; a dataset loaded from another base has no site data
+        if written and rebuild and self.dir.parent == DATA_DIR:
+            rebuild_site_data([self.lake_id])
+        return written
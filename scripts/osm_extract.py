@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""Stream a local OSM extract (.osm / .osm.gz / .osm.bz2 XML or .osm.pbf) and apply the
+candidate rules of scripts/find_candidates_osm.py without Overpass.
+
+Rules (same as the Overpass queries, per lake bbox from data/lakes.json):
+- marina:  leisure=marina with website or contact:website, intersecting the bbox
+- rental:  amenity=boat_rental with website or contact:website, intersecting the bbox
+- gastro:  amenity=restaurant with website/contact:website/contact:phone/phone/
+           opening_hours, within 150 m of a harbour (leisure=marina,
+           seamark:type=harbour or any harbour=*) that intersects the bbox
+
+One streaming pass. Only nodes inside the lake bboxes (plus a 150 m margin) are kept in
+memory to resolve way geometry (XML; PBF uses pyosmium's own location index), and the
+harbour/restaurant join runs once at the end through a fixed-cell grid
+(dedup_lake.GridIndex), so the pass stays linear in the size of the extract.
+
+Geometry follows Overpass `out center`: nodes keep their coordinates, ways/relations get
+the centre of their bounding box. "Intersecting" is approximated as "any node inside".
+
+PBF needs the optional pyosmium package (pip install osmium); XML only uses the stdlib.
+"""
+
+from __future__ import annotations
+
+import bz2
+import gzip
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Iterator
+
+from dedup_lake import GridIndex, haversine_m
+
+HARBOUR_RADIUS_M = 150
+# bbox margin (deg) so restaurants just outside a lake bbox can still join a harbour
+MARGIN_DEG = 0.003
+
+WEB_KEYS = ("website", "contact:website")
+QUALITY_KEYS = ("website", "contact:website", "contact:phone", "phone", "opening_hours")
+TYPE_ORDER = {"node": 0, "way": 1, "relation": 2}
+PBF_MEMBER_TYPES = {"n": "node", "w": "way", "r": "relation"}
+
+
+def has_any(tags: dict, keys) -> bool:
+    return any(tags.get(k) for k in keys)
+
+
+def is_harbour(tags: dict) -> bool:
+    return tags.get("leisure") == "marina" or tags.get("seamark:type") == "harbour" or "harbour" in tags
+
+
+def in_box(lat: float, lon: float, bbox, margin: float = 0.0) -> bool:
+    s, w, n, e = bbox
+    return s - margin <= lat <= n + margin and w - margin <= lon <= e + margin
+
+
+def center(points: list[tuple[float, float]]) -> tuple[float, float]:
+    lats = [p[0] for p in points]
+    lons = [p[1] for p in points]
+    return ((min(lats) + max(lats)) / 2, (min(lons) + max(lons)) / 2)
+
+
+# -- readers: yield ("node", id, tags, lat, lon) / ("way", id, tags, points)
+#    / ("relation", id, tags, members[(type, ref)]) -------------------------------
+
+
+def _open_xml(path: Path):
+    name = path.name.lower()
+    if name.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if name.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    return open(path, "rb")
+
+
+def iter_xml(path: Path, keep_node) -> Iterator[tuple]:
+    """Stream OSM XML; keep_node(lat, lon) decides which node coords are remembered."""
+    coords: dict[int, tuple[float, float]] = {}
+    with _open_xml(path) as fh:
+        ctx = ET.iterparse(fh, events=("start", "end"))
+        _, root = next(ctx)
+        for event, el in ctx:
+            if event != "end" or el.tag not in ("node", "way", "relation"):
+                continue
+            oid = int(el.get("id"))
+            tags = {t.get("k"): t.get("v") for t in el.iter("tag")}
+            if el.tag == "node":
+                lat, lon = float(el.get("lat")), float(el.get("lon"))
+                if keep_node(lat, lon):
+                    coords[oid] = (lat, lon)
+                yield ("node", oid, tags, lat, lon)
+            elif el.tag == "way":
+                pts = [coords[r] for r in (int(nd.get("ref")) for nd in el.iter("nd")) if r in coords]
+                yield ("way", oid, tags, pts)
+            else:
+                members = [(m.get("type"), int(m.get("ref"))) for m in el.iter("member")]
+                yield ("relation", oid, tags, members)
+            el.clear()
+            root.clear()
+
+
+def iter_pbf(path: Path, keep_node) -> Iterator[tuple]:
+    try:
+        import osmium  # optional dependency (pyosmium >= 3.7)
+    except ImportError:
+        raise SystemExit("Reading .osm.pbf needs pyosmium: pip install osmium (or convert the extract to .osm XML)")
+
+    for o in osmium.FileProcessor(str(path)).with_locations():
+        tags = {t.k: t.v for t in o.tags}
+        if o.is_node():
+            if o.location.valid():
+                yield ("node", o.id, tags, o.location.lat, o.location.lon)
+        elif o.is_way():
+            pts = [(n.location.lat, n.location.lon) for n in o.nodes if n.location.valid()]
+            yield ("way", o.id, tags, [p for p in pts if keep_node(*p)])
+        elif o.is_relation():
+            yield ("relation", o.id, tags, [(PBF_MEMBER_TYPES.get(m.type, m.type), m.ref) for m in o.members])
+
+
+def iter_extract(path: Path, keep_node) -> Iterator[tuple]:
+    if path.name.lower().endswith(".pbf"):
+        return iter_pbf(path, keep_node)
+    return iter_xml(path, keep_node)
+
+
+# -- scan -----------------------------------------------------------------------
+
+
+class ExtractScan:
+    """Collect Overpass-like elements per lake and kind from one streaming pass."""
+
+    def __init__(self, bboxes: dict[str, tuple]) -> None:
+        self.bboxes = bboxes
+        self.elements: dict[str, dict[str, dict]] = {lake: {"marina": {}, "gastro": {}, "rental": {}} for lake in bboxes}
+        # (lake set, points) per harbour and (element, points) per restaurant, joined in finish()
+        self.harbours: list[tuple[list[str], list[tuple[float, float]]]] = []
+        self.restaurants: list[tuple[dict, list[tuple[float, float]]]] = []
+        # geometry of ways/nodes inside the boxes, for relation members
+        self.way_points: dict[int, tuple[float, float]] = {}
+        self.node_points: dict[int, tuple[float, float]] = {}
+
+    def keep_node(self, lat: float, lon: float) -> bool:
+        return any(in_box(lat, lon, b, MARGIN_DEG) for b in self.bboxes.values())
+
+    def lakes_for(self, points: list[tuple[float, float]]) -> list[str]:
+        return [lake for lake, b in self.bboxes.items() if any(in_box(lat, lon, b) for lat, lon in points)]
+
+    def feed(self, otype: str, oid: int, tags: dict, points: list[tuple[float, float]]) -> None:
+        if not points or not tags:
+            return
+        lakes = self.lakes_for(points)
+        el = {"type": otype, "id": oid, "tags": tags}
+        if otype == "node":
+            el["lat"], el["lon"] = points[0]
+        else:
+            c = center(points)
+            el["center"] = {"lat": c[0], "lon": c[1]}
+
+        if tags.get("leisure") == "marina" and has_any(tags, WEB_KEYS):
+            for lake in lakes:
+                self.elements[lake]["marina"][(otype, oid)] = el
+        if tags.get("amenity") == "boat_rental" and has_any(tags, WEB_KEYS):
+            for lake in lakes:
+                self.elements[lake]["rental"][(otype, oid)] = el
+        if is_harbour(tags) and lakes:
+            self.harbours.append((lakes, points))
+        if tags.get("amenity") == "restaurant" and has_any(tags, QUALITY_KEYS):
+            self.restaurants.append((el, points))
+
+    def scan(self, path: Path) -> "ExtractScan":
+        for obj in iter_extract(path, self.keep_node):
+            otype, oid, tags = obj[0], obj[1], obj[2]
+            if otype == "node":
+                lat, lon = obj[3], obj[4]
+                if not self.keep_node(lat, lon):
+                    continue
+                if tags:
+                    self.node_points[oid] = (lat, lon)
+                self.feed("node", oid, tags, [(lat, lon)])
+            elif otype == "way":
+                pts = obj[3]
+                if pts:
+                    self.way_points[oid] = center(pts)
+                self.feed("way", oid, tags, pts)
+            else:
+                pts = []
+                for mtype, ref in obj[3]:
+                    p = self.way_points.get(ref) if mtype == "way" else self.node_points.get(ref) if mtype == "node" else None
+                    if p:
+                        pts.append(p)
+                self.feed("relation", oid, tags, pts)
+        self.finish()
+        return self
+
+    def finish(self) -> None:
+        """Restaurant-around-harbour join through a grid sized to the 150 m radius."""
+        pts: list[tuple[float, float]] = []
+        owners: list[list[str]] = []
+        for lakes, hp in self.harbours:
+            for p in hp:
+                pts.append(p)
+                owners.append(lakes)
+        if not pts:
+            return
+        grid = GridIndex(pts, HARBOUR_RADIUS_M)
+        for el, rp in self.restaurants:
+            matched: set[str] = set()
+            for lat, lon in rp:
+                for g in grid.near(lat, lon):
+                    if haversine_m(lat, lon, pts[g][0], pts[g][1]) <= HARBOUR_RADIUS_M:
+                        matched.update(owners[g])
+            for lake in matched:
+                self.elements[lake]["gastro"][(el["type"], el["id"])] = el
+
+    def result(self, lake: str) -> dict[str, list[dict]]:
+        """{kind: [elements]} in Overpass output order (type, then id)."""
+        return {
+            kind: [els[k] for k in sorted(els, key=lambda k: (TYPE_ORDER.get(k[0], 9), k[1]))]
+            for kind, els in self.elements[lake].items()
+        }
+
+
+def scan_extract(path: Path | str, bboxes: dict[str, tuple]) -> ExtractScan:
+    return ExtractScan(bboxes).scan(Path(path))
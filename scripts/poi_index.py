@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Persistent (type, id) -> location index over all POI data files.
+
+Maps "type:id" to every place the record lives: lake (None for the global data/*.json
+files), file, position in the file and a short hash of the record. Python tools resolve
+an id with one dict lookup and can tell whether a reference is stale by comparing the
+file's mtime/size (one stat, no parse) or a record hash against the index.
+
+Rebuilds are incremental: a file whose mtime and size are unchanged is not opened; a
+file whose content hash is unchanged keeps its entries.
+
+Two outputs:
+- .cache/poi_index.json (override: BS_POI_INDEX): the full index for the tools
+- data/poi-index.json: compact static asset for the site, {"lakes": [...],
+  "ids": {"type:id": lake position}}, so ?open=type:id links resolve the lake
+  without loading every lake's data
+
+Usage:
+  python3 scripts/poi_index.py            # incremental rebuild, prints a summary
+  python3 scripts/poi_index.py --full     # ignore the previous index
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Iterator, NamedTuple
+
+from lake_dataset import DATA_DIR, TYPE_FILES, norm
+
+ROOT = Path(__file__).resolve().parents[1]
+INDEX_PATH = Path(os.environ.get("BS_POI_INDEX") or ROOT / ".cache" / "poi_index.json")
+ASSET_PATH = ROOT / "data" / "poi-index.json"
+VERSION = 1
+
+
+class Location(NamedTuple):
+    lake: str | None
+    file: str
+    idx: int
+    hash: str
+
+
+def record_hash(it: Any) -> str:
+    raw = json.dumps(it, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def rel(p: Path) -> str:
+    try:
+        return str(p.relative_to(ROOT))
+    except ValueError:
+        return str(p)
+
+
+def data_files() -> Iterator[tuple[str | None, str, Path]]:
+    """(lake | None, type, path) for the global data files and every per-lake file."""
+    for typ, fname in TYPE_FILES.items():
+        yield None, typ, ROOT / "data" / fname
+    if DATA_DIR.exists():
+        for lake in sorted(p for p in DATA_DIR.iterdir() if p.is_dir()):
+            for typ, fname in TYPE_FILES.items():
+                p = lake / fname
+                if p.exists():
+                    yield lake.name, typ, p
+
+
+class PoiIndex:
+    def __init__(self, files: dict[str, dict] | None = None) -> None:
+        # rel path -> {"lake", "type", "mtime", "size", "sha", "items": [[id, hash], ...]}
+        self.files: dict[str, dict] = files or {}
+        self.by_key: dict[str, list[Location]] = {}
+        self._reindex()
+
+    def _reindex(self) -> None:
+        self.by_key = {}
+        for path, f in self.files.items():
+            for i, (item_id, h) in enumerate(f["items"]):
+                if item_id:
+                    self.by_key.setdefault(f"{f['type']}:{item_id}", []).append(Location(f["lake"], path, i, h))
+
+    # -- persistence -----------------------------------------------------
+
+    @classmethod
+    def load(cls, path: Path | None = None) -> "PoiIndex":
+        try:
+            data = json.loads((path or INDEX_PATH).read_text(encoding="utf-8"))
+            if data.get("version") == VERSION:
+                return cls(data["files"])
+        except Exception:
+            pass
+        return cls()
+
+    def save(self, path: Path | None = None) -> None:
+        p = path or INDEX_PATH
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(f".{p.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"version": VERSION, "files": self.files}, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, p)
+
+    def asset(self) -> dict:
+        """Compact site index: per-lake records only (the site never loads the global files)."""
+        lakes = sorted({f["lake"] for f in self.files.values() if f["lake"]})
+        pos = {lake: i for i, lake in enumerate(lakes)}
+        ids: dict[str, Any] = {}
+        for key in sorted(self.by_key):
+            where = sorted({pos[loc.lake] for loc in self.by_key[key] if loc.lake})
+            if where:
+                ids[key] = where[0] if len(where) == 1 else where
+        return {"lakes": lakes, "ids": ids}
+
+    def write_asset(self, path: Path | None = None) -> bool:
+        """Write the static asset if its content changed; returns True if written."""
+        p = path or ASSET_PATH
+        txt = json.dumps(self.asset(), ensure_ascii=False, separators=(",", ":")) + "\n"
+        if p.exists() and p.read_text(encoding="utf-8") == txt:
+            return False
+        tmp = p.with_name(f".{p.name}.{os.getpid()}.tmp")
+        tmp.write_text(txt, encoding="utf-8")
+        os.replace(tmp, p)
+        return True
+
+    # -- building --------------------------------------------------------
+
+    def refresh(self, full: bool = False) -> dict:
+        """Re-index changed files; returns {"files", "stat", "hashed", "parsed", "dropped"}."""
+        stats = {"files": 0, "stat": 0, "hashed": 0, "parsed": 0, "dropped": 0}
+        seen = set()
+        for lake, typ, p in data_files():
+            if not p.exists():
+                continue
+            key = rel(p)
+            seen.add(key)
+            stats["files"] += 1
+            st = p.stat()
+            old = None if full else self.files.get(key)
+            if old and old["mtime"] == st.st_mtime_ns and old["size"] == st.st_size:
+                stats["stat"] += 1
+                continue
+            raw = p.read_bytes()
+            sha = hashlib.sha256(raw).hexdigest()
+            if old and old["sha"] == sha:
+                old.update({"mtime": st.st_mtime_ns, "size": st.st_size})
+                stats["hashed"] += 1
+                continue
+            data = json.loads(raw.decode("utf-8"))
+            items = [[norm(it.get("id")), record_hash(it)] for it in data] if isinstance(data, list) else []
+            self.files[key] = {"lake": lake, "type": typ, "mtime": st.st_mtime_ns, "size": st.st_size, "sha": sha, "items": items}
+            stats["parsed"] += 1
+        for key in [k for k in self.files if k not in seen]:
+            del self.files[key]
+            stats["dropped"] += 1
+        self._reindex()
+        return stats
+
+    # -- lookups ---------------------------------------------------------
+
+    def lookup(self, typ: str, item_id: str) -> list[Location]:
+        return self.by_key.get(f"{typ}:{item_id}", [])
+
+    def is_fresh(self, loc: Location) -> bool:
+        """True if loc's file is unchanged since indexing (stat only, the file is not read)."""
+        f = self.files.get(loc.file)
+        try:
+            st = (ROOT / loc.file).stat()
+        except OSError:
+            return False
+        return bool(f) and f["mtime"] == st.st_mtime_ns and f["size"] == st.st_size
+
+    def matches(self, loc: Location, it: Any) -> bool:
+        """True if `it` is still the record the index saw at loc."""
+        return record_hash(it) == loc.hash
+
+
+def refresh_index(full: bool = False, asset: bool = True) -> tuple[PoiIndex, dict]:
+    """Load, incrementally rebuild and persist the index (and the site asset)."""
+    index = PoiIndex.load()
+    stats = index.refresh(full)
+    index.save()
+    if asset:
+        stats["assetWritten"] = index.write_asset()
+    return index, stats
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--full", action="store_true", help="Rebuild from scratch")
+    ap.add_argument("--no-asset", action="store_true", help=f"Do not write {rel(ASSET_PATH)}")
+    args = ap.parse_args()
+
+    index, stats = refresh_index(args.full, not args.no_asset)
+    print(json.dumps({**stats, "keys": len(index.by_key), "index": rel(INDEX_PATH)}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -9,31 +9,37 @@ Heuristics (simple + transparent):
 - Prefer entries that already have a candidateUrl (faster to verify).
 - Prefer certain types: harbor > rental > gastro > service > anchor.
 
+The score is a tuple of named parts (SCORE_PARTS), compared left to right. --score
+picks and orders them; besides the defaults there are "kind" (web candidate URLs
+before social ones) and "fresh" (most recent candidateFoundAt first).
+
+Ranking keeps only the top N in a bounded heap (heapq.nlargest), O(n log N), with the
+same result and tie order as a full stable sort.
+
 Outputs a markdown file with link-to-open (map modal) and issue template link.
+--all-lakes streams every lake once and writes review/<lake>_top<N>.txt for each lake
+plus review/all_top<N>.txt across lakes.
 """
 
 from __future__ import annotations
 
 import argparse
-import json
+import heapq
+import itertools
 import urllib.parse
+from datetime import date
 from pathlib import Path
+from typing import Callable, Iterable, Iterator
 
-SITE_BASE = "https://phailipp.github.io/bodensee-segler-site"
+from lake_dataset import LakeDataset, Record, load_lakes
 
-TYPE_FILES = [
-    ("harbor", "harbors.json"),
-    ("rental", "rentals.json"),
-    ("gastro", "gastros.json"),
-    ("service", "services.json"),
-    ("anchor", "anchors.json"),
-]
+ROOT = Path(__file__).resolve().parents[1]
 
-TYPE_WEIGHT = {"harbor": 5, "rental": 4, "gastro": 3, "service": 2, "anchor": 1}
+SITE_BASE = "https://phailipp.github.io/bodensee-segler-site"
 
+TYPE_ORDER = ["harbor", "rental", "gastro", "service", "anchor"]
 
-def is_verified(it: dict) -> bool:
-    return bool((it.get("source") or "").strip() and (it.get("lastVerified") or "").strip())
+TYPE_WEIGHT = {"harbor": 5, "rental": 4, "gastro": 3, "service": 2, "anchor": 1}
 
 
 def issue_url(typ: str, it: dict) -> str:
@@ -60,47 +66,84 @@ def open_url(lake: str, typ: str, pid: str) -> str:
     return f"{SITE_BASE}/?lake={urllib.parse.quote(lake)}&open={urllib.parse.quote(typ)}:{urllib.parse.quote(pid)}#karte"
 
 
-def score(typ: str, it: dict) -> tuple:
-    # Higher first
-    cand = 1 if (it.get("candidateUrl") or "").strip() else 0
+def found_at(it) -> int:
+    try:
+        return date.fromisoformat((it.get("candidateFoundAt") or "").strip()[:10]).toordinal()
+    except ValueError:
+        return 0
+
+
+# Score parts, higher first. Add a part here and list it in --score to use it.
+SCORE_PARTS: dict[str, Callable[[str, dict], int]] = {
+    "type": lambda typ, it: TYPE_WEIGHT.get(typ, 0),
+    "candidate": lambda typ, it: 1 if (it.get("candidateUrl") or "").strip() else 0,
     # candidates imported from OSM are usually the ones to verify first
-    osm = 1 if (it.get("candidateSource") == "osm") else 0
-    return (
-        TYPE_WEIGHT.get(typ, 0),
-        cand,
-        osm,
-        len((it.get("name") or "")),
-    )
+    "osm": lambda typ, it: 1 if (it.get("candidateSource") == "osm") else 0,
+    "name": lambda typ, it: len((it.get("name") or "")),
+    # an operator website is quicker to confirm than a social profile
+    "kind": lambda typ, it: {"web": 2, "social": 1}.get(it.get("candidateUrlKind") or "", 0),
+    "fresh": lambda typ, it: found_at(it),
+}
 
+DEFAULT_SCORE = ("type", "candidate", "osm", "name")
 
-def main() -> None:
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--lake", required=True)
-    ap.add_argument("--limit", type=int, default=30)
-    ap.add_argument("--out", required=True)
-    args = ap.parse_args()
 
-    lake = args.lake
-    base = Path("data") / "lakes" / lake
-
-    rows: list[tuple[str, dict]] = []
-    for typ, fname in TYPE_FILES:
-        p = base / fname
-        if not p.exists():
-            continue
-        data = json.loads(p.read_text(encoding="utf-8"))
-        for it in data:
-            if is_verified(it):
-                continue
-            if not it.get("id"):
-                continue
-            rows.append((typ, it))
-
-    rows.sort(key=lambda x: score(x[0], x[1]), reverse=True)
-    rows = rows[: args.limit]
+def score(typ: str, it: dict, parts: Iterable[str] = DEFAULT_SCORE) -> tuple:
+    # Higher first
+    return tuple(SCORE_PARTS[p](typ, it) for p in parts)
+
+
+def iter_rows(ds: LakeDataset) -> Iterator[tuple[str, Record]]:
+    for typ in TYPE_ORDER:
+        for it in ds.unverified(typ):
+            if it.get("id"):
+                yield typ, it
+
+
+def review_queue(ds: LakeDataset, limit: int = 30, parts: Iterable[str] = DEFAULT_SCORE) -> list[tuple[str, Record]]:
+    parts = tuple(parts)
+    return heapq.nlargest(limit, iter_rows(ds), key=lambda x: score(x[0], x[1], parts))
+
+
+class TopK:
+    """Bounded min-heap of the k best items; ties keep insertion order (like nlargest)."""
+
+    def __init__(self, k: int) -> None:
+        self.k = k
+        self.heap: list = []
+        self.seq = itertools.count()
 
+    def push(self, key: tuple, item) -> None:
+        entry = (key, -next(self.seq), item)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif entry[:2] > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, entry)
+
+    def items(self) -> list:
+        return [item for _, _, item in sorted(self.heap, key=lambda e: e[:2], reverse=True)]
+
+
+def review_queues_all(
+    lakes: list[str], limit: int = 30, parts: Iterable[str] = DEFAULT_SCORE
+) -> tuple[dict[str, list[tuple[str, Record]]], list[tuple[str, str, Record]]]:
+    """One pass over all lakes -> ({lake: top rows}, global top rows as (lake, type, record))."""
+    parts = tuple(parts)
+    per_lake: dict[str, list[tuple[str, Record]]] = {}
+    overall = TopK(limit)
+    for lake in lakes:
+        top = TopK(limit)
+        for typ, it in iter_rows(LakeDataset.load(lake)):
+            key = score(typ, it, parts)
+            top.push(key, (typ, it))
+            overall.push(key, (lake, typ, it))
+        per_lake[lake] = top.items()
+    return per_lake, overall.items()
+
+
+def render_queue(lake: str, rows: list[tuple[str, Record]], limit: int) -> str:
     out = []
-    out.append(f"Review queue: {lake} (top {args.limit})")
+    out.append(f"Review queue: {lake} (top {limit})")
     out.append("")
     out.append("Format: Name | Type | Candidate | Open | Issue")
     out.append("")
@@ -113,7 +156,54 @@ def main() -> None:
         issueu = issue_url(typ, it)
         out.append(f"{name} | {typ} | {cand_disp} | {openu} | {issueu}")
 
-    Path(args.out).write_text("\n".join(out) + "\n", encoding="utf-8")
+    return "\n".join(out) + "\n"
+
+
+def render_global(rows: list[tuple[str, str, Record]], limit: int) -> str:
+    out = []
+    out.append(f"Review queue: all lakes (top {limit})")
+    out.append("")
+    out.append("Format: Name | Lake | Type | Candidate | Open | Issue")
+    out.append("")
+
+    for lake, typ, it in rows:
+        name = (it.get("name") or it.get("id") or "").strip()
+        cand = (it.get("candidateUrl") or "").strip()
+        cand_disp = cand if cand else "(none)"
+        out.append(f"{name} | {lake} | {typ} | {cand_disp} | {open_url(lake, typ, it.get('id'))} | {issue_url(typ, it)}")
+
+    return "\n".join(out) + "\n"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--lake")
+    ap.add_argument("--all-lakes", action="store_true", help="Rank every lake in data/lakes.json in one pass")
+    ap.add_argument("--limit", type=int, default=30)
+    ap.add_argument("--out", help="Output file (single lake)")
+    ap.add_argument("--out-dir", default=str(ROOT / "review"), help="Output directory for --all-lakes")
+    ap.add_argument("--score", default=",".join(DEFAULT_SCORE), help=f"Score parts in order, from: {', '.join(SCORE_PARTS)}")
+    args = ap.parse_args()
+
+    parts = [p.strip() for p in args.score.split(",") if p.strip()]
+    unknown = [p for p in parts if p not in SCORE_PARTS]
+    if unknown:
+        raise SystemExit(f"Unknown score part(s): {', '.join(unknown)}")
+
+    if args.all_lakes:
+        out_dir = Path(args.out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        per_lake, overall = review_queues_all([l["id"] for l in load_lakes()], args.limit, parts)
+        for lake, rows in per_lake.items():
+            (out_dir / f"{lake}_top{args.limit}.txt").write_text(render_queue(lake, rows, args.limit), encoding="utf-8")
+        (out_dir / f"all_top{args.limit}.txt").write_text(render_global(overall, args.limit), encoding="utf-8")
+        return
+
+    if not args.lake or not args.out:
+        raise SystemExit("--lake and --out are required (or use --all-lakes)")
+    ds = LakeDataset.load(args.lake)
+    rows = review_queue(ds, args.limit, parts)
+    Path(args.out).write_text(render_queue(args.lake, rows, args.limit), encoding="utf-8")
 
 
 if __name__ == "__main__":
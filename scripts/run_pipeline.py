@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Nightly candidate pipeline, in-process (replaces the per-stage python3 calls).
+
+Per lake, over one loaded LakeDataset:
+  find (Overpass) -> import -> apply -> sanitize -> dedup -> save
+The lake is only saved when every mutating stage succeeded; otherwise the report
+lists the failed stages under "unsaved" (stdout: UNSAVED_<lake>=...) and nothing of
+that run is written, as when the stages were separate scripts.
+Candidates for all lakes are fetched up front with the batched Overpass queries
+(3 round-trips per run, see find_candidates_osm.find_candidates_batch); a lake whose
+batch failed falls back to its own queries. Lakes run in parallel in a process pool;
+every stage has a wall-clock timeout (SIGALRM inside the worker; the Overpass fetches
+also get the find timeout as a deadline, so retries stop in time). Afterwards the POI
+id index (scripts/poi_index.py), the per-lake map bundles
+(scripts/build_map_bundle.py), search indexes (scripts/build_search_index.py) and map
+tiles (scripts/build_tiles.py) are rebuilt and the detail pages/sitemap are
+regenerated.
+
+Strict: same rules as the individual scripts (never sets source/lastVerified).
+
+Outputs:
+- --report: one structured JSON report (per-lake, per-stage timings and counts)
+- stdout: ADDED_<lake>=N / CHANGED_<lake>=N lines and a final TOTAL=N, as the
+  cron log always showed
+
+Usage:
+  python3 scripts/run_pipeline.py [lake ...] --workers 4 --report /tmp/pipeline_report.json
+  python3 scripts/run_pipeline.py bodensee --candidates-dir /tmp   # reuse osm_candidates_<lake>.json
+  python3 scripts/run_pipeline.py --offline --skip-pages            # replay cached Overpass responses
+  python3 scripts/run_pipeline.py --extract switzerland.osm.pbf      # local OSM extract, one pass
+  python3 scripts/run_pipeline.py --per-lake-queries                 # old behaviour: 3 queries per lake
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+from apply_candidates import apply_candidates
+from build_map_bundle import build as build_bundles, lake_ids as bundle_lakes
+from build_search_index import build as build_search
+from build_tiles import build as build_tiles
+from dedup_lake import dedup
+from find_candidates_osm import DEFAULT_MAX_AGE_H, find_candidates, find_candidates_batch, find_candidates_extract
+from import_osm_candidates import import_candidates
+from lake_dataset import LakeDataset, load_lakes
+from poi_index import refresh_index
+from sanitize_urls import sanitize
+
+
+# stages that change ds in place; if one of them fails the lake is not saved, so a
+# half-applied stage (e.g. dedup timing out between merging and removing) never hits disk
+MUTATING_STAGES = ("import", "apply", "sanitize", "dedup")
+
+
+class StageTimeout(BaseException):
+    """Not an Exception, so the retry loops of a stage (fetch_overpass) cannot swallow it."""
+
+
+@contextmanager
+def time_limit(seconds: float):
+    """Raise StageTimeout after `seconds` (main thread of a worker process only)."""
+    if not seconds or seconds <= 0:
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise StageTimeout(f"stage exceeded {seconds:g}s")
+
+    prev = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, prev)
+
+
+def run_stage(
+    report: dict,
+    name: str,
+    timeout_s: float,
+    fn: Callable[[], Any],
+    summary: Callable[[Any], Any] = lambda r: r,
+) -> Any:
+    """Run one stage, record {name, seconds, result|error}; returns the result or None."""
+    t0 = time.perf_counter()
+    entry: dict[str, Any] = {"name": name}
+    result = None
+    try:
+        with time_limit(timeout_s):
+            result = fn()
+        entry["result"] = summary(result)
+    except (Exception, StageTimeout) as e:
+        entry["error"] = f"{type(e).__name__}: {e}"
+    entry["seconds"] = round(time.perf_counter() - t0, 3)
+    report["stages"].append(entry)
+    return result
+
+
+def deadline(seconds: float) -> float | None:
+    """time.monotonic() deadline for a stage limit (None: no limit)."""
+    return time.monotonic() + seconds if seconds and seconds > 0 else None
+
+
+def load_candidates(lake_id: str, opts: dict) -> dict:
+    if opts.get("prefetched") is not None:
+        return opts["prefetched"]
+    if opts["candidates_dir"]:
+        p = Path(opts["candidates_dir"]) / f"osm_candidates_{lake_id}.json"
+        return json.loads(p.read_text(encoding="utf-8"))
+    return find_candidates(lake_id, opts["max_age_h"], opts["offline"], deadline(opts["find_timeout"]))
+
+
+def run_lake(lake_id: str, opts: dict) -> dict:
+    """Worker entry point: the whole pipeline for one lake."""
+    t0 = time.perf_counter()
+    report: dict[str, Any] = {"lake": lake_id, "stages": [], "added": 0, "changed": 0}
+    timeout_s = opts["stage_timeout"]
+
+    ds = run_stage(report, "load", timeout_s, lambda: LakeDataset.load(lake_id), lambda d: {"records": len(d)})
+    if ds is None:
+        report["seconds"] = round(time.perf_counter() - t0, 3)
+        return report
+
+    found = run_stage(
+        report,
+        "find",
+        opts["find_timeout"],
+        lambda: load_candidates(lake_id, opts),
+        lambda f: {"candidates": len(f.get("candidates", [])), "errors": f.get("errors") or {}, "overpass": f.get("overpass") or {}},
+    )
+    if found is None:
+        # Overpass timeout / error: nothing to import for this lake
+        report["seconds"] = round(time.perf_counter() - t0, 3)
+        return report
+    cands = found.get("candidates", [])
+
+    imported = run_stage(report, "import", timeout_s, lambda: import_candidates(ds, cands))
+    report["added"] = (imported or {}).get("added", 0)
+    changed = run_stage(report, "apply", timeout_s, lambda: apply_candidates(ds, cands, opts["max_km"]), lambda n: {"changed": n})
+    report["changed"] = changed or 0
+    run_stage(report, "sanitize", timeout_s, lambda: sanitize(ds))
+    run_stage(report, "dedup", timeout_s, lambda: dedup(ds, opts["max_m"]))
+
+    failed = [st["name"] for st in report["stages"] if st["name"] in MUTATING_STAGES and "error" in st]
+    if failed:
+        report["stages"].append({"name": "save", "skipped": f"not saved, failed: {', '.join(failed)}", "seconds": 0.0})
+        report["unsaved"] = failed
+        report["added"] = report["changed"] = 0
+    else:
+        run_stage(report, "save", timeout_s, lambda: ds.save(rebuild=False), lambda written: {"files": [p.name for p in written]})
+
+    report["seconds"] = round(time.perf_counter() - t0, 3)
+    return report
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("lakes", nargs="*", help="Lake ids (default: all in data/lakes.json)")
+    ap.add_argument("--workers", type=int, default=4, help="Lakes processed in parallel")
+    ap.add_argument("--find-timeout", type=float, default=220, help="Seconds for the Overpass stage per lake")
+    ap.add_argument("--stage-timeout", type=float, default=120, help="Seconds for every other stage")
+    ap.add_argument("--candidates-dir", default=None, help="Read osm_candidates_<lake>.json from here instead of querying Overpass")
+    ap.add_argument("--max-age-h", type=float, default=DEFAULT_MAX_AGE_H, help="Reuse cached Overpass responses younger than this")
+    ap.add_argument("--offline", action="store_true", help="Replay cached Overpass responses only (no network)")
+    ap.add_argument("--extract", default=None, help="Stream this local .osm/.osm.pbf extract once instead of Overpass")
+    ap.add_argument("--per-lake-queries", action="store_true", help="Query Overpass per lake instead of batched for all lakes")
+    ap.add_argument("--max-m", type=int, default=60, help="dedup distance threshold")
+    ap.add_argument("--max-km", type=float, default=None, help="apply_candidates spatial pre-filter")
+    ap.add_argument("--skip-pages", action="store_true", help="Do not regenerate detail pages/sitemap")
+    ap.add_argument("--report", default=None, help="Write the JSON report to this file")
+    args = ap.parse_args()
+
+    lakes = args.lakes or [l["id"] for l in load_lakes()]
+    opts = {
+        "find_timeout": args.find_timeout,
+        "stage_timeout": args.stage_timeout,
+        "candidates_dir": args.candidates_dir,
+        "max_age_h": args.max_age_h,
+        "offline": args.offline,
+        "max_m": args.max_m,
+        "max_km": args.max_km,
+    }
+
+    t0 = time.perf_counter()
+    started = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    # one shared pass (extract or batched Overpass); workers only get their lake's candidates
+    prefetch: dict[str, Any] = {"stages": []}
+    prefetched: dict[str, dict] = {}
+    if args.extract:
+        prefetched = run_stage(
+            prefetch, "extract", 0, lambda: find_candidates_extract(lakes, args.extract), lambda r: {"path": args.extract}
+        ) or {}
+    elif not args.candidates_dir and not args.per_lake_queries:
+        batch = run_stage(
+            prefetch,
+            "overpass_batch",
+            args.find_timeout,
+            lambda: find_candidates_batch(lakes, args.max_age_h, args.offline, deadline(args.find_timeout)),
+            lambda r: {"overpass": next(iter(r.values()))["overpass"] if r else {}},
+        ) or {}
+        # lakes with a failed batch query redo their own (cached) queries in the worker
+        prefetched = {lake: res for lake, res in batch.items() if not res["errors"]}
+
+    with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(lakes)))) as pool:
+        futures = {lake: pool.submit(run_lake, lake, {**opts, "prefetched": prefetched.get(lake)}) for lake in lakes}
+        results = []
+        for lake, fut in futures.items():
+            try:
+                results.append(fut.result())
+            except Exception as e:
+                results.append({"lake": lake, "stages": [], "added": 0, "changed": 0, "error": f"{type(e).__name__}: {e}"})
+
+    report: dict[str, Any] = {"startedAt": started, "lakes": results}
+    if prefetch["stages"]:
+        report["prefetch"] = prefetch["stages"][0]
+
+    index = {"stages": []}
+    run_stage(index, "poi_index", args.stage_timeout, lambda: refresh_index()[1])
+    report["poiIndex"] = index["stages"][0]
+
+    bundles = {"stages": []}
+    run_stage(bundles, "map_bundles", args.stage_timeout, lambda: build_bundles(bundle_lakes()))
+    report["mapBundles"] = bundles["stages"][0]
+
+    search = {"stages": []}
+    run_stage(search, "search_index", args.stage_timeout, lambda: build_search(bundle_lakes()))
+    report["searchIndex"] = search["stages"][0]
+
+    tiles = {"stages": []}
+    run_stage(tiles, "map_tiles", args.stage_timeout, lambda: build_tiles(bundle_lakes()))
+    report["mapTiles"] = tiles["stages"][0]
+
+    if not args.skip_pages:
+        from gen_detail_pages import generate
+
+        pages = {"stages": []}
+        run_stage(pages, "detail_pages", args.stage_timeout, generate)
+        report["detailPages"] = pages["stages"][0]
+
+    report["total"] = sum(r["added"] + r["changed"] for r in results)
+    report["seconds"] = round(time.perf_counter() - t0, 3)
+
+    if args.report:
+        Path(args.report).write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+    for r in results:
+        print(f"LAKE={r['lake']}")
+        print(f"ADDED_{r['lake']}={r['added']}")
+        print(f"CHANGED_{r['lake']}={r['changed']}")
+        if r.get("unsaved"):
+            print(f"UNSAVED_{r['lake']}={','.join(r['unsaved'])}")
+    print(f"TOTAL={report['total']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@
 
 - Normalizes http->https when safe (just replacement; no fetch)
 - Strips whitespace
-- Classifies social/aggregator URLs (candidateUrlKind)
+- Classifies social/aggregator URLs (candidateUrlKind, by hostname via scripts/domains.py)
 
 Strict: does not invent sources or lastVerified.
 """
@@ -11,16 +11,9 @@ Strict: does not invent sources or lastVerified.
 import argparse
 import json
 import re
-from pathlib import Path
 
-SOCIAL = (
-    'facebook.com', 'instagram.com', 'fb.com', 'tiktok.com', 'x.com', 'twitter.com'
-)
-AGG = (
-    'tripadvisor.', 'google.', 'yelp.', 'booking.', 'opentable.', 'thefork.', 'ubereats.', 'just-eat.', 'lieferando.'
-)
-
-FILES = ['harbors.json','anchors.json','rentals.json','gastros.json','services.json']
+from domains import AGGREGATOR, SOCIAL, Verdict, classify_many
+from lake_dataset import LakeDataset
 
 
 def norm_url(u: str) -> str:
@@ -35,47 +28,51 @@ def norm_url(u: str) -> str:
     return u
 
 
-def classify(u: str) -> str:
-    lu = (u or '').lower()
-    if any(d in lu for d in SOCIAL):
-        return 'social'
-    if any(d in lu for d in AGG):
-        return 'aggregator'
-    if lu.startswith('https://') or lu.startswith('http://'):
+def url_kind(u: str, v: Verdict) -> str:
+    if v.kind in (SOCIAL, AGGREGATOR):
+        return v.kind
+    if (u or '').lower().startswith(('https://', 'http://')):
         return 'web'
     return 'other'
 
 
+def classify(u: str) -> str:
+    return url_kind(u, classify_many([u])[0])
+
+
+def sanitize(ds: LakeDataset) -> dict:
+    changed = 0
+    todo = []
+    for it in ds:
+        if 'candidateUrl' in it:
+            before = it.get('candidateUrl') or ''
+            after = norm_url(before)
+            if after != before:
+                it['candidateUrl'] = after
+                changed += 1
+            if after:
+                todo.append((it, after))
+        # also normalize item.url if present
+        if 'url' in it and it.get('url'):
+            it['url'] = norm_url(it.get('url'))
+    # one bulk classification for the whole lake
+    for (it, u), v in zip(todo, classify_many(u for _, u in todo)):
+        kind = url_kind(u, v)
+        if it.get('candidateUrlKind') != kind:
+            it['candidateUrlKind'] = kind
+    return {'lake': ds.lake_id, 'changed': changed}
+
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument('--lake', required=True)
     args = ap.parse_args()
 
-    base = Path('data')/'lakes'/args.lake
-    changed = 0
+    ds = LakeDataset.load(args.lake)
+    summary = sanitize(ds)
+    ds.save()
 
-    for fn in FILES:
-        p = base/fn
-        if not p.exists():
-            continue
-        data = json.loads(p.read_text(encoding='utf-8'))
-        for it in data:
-            if 'candidateUrl' in it:
-                before = it.get('candidateUrl') or ''
-                after = norm_url(before)
-                if after != before:
-                    it['candidateUrl'] = after
-                    changed += 1
-                if after:
-                    kind = classify(after)
-                    if it.get('candidateUrlKind') != kind:
-                        it['candidateUrlKind'] = kind
-            # also normalize item.url if present
-            if 'url' in it and it.get('url'):
-                it['url'] = norm_url(it.get('url'))
-        p.write_text(json.dumps(data, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
-
-    print(json.dumps({'lake': args.lake, 'changed': changed}, ensure_ascii=False))
+    print(json.dumps(summary, ensure_ascii=False))
 
 
 if __name__ == '__main__':
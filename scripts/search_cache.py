@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""SQLite store for web search results per query (auto-verify search cache).
+
+Replaces the monolithic memory/auto-verify-search-cache.json, which had to be parsed
+and rewritten in full for every query and could be clobbered by concurrent writers.
+
+- One row per query: results (JSON text), updated_at (written) and accessed_at (read).
+- WAL journal + busy timeout, so several agents can read/write at the same time.
+- upsert_many() stores any number of query results in one transaction.
+- get_many() is an indexed lookup of just the requested queries; entries older
+  than the TTL count as missing.
+- Size cap: after writes, expired rows are dropped and the least recently accessed
+  rows are evicted down to max_entries.
+- export_json() writes the old JSON shape ({"_meta": {...}, query: [results]}) for
+  tools that still read the file (e.g. auto_verify.py --search-json);
+  import_json() migrates an existing JSON cache (run automatically on first use).
+
+Path: /home/phil/clawd/memory/auto-verify-search-cache.sqlite (override: BS_SEARCH_CACHE).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable
+
+JSON_PATH = Path("/home/phil/clawd/memory/auto-verify-search-cache.json")
+DB_PATH = Path(os.environ.get("BS_SEARCH_CACHE") or JSON_PATH.with_suffix(".sqlite"))
+
+DEFAULT_TTL_S = 365 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 50_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_results (
+  query       TEXT PRIMARY KEY,
+  results     TEXT NOT NULL,
+  updated_at  REAL NOT NULL,
+  accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS search_results_accessed ON search_results(accessed_at);
+CREATE INDEX IF NOT EXISTS search_results_updated ON search_results(updated_at);
+"""
+
+
+def _parse_ts(s: str | None) -> float | None:
+    try:
+        return datetime.fromisoformat(s).timestamp() if s else None
+    except ValueError:
+        return None
+
+
+class SearchCache:
+    def __init__(
+        self,
+        path: Path | str | None = None,
+        ttl_s: float | None = DEFAULT_TTL_S,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        legacy_json: Path | None = JSON_PATH,
+    ) -> None:
+        self.path = Path(path) if path else DB_PATH
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fresh = not self.path.exists()
+        self.db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        if fresh and legacy_json and legacy_json.exists():
+            self.import_json(legacy_json)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> "SearchCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM search_results").fetchone()[0]
+
+    def _cutoff(self, now: float) -> float:
+        return now - self.ttl_s if self.ttl_s else float("-inf")
+
+    # -- reads -------------------------------------------------------------
+
+    def get_many(self, queries: Iterable[str]) -> dict[str, list]:
+        """{query: results} for the queries that are cached and not expired."""
+        qs = list(dict.fromkeys(queries))
+        now = time.time()
+        out: dict[str, list] = {}
+        # stay below SQLite's bound-parameter limit
+        for i in range(0, len(qs), 500):
+            chunk = qs[i : i + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = self.db.execute(
+                f"SELECT query, results FROM search_results WHERE query IN ({marks}) AND updated_at >= ?",
+                (*chunk, self._cutoff(now)),
+            ).fetchall()
+            for q, results in rows:
+                out[q] = json.loads(results)
+        if out:
+            self.db.executemany("UPDATE search_results SET accessed_at = ? WHERE query = ?", [(now, q) for q in out])
+        return out
+
+    def get(self, query: str) -> list | None:
+        return self.get_many([query]).get(query)
+
+    # -- writes ------------------------------------------------------------
+
+    def upsert_many(self, entries: dict[str, list], ts: float | None = None) -> int:
+        """Store {query: results} in one transaction; returns the number of rows written."""
+        now = time.time()
+        ts = now if ts is None else ts
+        rows = [(q, json.dumps(r, ensure_ascii=False), ts, now) for q, r in entries.items() if q != "_meta"]
+        if not rows:
+            return 0
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.db.executemany(
+                "INSERT INTO search_results(query, results, updated_at, accessed_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(query) DO UPDATE SET results = excluded.results, "
+                "updated_at = excluded.updated_at, accessed_at = excluded.accessed_at",
+                rows,
+            )
+            self._prune(now)
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    def upsert(self, query: str, results: list) -> None:
+        self.upsert_many({query: results})
+
+    def _prune(self, now: float) -> int:
+        """Drop expired rows, then the least recently accessed above max_entries."""
+        removed = self.db.execute("DELETE FROM search_results WHERE updated_at < ?", (self._cutoff(now),)).rowcount
+        over = self.db.execute("SELECT COUNT(*) FROM search_results").fetchone()[0] - self.max_entries
+        if over > 0:
+            removed += self.db.execute(
+                "DELETE FROM search_results WHERE query IN "
+                "(SELECT query FROM search_results ORDER BY accessed_at ASC LIMIT ?)",
+                (over,),
+            ).rowcount
+        return removed
+
+    def prune(self) -> int:
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            removed = self._prune(time.time())
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        return removed
+
+    # -- JSON interop --------------------------------------------------------
+
+    def import_json(self, path: Path | str) -> int:
+        """Load an old-style JSON cache; entries are dated by its _meta.updatedAt."""
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+        except Exception:
+            return 0
+        if not isinstance(data, dict):
+            return 0
+        ts = _parse_ts((data.get("_meta") or {}).get("updatedAt"))
+        return self.upsert_many({q: r for q, r in data.items() if isinstance(r, list)}, ts)
+
+    def export_json(self, path: Path | str) -> int:
+        """Write all live entries in the old JSON shape (atomically); returns the count."""
+        rows = self.db.execute(
+            "SELECT query, results FROM search_results WHERE updated_at >= ? ORDER BY rowid",
+            (self._cutoff(time.time()),),
+        ).fetchall()
+        out = {
+            "_meta": {"updatedAt": datetime.now(timezone.utc).isoformat(timespec="seconds")},
+            **{q: json.loads(r) for q, r in rows},
+        }
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(f".{p.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(out, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        os.replace(tmp, p)
+        return len(rows)
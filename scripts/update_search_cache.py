@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
-"""Update /home/phil/clawd/memory/auto-verify-search-cache.json.
+"""Store web search results in the auto-verify search cache (SQLite, see search_cache.py).
 
 Usage:
   update_search_cache.py --query "..." --results-json /tmp/results.json
+  update_search_cache.py --bulk-json /tmp/results_by_query.json   # {query: [results]}, one transaction
+  update_search_cache.py --export-json /home/phil/clawd/memory/auto-verify-search-cache.json
 
 results.json must be an array of objects with at least {url,title,description}.
 """
@@ -11,40 +13,49 @@ from __future__ import annotations
 
 import argparse
 import json
-from datetime import datetime, timezone
 from pathlib import Path
 
-CACHE_PATH = Path("/home/phil/clawd/memory/auto-verify-search-cache.json")
+from search_cache import DEFAULT_MAX_ENTRIES, DEFAULT_TTL_S, SearchCache
 
 
 def main() -> None:
     ap = argparse.ArgumentParser()
-    ap.add_argument("--query", required=True)
-    ap.add_argument("--results-json", required=True)
+    ap.add_argument("--query")
+    ap.add_argument("--results-json")
+    ap.add_argument("--bulk-json", help="JSON object {query: [results]} to upsert in one go")
+    ap.add_argument("--export-json", help="Also write the whole cache in the old JSON shape to this path")
+    ap.add_argument("--db", default=None, help="SQLite path (default: next to the old JSON cache)")
+    ap.add_argument("--ttl-days", type=float, default=DEFAULT_TTL_S / 86400)
+    ap.add_argument("--max-entries", type=int, default=DEFAULT_MAX_ENTRIES)
     args = ap.parse_args()
 
-    q = args.query
-    results = json.loads(Path(args.results_json).read_text(encoding="utf-8"))
-    if not isinstance(results, list):
-        raise SystemExit("results-json must be a list")
-
-    cache = {}
-    if CACHE_PATH.exists():
-        try:
-            cache = json.loads(CACHE_PATH.read_text(encoding="utf-8"))
-        except Exception:
-            cache = {}
-
-    cache[q] = results
-    out = {
-        "_meta": {
-            "updatedAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
-        },
-        **{k: v for k, v in cache.items() if k != "_meta"},
-    }
-    CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    CACHE_PATH.write_text(json.dumps(out, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
-    print(json.dumps({"ok": True, "query": q, "count": len(results)}, ensure_ascii=False))
+    entries: dict[str, list] = {}
+    if args.query or args.results_json:
+        if not (args.query and args.results_json):
+            raise SystemExit("--query and --results-json go together")
+        results = json.loads(Path(args.results_json).read_text(encoding="utf-8"))
+        if not isinstance(results, list):
+            raise SystemExit("results-json must be a list")
+        entries[args.query] = results
+    if args.bulk_json:
+        bulk = json.loads(Path(args.bulk_json).read_text(encoding="utf-8"))
+        if not isinstance(bulk, dict) or not all(isinstance(v, list) for k, v in bulk.items() if k != "_meta"):
+            raise SystemExit("bulk-json must be an object of query -> list")
+        entries.update({k: v for k, v in bulk.items() if k != "_meta"})
+    if not entries and not args.export_json:
+        raise SystemExit("nothing to do: pass --query/--results-json, --bulk-json or --export-json")
+
+    with SearchCache(args.db, ttl_s=args.ttl_days * 86400, max_entries=args.max_entries) as cache:
+        written = cache.upsert_many(entries)
+        exported = cache.export_json(args.export_json) if args.export_json else None
+        total = len(cache)
+
+    summary = {"ok": True, "count": written, "entries": total}
+    if args.query and not args.bulk_json:
+        summary.update({"query": args.query, "count": len(entries[args.query])})
+    if exported is not None:
+        summary["exported"] = exported
+    print(json.dumps(summary, ensure_ascii=False))
 
 
 if __name__ == "__main__":
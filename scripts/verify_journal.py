@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Checkpoint journal for auto_verify runs, kept in auto_verify_state.json.
+
+The orchestrator's keys (nextLakeIndex, lastRun, ...) stay as they are; the journal
+lives next to them under "lakes":
+
+  "lakes": {
+    "<lake>": {
+      "entries": {"<type>:<id>": {"at", "outcome", "attempts", "nextAt", "source"?}},
+      "lastSliceAt": "...", "remaining": 12
+    }
+  }
+
+Outcomes: verified, no-match (pages fetched, none passed), unreachable (every fetch
+failed), no-urls (nothing to fetch yet, retried on the next run).
+no-match and unreachable back off exponentially per entry (1, 2, 4, ... days, capped),
+so dead candidates are not re-fetched every night. Resumed runs skip every entry whose
+nextAt lies in the future.
+
+save() writes the whole state atomically (tmp file + os.replace); auto_verify calls it
+every few decisions together with the data files, so a killed run loses at most one
+checkpoint interval.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from lake_dataset import write_json_atomic
+
+ROOT = Path(__file__).resolve().parents[1]
+STATE_PATH = ROOT / "auto_verify_state.json"
+
+VERIFIED = "verified"
+NO_MATCH = "no-match"
+UNREACHABLE = "unreachable"
+NO_URLS = "no-urls"
+
+BACKOFF_BASE_DAYS = 1.0
+BACKOFF_MAX_DAYS = 30.0
+# verified entries drop out of the data's unverified list; keep their record this long
+KEEP_VERIFIED_DAYS = 30
+
+
+def now_utc() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def iso(dt: datetime) -> str:
+    return dt.isoformat(timespec="seconds")
+
+
+def parse_iso(s: str | None) -> datetime | None:
+    try:
+        return datetime.fromisoformat(s) if s else None
+    except ValueError:
+        return None
+
+
+def outcome_of(best: str | None, trace: list[dict[str, Any]]) -> str:
+    """Classify one auto_verify decision from its pick and trace."""
+    if best:
+        return VERIFIED
+    fetched = [r for r in trace if r.get("fetched")]
+    if not fetched:
+        return NO_URLS
+    if all(r.get("error") for r in fetched):
+        return UNREACHABLE
+    return NO_MATCH
+
+
+class VerifyJournal:
+    def __init__(self, lake_id: str, path: Path | None = None) -> None:
+        self.path = path or STATE_PATH
+        self.lake_id = lake_id
+        try:
+            self.state: dict[str, Any] = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception:
+            self.state = {}
+        lake = self.state.setdefault("lakes", {}).setdefault(lake_id, {})
+        self.entries: dict[str, dict[str, Any]] = lake.setdefault("entries", {})
+        self.lake = lake
+
+    def due(self, typ: str, item_id: str, now: datetime | None = None) -> bool:
+        """False while the entry is inside its backoff window."""
+        e = self.entries.get(f"{typ}:{item_id}")
+        nxt = parse_iso(e.get("nextAt")) if e else None
+        return nxt is None or nxt <= (now or now_utc())
+
+    def record(self, typ: str, item_id: str, outcome: str, source: str | None = None, now: datetime | None = None) -> dict:
+        now = now or now_utc()
+        key = f"{typ}:{item_id}"
+        prev = self.entries.get(key) or {}
+        attempts = prev.get("attempts", 0) + 1 if outcome in (NO_MATCH, UNREACHABLE) else 0
+        e: dict[str, Any] = {"at": iso(now), "outcome": outcome, "attempts": attempts}
+        if attempts:
+            days = min(BACKOFF_MAX_DAYS, BACKOFF_BASE_DAYS * 2 ** (attempts - 1))
+            e["nextAt"] = iso(now + timedelta(days=days))
+        if source:
+            e["source"] = source
+        self.entries[key] = e
+        return e
+
+    def prune(self, now: datetime | None = None) -> int:
+        cutoff = (now or now_utc()) - timedelta(days=KEEP_VERIFIED_DAYS)
+        old = [k for k, e in self.entries.items() if e.get("outcome") == VERIFIED and (parse_iso(e.get("at")) or cutoff) < cutoff]
+        for k in old:
+            del self.entries[k]
+        return len(old)
+
+    def save(self, remaining: int | None = None) -> None:
+        self.lake["lastSliceAt"] = iso(now_utc())
+        if remaining is not None:
+            self.lake["remaining"] = remaining
+        write_json_atomic(self.path, self.state)
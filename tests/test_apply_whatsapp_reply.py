@@ -0,0 +1,51 @@
+"""A single --reply of scripts/apply_whatsapp_reply.py keeps the site data in step (scratch copy of data/).
+
+Run: python3 -m unittest discover -s tests
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+ITEM_ID = 'test-reply-marina'
+SOURCE = 'https://www.test-reply-marina.de/'
+
+
+class SingleReplyTest(unittest.TestCase):
+  def setUp(self):
+    tmp = tempfile.TemporaryDirectory()
+    self.addCleanup(tmp.cleanup)
+    data = Path(tmp.name) / 'data'
+    shutil.copytree(ROOT / 'data', data)
+    self.env = {**os.environ, 'BS_DATA_DIR': str(data / 'lakes'), 'BS_POI_INDEX': str(Path(tmp.name) / 'poi_index.json')}
+    self.harbors = data / 'lakes' / 'bodensee' / 'harbors.json'
+    items = json.loads(self.harbors.read_text(encoding='utf-8'))
+    items.append({**items[0], 'id': ITEM_ID, 'name': 'Test Reply Marina', 'url': '', 'source': '', 'lastVerified': '',
+                  'candidateUrl': SOURCE, 'candidateFoundAt': '2026-02-11', 'candidateSource': 'osm'})
+    self.harbors.write_text(json.dumps(items, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+    for script in ('build_map_bundle', 'build_search_index'):
+      r = self.run_script(script, 'bodensee')
+      self.assertEqual(r.returncode, 0, r.stderr)
+
+  def run_script(self, name, *args):
+    return subprocess.run([sys.executable, str(ROOT / 'scripts' / f'{name}.py'), *args],
+                          cwd=ROOT, env=self.env, capture_output=True, text=True)
+
+  def test_checks_pass_after_single_reply(self):
+    r = self.run_script('apply_whatsapp_reply', '--type', 'harbor', '--id', ITEM_ID, '--reply', f'source {SOURCE}')
+    self.assertEqual(r.returncode, 0, r.stderr)
+    item = next(it for it in json.loads(self.harbors.read_text(encoding='utf-8')) if it['id'] == ITEM_ID)
+    self.assertEqual((item['source'], item['candidateUrl']), (SOURCE, None))
+    for script in ('build_map_bundle', 'build_search_index'):
+      r = self.run_script(script, '--check')
+      self.assertEqual(r.returncode, 0, f'{script}: {r.stdout}{r.stderr}')
+
+
+if __name__ == '__main__':
+  unittest.main()
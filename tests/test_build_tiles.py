@@ -0,0 +1,79 @@
+"""Map tiles of scripts/build_tiles.py stay tied to the lake's bundle (synthetic lake above --min-pois).
+
+Run: python3 -m unittest discover -s tests
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+LAKE = 'synthsee'
+
+MOVE_AND_SAVE = '''
+import sys
+sys.path.insert(0, sys.argv[1])
+from lake_dataset import LakeDataset
+ds = LakeDataset.load(sys.argv[2])
+rec = ds.records("gastro")[0]
+rec["lat"] = rec["lat"] + 0.2
+ds.save()
+'''
+
+
+class TilesTest(unittest.TestCase):
+  def setUp(self):
+    tmp = tempfile.TemporaryDirectory()
+    self.addCleanup(tmp.cleanup)
+    self.out = Path(tmp.name)
+    self.env = {**os.environ, 'BS_DATA_DIR': str(self.out / 'lakes')}
+    self.run_ok('gen_synthetic_lake', '--pois', '2000', '--out', str(self.out))
+    self.run_ok('build_map_bundle', LAKE)
+    self.run_ok('build_tiles', LAKE)
+
+  def run_script(self, name, *args):
+    return subprocess.run([sys.executable, str(ROOT / 'scripts' / f'{name}.py'), *args],
+                          cwd=ROOT, env=self.env, capture_output=True, text=True)
+
+  def run_ok(self, name, *args):
+    r = self.run_script(name, *args)
+    self.assertEqual(r.returncode, 0, f'{name}: {r.stdout}{r.stderr}')
+    return r
+
+  def tile_index(self):
+    return json.loads((self.out / 'tiles' / LAKE / 'index.json').read_text(encoding='utf-8'))
+
+  def bundle_hash(self):
+    return json.loads((self.out / 'bundles' / 'manifest.json').read_text(encoding='utf-8'))[LAKE]['hash']
+
+  def test_index_records_bundle_hash(self):
+    self.assertEqual(self.tile_index()['bundle'], self.bundle_hash())
+    self.run_ok('build_tiles', '--check')
+
+  def test_hand_edit_is_stale(self):
+    p = self.out / 'lakes' / LAKE / 'gastros.json'
+    items = json.loads(p.read_text(encoding='utf-8'))
+    items[0], items[1] = items[1], items[0]  # same counts, other ordinals
+    p.write_text(json.dumps(items, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+    r = self.run_script('build_tiles', '--check')
+    self.assertEqual(r.returncode, 1)
+    self.assertEqual(json.loads(r.stdout)['stale'], [LAKE])
+
+  def test_save_rebuilds_tiles(self):
+    before = self.tile_index()
+    r = subprocess.run([sys.executable, '-c', MOVE_AND_SAVE, str(ROOT / 'scripts'), LAKE],
+                       cwd=ROOT, env=self.env, capture_output=True, text=True)
+    self.assertEqual(r.returncode, 0, r.stderr)
+    after = self.tile_index()
+    self.assertNotEqual(after['v'], before['v'])
+    self.assertEqual(after['bundle'], self.bundle_hash())
+    for script in ('build_map_bundle', 'build_search_index', 'build_tiles'):
+      self.run_ok(script, '--check')
+
+
+if __name__ == '__main__':
+  unittest.main()
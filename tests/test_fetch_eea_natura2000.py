@@ -0,0 +1,75 @@
+"""Paging and query extent of tools/fetch_eea_natura2000_geojson.py (fake ArcGIS endpoint).
+
+Run: python3 -m unittest discover -s tests
+"""
+
+import importlib.util
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+_spec = importlib.util.spec_from_file_location('fetch_eea', ROOT / 'tools' / 'fetch_eea_natura2000_geojson.py')
+fetch_eea = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(fetch_eea)
+
+
+def fake_get(total, server_cap, flag_limit=True):
+  """ArcGIS-like query: at most min(resultRecordCount, server_cap) rows per response."""
+  rows = [{'attributes': {'sitecode': f'S{i:05d}'}} for i in range(total)]
+  calls = []
+
+  def get(params):
+    calls.append(params)
+    start = params['resultOffset']
+    n = min(params['resultRecordCount'], server_cap)
+    batch = rows[start:start + n]
+    obj = {'features': batch}
+    if flag_limit and start + len(batch) < total:
+      obj['exceededTransferLimit'] = True
+    return obj
+
+  return get, calls
+
+
+def codes(features):
+  return [f['attributes']['sitecode'] for f in features]
+
+
+class FetchPagesTest(unittest.TestCase):
+  def test_server_cap_below_page_size(self):
+    get, calls = fake_get(2500, server_cap=300)
+    got = fetch_eea.fetch_pages((8, 47, 10, 48), get, page_size=1000)
+    self.assertEqual(codes(got), [f'S{i:05d}' for i in range(2500)])
+    self.assertEqual([c['resultOffset'] for c in calls][:3], [0, 300, 600])
+
+  def test_full_pages(self):
+    get, calls = fake_get(2500, server_cap=1000)
+    got = fetch_eea.fetch_pages((8, 47, 10, 48), get, page_size=1000)
+    self.assertEqual(len(got), 2500)
+    self.assertEqual(len(set(codes(got))), 2500)
+    self.assertEqual(len(calls), 3)
+
+  def test_exact_multiple_stops_on_empty_page(self):
+    get, calls = fake_get(2000, server_cap=1000, flag_limit=False)
+    got = fetch_eea.fetch_pages((8, 47, 10, 48), get, page_size=1000)
+    self.assertEqual(len(got), 2000)
+    self.assertEqual(calls[-1]['resultOffset'], 2000)
+
+  def test_error_raises(self):
+    with self.assertRaises(RuntimeError):
+      fetch_eea.fetch_pages((8, 47, 10, 48), lambda params: {'error': {'code': 400}})
+
+
+class EnvelopeTest(unittest.TestCase):
+  def test_envelope_covers_clip_boxes(self):
+    bboxes = {'a': (47.3, 8.7, 47.9, 10.2), 'b': (46.0, 6.1, 46.5, 6.9)}
+    w, s, e, n = fetch_eea.union_envelope(bboxes.values(), fetch_eea.CLIP_MARGIN_DEG)
+    index = fetch_eea.BBoxIndex(bboxes, margin=fetch_eea.CLIP_MARGIN_DEG)
+    for bs, bw, bn, be in index.boxes.values():
+      self.assertTrue(s <= bs and w <= bw and n >= bn and e >= be)
+    # a feature only inside the margin is inside the query too
+    self.assertLess(w, 6.1 - fetch_eea.CLIP_MARGIN_DEG)
+
+
+if __name__ == '__main__':
+  unittest.main()
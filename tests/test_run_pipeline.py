@@ -0,0 +1,63 @@
+"""Stage time limits of scripts/run_pipeline.py against a slow, failing Overpass (stubbed).
+
+Run: python3 -m unittest discover -s tests
+"""
+
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'scripts'))
+
+import find_candidates_osm  # noqa: E402
+import run_pipeline  # noqa: E402
+
+
+class SlowOverpassTest(unittest.TestCase):
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory()
+    self.calls = []
+    saved = (find_candidates_osm.CACHE_DIR, find_candidates_osm.post_overpass)
+    find_candidates_osm.CACHE_DIR = Path(self.tmp.name)
+
+    def post(query, timeout=find_candidates_osm.REQUEST_TIMEOUT_S):
+      self.calls.append(timeout)
+      time.sleep(min(timeout, 0.8))
+      raise ConnectionError('overpass down')
+
+    find_candidates_osm.post_overpass = post
+    self.addCleanup(setattr, find_candidates_osm, 'CACHE_DIR', saved[0])
+    self.addCleanup(setattr, find_candidates_osm, 'post_overpass', saved[1])
+    self.addCleanup(self.tmp.cleanup)
+
+  def test_stage_limit_interrupts_retrying_fetch(self):
+    # no deadline: the SIGALRM limit fires inside the request, in the retry loop
+    report = {'stages': []}
+    t0 = time.monotonic()
+    result = run_pipeline.run_stage(report, 'find', 0.5, lambda: find_candidates_osm.fetch_overpass('q', 0))
+    self.assertLess(time.monotonic() - t0, 1.5)
+    self.assertIsNone(result)
+    self.assertTrue(report['stages'][0]['error'].startswith('StageTimeout'))
+    self.assertEqual(len(self.calls), 1)
+
+  def test_deadline_caps_requests_and_retries(self):
+    t0 = time.monotonic()
+    js, status, err = find_candidates_osm.fetch_overpass('q', 0, deadline=run_pipeline.deadline(0.5))
+    self.assertLess(time.monotonic() - t0, 1.0)
+    self.assertEqual((js, status), (None, 'failed'))
+    self.assertIn('overpass down', err)
+    self.assertTrue(all(t <= 0.5 for t in self.calls))
+
+  def test_find_stage_stops_within_limit(self):
+    report = {'stages': []}
+    opts = {'prefetched': None, 'candidates_dir': None, 'max_age_h': 0, 'offline': False, 'find_timeout': 1.0}
+    t0 = time.monotonic()
+    run_pipeline.run_stage(report, 'find', opts['find_timeout'], lambda: run_pipeline.load_candidates('bodensee', opts))
+    self.assertLess(time.monotonic() - t0, 1.5)
+
+
+if __name__ == '__main__':
+  unittest.main()
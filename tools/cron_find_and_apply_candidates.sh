@@ -2,61 +2,17 @@
 set -euo pipefail
 cd "$(dirname "$0")/.."
 
-# 1) Find + apply candidates per lake
-TOTAL=0
-
-if [[ "$#" -gt 0 ]]; then
-  LAKES="$*"
-else
-  LAKES=$(python3 - <<'PY'
-import json
-from pathlib import Path
-l=json.loads(Path('data/lakes.json').read_text(encoding='utf-8'))
-print(' '.join([x['id'] for x in l]))
-PY
-)
-fi
-
-for LAKE in ${LAKES}; do
-  echo "LAKE=${LAKE}"
-  OUT="/tmp/osm_candidates_${LAKE}.json"
-  # Overpass can hang; put a hard cap per lake.
-  timeout 220s python3 scripts/find_candidates_osm.py --lake "${LAKE}" > "${OUT}" || true
-
-  # Skip if the candidate file is empty or invalid (e.g., timeout / overpass error)
-  if [[ ! -s "${OUT}" ]]; then
-    echo "ADDED_${LAKE}=0"
-    echo "CHANGED_${LAKE}=0"
-    continue
-  fi
-
-  # 2a) Bootstrap new entries from OSM (new lakes start empty)
-  ADDED=$(python3 scripts/import_osm_candidates.py --lake "${LAKE}" --candidates "${OUT}" | python3 -c "import sys, json; j=json.load(sys.stdin); print(j.get('added',0))")
-
-  # 2b) Apply candidate URLs to existing entries (strict: only candidate* fields)
-  CHANGED=$(python3 scripts/apply_candidates.py --lake "${LAKE}" --candidates "${OUT}" | tail -n 1 | tr -d '\r')
-
-  # 2c) Sanitize URLs + dedup for this lake
-  python3 scripts/sanitize_urls.py --lake "${LAKE}" >/dev/null || true
-  python3 scripts/dedup_lake.py --lake "${LAKE}" >/dev/null || true
-
-  echo "ADDED_${LAKE}=${ADDED}"
-  echo "CHANGED_${LAKE}=${CHANGED}"
-
-  if [[ "${ADDED}" != "0" ]]; then
-    TOTAL=$((TOTAL + ADDED))
-  fi
-  if [[ "${CHANGED}" != "0" ]]; then
-    TOTAL=$((TOTAL + CHANGED))
-  fi
-done
-
-# 3) Rebuild sitemap/detail pages
-python3 scripts/gen_detail_pages.py >/dev/null || true
-
-# 3) Commit + push if anything changed
-if [[ "${TOTAL}" != "0" ]]; then
-  git add data/lakes/**/*.json data/lakes.json sitemap.xml robots.txt detail js css scripts tools artikel i18n index.html || true
+# 1) Find + import + apply + sanitize + dedup per lake, then rebuild sitemap/detail pages.
+#    Runs in one Python process (lakes in parallel); see scripts/run_pipeline.py.
+#    Usage: tools/cron_find_and_apply_candidates.sh [lake ...]
+REPORT="/tmp/pipeline_report.json"
+OUT=$(python3 scripts/run_pipeline.py "$@" --workers 4 --find-timeout 220 --report "${REPORT}")
+echo "${OUT}"
+TOTAL=$(sed -n 's/^TOTAL=//p' <<<"${OUT}")
+
+# 2) Commit + push if anything changed
+if [[ "${TOTAL:-0}" != "0" ]]; then
+  git add data/lakes/**/*.json data/lakes.json data/poi-index.json data/bundles data/search data/tiles sitemap.xml robots.txt detail js css scripts tools artikel i18n index.html || true
   git commit -m "Cron: apply OSM candidates (multi-lake, candidateUrl only)" || true
   git push origin main
   echo "CANDIDATES_APPLIED=${TOTAL}"
@@ -1,26 +1,52 @@
 #!/usr/bin/env python3
-"""Fetch Natura 2000 polygons (EEA) for a bbox and write GeoJSON.
+"""Fetch Natura 2000 polygons (EEA) for every lake and write per-lake zone layers.
 
 Source: EEA discomap FeatureServer (official EU provider).
+
+- Lake bboxes come from data/lakes.json. The union extent (bboxes plus CLIP_MARGIN_DEG,
+  the same boxes features are clipped to) is queried once, paging with
+  resultOffset until the server has no more features; every page goes through the
+  shared HTTP cache (scripts/http_cache.py, variant "arcgis"), so reruns within
+  --cache-ttl-h cost no request.
+- Esri rings become proper GeoJSON: clockwise rings start a polygon, counter-clockwise
+  rings are holes of the polygon that contains them (MultiPolygon if needed).
+- Features are assigned to lakes through a grid index over the lake bboxes
+  (find_candidates_osm.BBoxIndex) and clipped to the lake bbox plus CLIP_MARGIN_DEG.
+- Per zoom level in ZOOMS the rings are simplified with Douglas-Peucker at TOL_PX screen
+  pixels and coordinates are quantized to the decimals that zoom can show; rings that
+  collapse (or are smaller than the tolerance) are dropped. Output is compact JSON:
+    data/layers/<lake>/natura2000.z<zoom>.geojson  (one file per level)
+    data/layers/<lake>/natura2000.geojson          (finest level)
+- data/lakes/<lake>/layers.json gets (or keeps) an "eu_natura2000_<lake>" geojson entry
+  with path and zoomPaths; the map loads the level for its zoom. Lakes without
+  features lose the entry. The map bundles and search indexes of changed lakes are rebuilt.
+
+Usage:
+  python3 tools/fetch_eea_natura2000_geojson.py                  # all lakes
+  python3 tools/fetch_eea_natura2000_geojson.py --lake bodensee --zooms 8,11,14
 """
 
+import argparse
 import json
+import math
+import sys
 from pathlib import Path
-import requests
+from urllib.parse import urlencode
 
-OUT = Path('data/layers/de_natura2000.geojson')
-OUT.parent.mkdir(parents=True, exist_ok=True)
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'scripts'))
+from find_candidates_osm import BBoxIndex, load_bboxes, widen  # noqa: E402
+from http_cache import HttpCache  # noqa: E402
+from lake_dataset import DATA_DIR, dump_json, load_lakes, rebuild_site_data, write_json_atomic  # noqa: E402
 
-# Rough Bodensee bbox (WGS84)
-# west,south,east,north
-BBOX = (8.70, 47.40, 10.35, 47.85)
+LAYERS_DIR = ROOT / 'data' / 'layers'
+LAYER_NAME = 'natura2000'
 
 URL = 'https://nest.discomap.eea.europa.eu/arcgis/rest/services/Hosted/Layman_Sites/FeatureServer/0/query'
 
 PARAMS = {
   'f': 'json',
   'where': "1=1",
-  'geometry': ','.join(map(str, BBOX)),
   'geometryType': 'esriGeometryEnvelope',
   'inSR': '4326',
   'spatialRel': 'esriSpatialRelIntersects',
@@ -29,41 +55,403 @@ PARAMS = {
   'outSR': '4326',
 }
 
-# ArcGIS often needs this to avoid huge payloads
-PARAMS['resultRecordCount'] = 2000
-
-r = requests.get(URL, params=PARAMS, timeout=60, headers={'user-agent':'Mozilla/5.0'})
-r.raise_for_status()
-obj = r.json()
-
-features = []
-for f in obj.get('features', []):
-  geom = f.get('geometry') or {}
-  rings = geom.get('rings')
-  if not rings:
-    continue
-  props = f.get('attributes') or {}
-  # Convert esri rings to GeoJSON polygon/multipolygon heuristically:
-  # We'll emit as MultiPolygon with one polygon composed of rings.
-  coords = []
-  for ring in rings:
-    coords.append([[pt[0], pt[1]] for pt in ring])
-  gj = {
-    'type': 'Feature',
-    'properties': {
-      'sitecode': props.get('sitecode'),
-      'sitename': props.get('sitename'),
-      'sitetype': props.get('sitetype'),
-      'sitetype_label': props.get('sitetype_label'),
-      'provider': 'EEA Natura 2000',
-    },
-    'geometry': {
-      'type': 'Polygon',
-      'coordinates': coords,
+SOURCE = 'https://natura2000.eea.europa.eu/ (data via https://nest.discomap.eea.europa.eu/ arcgis FeatureServer Layman_Sites)'
+
+# ArcGIS caps each response; page with resultOffset
+PAGE_SIZE = 1000
+MAX_PAGES = 100
+MAX_PAGE_BYTES = 64 * 1024 * 1024
+CACHE_TTL_H = 7 * 24
+
+# keep clip edges off-screen around the lake
+CLIP_MARGIN_DEG = 0.05
+
+ZOOMS = (8, 10, 12, 14)
+TOL_PX = 1.0
+MAX_DIGITS = 6
+
+
+# -- fetching -----------------------------------------------------------------------
+
+def union_envelope(bboxes, margin=0.0):
+  """(south, west, north, east) boxes -> esri envelope west,south,east,north.
+
+  Each box is first widened by `margin` exactly as split_by_lake's BBoxIndex does, so
+  every feature that reaches a lake's clip box is fetched.
+  """
+  bs = [widen(b, margin) for b in bboxes]
+  return (min(b[1] for b in bs), min(b[0] for b in bs), max(b[3] for b in bs), max(b[2] for b in bs))
+
+
+def fetch_pages(envelope, get, page_size=PAGE_SIZE):
+  """All esri features intersecting envelope (west,south,east,north), page by page.
+
+  The next offset is what has been received so far, not page * page_size: a server
+  whose own cap is below page_size returns short pages with exceededTransferLimit set.
+  """
+  features = []
+  offset = 0
+  for _ in range(MAX_PAGES):
+    params = dict(PARAMS, geometry=','.join(map(str, envelope)),
+                  resultOffset=offset, resultRecordCount=page_size)
+    obj = get(params)
+    if obj.get('error'):
+      raise RuntimeError(f"ArcGIS error: {obj['error']}")
+    batch = obj.get('features', [])
+    features.extend(batch)
+    offset += len(batch)
+    if not batch or (len(batch) < page_size and not obj.get('exceededTransferLimit')):
+      break
+  else:
+    raise RuntimeError(f'more than {MAX_PAGES} pages; narrow the bbox')
+  return features
+
+
+def cached_getter(cache):
+  def get(params):
+    url = f'{URL}?{urlencode(params)}'
+    txt = cache.fetch(url, variant='arcgis', timeout_s=120, max_read=MAX_PAGE_BYTES,
+                      headers={'Accept': 'application/json'})
+    return json.loads(txt)
+  return get
+
+
+# -- geometry -----------------------------------------------------------------------
+
+def signed_area(ring):
+  a = 0.0
+  for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+    a += x1 * y2 - x2 * y1
+  return a / 2
+
+
+def point_in_ring(pt, ring):
+  x, y = pt
+  inside = False
+  for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+    if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+      inside = not inside
+  return inside
+
+
+def esri_polygons(rings):
+  """Esri rings -> list of polygons [outer, *holes] (GeoJSON winding: outer CCW)."""
+  rings = [[[float(p[0]), float(p[1])] for p in ring] for ring in rings if len(ring) >= 4]
+  outers = [r for r in rings if signed_area(r) < 0]
+  holes = [r for r in rings if signed_area(r) >= 0]
+  if not outers:
+    # not esri winding after all: treat every ring as an outer ring
+    outers, holes = holes, []
+  polys = [[r[::-1]] for r in outers]
+  for h in holes:
+    owner = next((p for p in polys if point_in_ring(h[0], p[0])), None)
+    if owner is not None:
+      owner.append(h[::-1])
+  return polys
+
+
+def esri_to_features(esri_features):
+  features = []
+  for f in esri_features:
+    rings = (f.get('geometry') or {}).get('rings')
+    if not rings:
+      continue
+    props = f.get('attributes') or {}
+    polys = esri_polygons(rings)
+    if not polys:
+      continue
+    features.append({
+      'type': 'Feature',
+      'properties': {
+        'sitecode': props.get('sitecode'),
+        'sitename': props.get('sitename'),
+        'sitetype': props.get('sitetype'),
+        'sitetype_label': props.get('sitetype_label'),
+        'provider': 'EEA Natura 2000',
+      },
+      'geometry': polygons_geometry(polys),
+    })
+  return features
+
+
+def polygons_geometry(polys):
+  if len(polys) == 1:
+    return {'type': 'Polygon', 'coordinates': polys[0]}
+  return {'type': 'MultiPolygon', 'coordinates': polys}
+
+
+def _seg_dist2(p, a, b):
+  (px, py), (ax, ay), (bx, by) = p, a, b
+  dx, dy = bx - ax, by - ay
+  if dx == 0 and dy == 0:
+    return (px - ax) ** 2 + (py - ay) ** 2
+  t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / (dx * dx + dy * dy)))
+  return (px - ax - t * dx) ** 2 + (py - ay - t * dy) ** 2
+
+
+def douglas_peucker(pts, tol):
+  """Iterative Douglas-Peucker on a polyline; keeps both end points."""
+  if len(pts) < 3:
+    return list(pts)
+  tol2 = tol * tol
+  keep = [False] * len(pts)
+  keep[0] = keep[-1] = True
+  stack = [(0, len(pts) - 1)]
+  while stack:
+    i, j = stack.pop()
+    best, idx = 0.0, None
+    for k in range(i + 1, j):
+      d = _seg_dist2(pts[k], pts[i], pts[j])
+      if d > best:
+        best, idx = d, k
+    if idx is not None and best > tol2:
+      keep[idx] = True
+      stack.append((i, idx))
+      stack.append((idx, j))
+  return [p for p, k in zip(pts, keep) if k]
+
+
+def simplify_ring(ring, tol, digits):
+  """Simplified, quantized closed ring, or None if it collapses."""
+  xs = [p[0] for p in ring]
+  ys = [p[1] for p in ring]
+  if max(xs) - min(xs) < tol and max(ys) - min(ys) < tol:
+    return None
+  # split at the point farthest from the start so the closing point is not pinned
+  far = max(range(len(ring)), key=lambda k: _seg_dist2(ring[k], ring[0], ring[0]))
+  pts = douglas_peucker(ring[: far + 1], tol)[:-1] + douglas_peucker(ring[far:], tol)
+  out = []
+  for x, y in pts:
+    q = [round(x, digits), round(y, digits)]
+    if not out or q != out[-1]:
+      out.append(q)
+  if out[0] != out[-1]:
+    out.append(out[0])
+  if len(out) < 4 or signed_area(out) == 0:
+    return None
+  return out
+
+
+def zoom_tolerance(z, tol_px=TOL_PX):
+  """Degrees per tol_px screen pixels at zoom z (256 px tiles, longitude scale)."""
+  return tol_px * 360.0 / (256 * 2 ** z)
+
+
+def zoom_digits(tol):
+  return min(MAX_DIGITS, max(1, math.ceil(-math.log10(tol / 4))))
+
+
+def simplify_features(features, z, tol_px=TOL_PX):
+  tol = zoom_tolerance(z, tol_px)
+  digits = zoom_digits(tol)
+  out = []
+  for f in features:
+    g = f['geometry']
+    polys = [g['coordinates']] if g['type'] == 'Polygon' else g['coordinates']
+    kept = []
+    for poly in polys:
+      outer = simplify_ring(poly[0], tol, digits)
+      if outer is None:
+        continue
+      holes = [h for h in (simplify_ring(r, tol, digits) for r in poly[1:]) if h]
+      kept.append([outer, *holes])
+    if kept:
+      out.append({**f, 'geometry': polygons_geometry(kept)})
+  return out
+
+
+# -- per-lake clipping --------------------------------------------------------------
+
+def feature_bounds(f):
+  """(south, west, north, east) of a GeoJSON polygon feature."""
+  xs, ys = [], []
+  for poly in _polys(f['geometry']):
+    for x, y in poly[0]:
+      xs.append(x)
+      ys.append(y)
+  return min(ys), min(xs), max(ys), max(xs)
+
+
+def clip_ring(ring, box):
+  """Sutherland-Hodgman clip of a closed ring to box (south, west, north, east)."""
+  s, w, n, e = box
+  edges = (
+    (lambda p: p[0] >= w, lambda a, b: _cut_x(a, b, w)),
+    (lambda p: p[0] <= e, lambda a, b: _cut_x(a, b, e)),
+    (lambda p: p[1] >= s, lambda a, b: _cut_y(a, b, s)),
+    (lambda p: p[1] <= n, lambda a, b: _cut_y(a, b, n)),
+  )
+  pts = ring[:-1]
+  for inside, cut in edges:
+    if not pts:
+      break
+    out = []
+    prev = pts[-1]
+    for cur in pts:
+      if inside(cur):
+        if not inside(prev):
+          out.append(cut(prev, cur))
+        out.append(cur)
+      elif inside(prev):
+        out.append(cut(prev, cur))
+      prev = cur
+    pts = out
+  if len(pts) < 3:
+    return None
+  return pts + [pts[0]]
+
+
+def _cut_x(a, b, x):
+  t = (x - a[0]) / (b[0] - a[0])
+  return [x, a[1] + t * (b[1] - a[1])]
+
+
+def _cut_y(a, b, y):
+  t = (y - a[1]) / (b[1] - a[1])
+  return [a[0] + t * (b[0] - a[0]), y]
+
+
+def clip_feature(f, box):
+  fs, fw, fn, fe = feature_bounds(f)
+  if fs >= box[0] and fw >= box[1] and fn <= box[2] and fe <= box[3]:
+    return f
+  kept = []
+  for poly in _polys(f['geometry']):
+    outer = clip_ring(poly[0], box)
+    if outer is None:
+      continue
+    holes = [h for h in (clip_ring(r, box) for r in poly[1:]) if h]
+    kept.append([outer, *holes])
+  return {**f, 'geometry': polygons_geometry(kept)} if kept else None
+
+
+def split_by_lake(features, bboxes, margin=CLIP_MARGIN_DEG):
+  """lake -> features intersecting its bbox (+margin), clipped to it."""
+  index = BBoxIndex(bboxes, margin=margin)
+  out = {lake: [] for lake in bboxes}
+  for f in features:
+    for lake in index.lakes_for(*feature_bounds(f)):
+      clipped = clip_feature(f, index.boxes[lake])
+      if clipped:
+        out[lake].append(clipped)
+  return out
+
+
+# -- output -------------------------------------------------------------------------
+
+def level_path(out, z):
+  return out.with_name(f'{out.stem}.z{z}{out.suffix}')
+
+
+def dump_fc(features):
+  return json.dumps({'type': 'FeatureCollection', 'features': features},
+                    ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def write_levels(features, out, zooms=ZOOMS, tol_px=TOL_PX):
+  """Write one file per zoom (plus the finest level at `out`); returns the size report."""
+  out.parent.mkdir(parents=True, exist_ok=True)
+  raw = len((json.dumps({'type': 'FeatureCollection', 'features': features}, ensure_ascii=False, indent=2) + '\n').encode('utf-8'))
+  levels = {}
+  txt = ''
+  for z in sorted(zooms):
+    fs = simplify_features(features, z, tol_px)
+    txt = dump_fc(fs)
+    p = level_path(out, z)
+    p.write_text(txt, encoding='utf-8')
+    levels[str(z)] = {
+      'path': rel(p),
+      'features': len(fs),
+      'points': sum(len(r) for f in fs for poly in _polys(f['geometry']) for r in poly),
+      'bytes': len(txt.encode('utf-8')),
     }
-  }
-  features.append(gj)
+  out.write_text(txt, encoding='utf-8')
+  return {'rawBytes': raw, 'features': len(features), 'levels': levels}
+
+
+def _polys(g):
+  return [g['coordinates']] if g['type'] == 'Polygon' else g['coordinates']
+
+
+def clear_stale_levels(lake, report):
+  """Remove level files no longer produced (other --zooms, or no features at all)."""
+  keep = {lvl['path'] for lvl in report['levels'].values()} if report else set()
+  for p in (LAYERS_DIR / lake).glob(f'{LAYER_NAME}.z*.geojson'):
+    if rel(p) not in keep:
+      p.unlink()
+  if not report:
+    (LAYERS_DIR / lake / f'{LAYER_NAME}.geojson').unlink(missing_ok=True)
+
+
+def rel(p):
+  return str(p.relative_to(ROOT))
+
+
+def update_layers_config(lake, lake_name, report):
+  """Add/refresh/remove the lake's Natura 2000 entry in layers.json; True if changed."""
+  p = DATA_DIR / lake / 'layers.json'
+  try:
+    layers = json.loads(p.read_text(encoding='utf-8'))
+  except Exception:
+    layers = []
+  lid = f'eu_natura2000_{lake}'
+  entry = next((x for x in layers if x.get('id') == lid), None)
+  if report is None:
+    if entry is None:
+      return False
+    layers.remove(entry)
+  else:
+    if entry is None:
+      entry = {
+        'id': lid,
+        'name': f'EU: Natura 2000 (EEA, {lake_name} Ausschnitt)',
+        'kind': 'geojson',
+        'source': SOURCE,
+        'lastVerified': None,
+      }
+      layers.append(entry)
+    entry['path'] = rel(LAYERS_DIR / lake / f'{LAYER_NAME}.geojson')
+    entry['zoomPaths'] = {z: lvl['path'] for z, lvl in report['levels'].items()}
+  txt = dump_json(layers)
+  if p.exists() and p.read_text(encoding='utf-8') == txt:
+    return False
+  write_json_atomic(p, layers)
+  return True
+
+
+def main():
+  ap = argparse.ArgumentParser()
+  ap.add_argument('--lake', action='append', help='Only these lakes (repeatable; default: all in data/lakes.json)')
+  ap.add_argument('--zooms', default=','.join(map(str, ZOOMS)), help='Comma-separated zoom levels')
+  ap.add_argument('--tol-px', type=float, default=TOL_PX, help='Simplification tolerance in screen pixels')
+  ap.add_argument('--cache-ttl-h', type=float, default=CACHE_TTL_H, help='Reuse cached ArcGIS pages for this long')
+  args = ap.parse_args()
+
+  zooms = [int(z) for z in args.zooms.split(',') if z.strip()]
+  bboxes = load_bboxes()
+  if args.lake:
+    bboxes = {k: v for k, v in bboxes.items() if k in args.lake}
+  if not bboxes:
+    raise SystemExit('no lake bboxes (data/lakes.json)')
+  names = {l['id']: l.get('name') or l['id'] for l in load_lakes()}
+
+  cache = HttpCache(ttl_s=args.cache_ttl_h * 3600)
+  envelope = union_envelope(bboxes.values(), CLIP_MARGIN_DEG)
+  features = esri_to_features(fetch_pages(envelope, cached_getter(cache)))
+  per_lake = split_by_lake(features, bboxes)
+
+  lakes = {}
+  changed = []
+  for lake, fs in per_lake.items():
+    report = write_levels(fs, LAYERS_DIR / lake / f'{LAYER_NAME}.geojson', zooms, args.tol_px) if fs else None
+    clear_stale_levels(lake, report)
+    if update_layers_config(lake, names.get(lake, lake), report):
+      changed.append(lake)
+    lakes[lake] = report or {'features': 0}
+  rebuild_site_data(changed)
+  print(json.dumps({'envelope': envelope, 'features': len(features), 'httpCache': cache.stats,
+                    'layersChanged': changed, 'lakes': lakes}, ensure_ascii=False))
+
 
-fc = {'type':'FeatureCollection', 'features': features}
-OUT.write_text(json.dumps(fc, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
-print(f'written={OUT} features={len(features)}')
+if __name__ == '__main__':
+  main()
@@ -5,7 +5,10 @@ import sys
 from pathlib import Path
 from urllib.parse import urlparse
 
-import requests
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts'))
+from http_cache import HttpCache  # noqa: E402
+
+HTTP_CACHE = HttpCache()
 
 DATA_FILE = Path('data/harbors.json')
 
@@ -39,11 +42,9 @@ def pick_email(text: str):
   return m[0].strip()
 
 def fetch(url: str):
+  # raw HTML variant: tel:/mailto: hrefs must survive for pick_phone/pick_email
   try:
-    r = requests.get(url, timeout=20, headers={'user-agent':'Mozilla/5.0'})
-    if r.status_code >= 400:
-      return ''
-    return r.text
+    return HTTP_CACHE.fetch(url, variant='html', timeout_s=20, max_read=2_000_000)
   except Exception:
     return ''
 
@@ -85,7 +86,7 @@ def main():
         changed += 1
 
   DATA_FILE.write_text(json.dumps(data, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
-  print(f'checked={checked} changed={changed}')
+  print(f'checked={checked} changed={changed} cache={json.dumps(HTTP_CACHE.stats)}')
 
 if __name__ == '__main__':
   main()